@@ -0,0 +1,106 @@
+# File: bench_assertions.py
+# Purpose: Benchmark of what an assertion costs in _assertion_post_processor(), the old way
+#          (inspect.stack() for the caller, and the stack trace and report formatted on every
+#          failure) and the new way (swadl_stack's frame walk, and a report that's only rendered
+#          when it's logged or raised).
+# Usage: python -m SWADL.benchmarks.bench_assertions [iterations] [stack depth]
+# Notes: Runs expect_true() on a real SWADLBase, a few dozen frames deep as under a test runner.
+#        The old way is the same code with swadl_base's caller_name, SWADLStackTrace and
+#        SWADLLazyText swapped for eager versions. A failure costs the most when its warning is
+#        written, as the report has to be rendered then either way. It's cheap when the log level
+#        filters the warning out. The driver is never used, so no browser is started.
+
+import inspect
+import io
+import logging
+import sys
+import timeit
+import traceback
+
+from SWADL.engine import swadl_base
+from SWADL.engine.swadl_base import SWADLBase
+from SWADL.engine.swadl_constants import TEST_OBJECT
+
+
+class BenchHolder(object):
+    # Purpose: Stands in for the test, which collects the failures
+    accumulated_failures = []
+
+
+def old_caller_name(depth=1):
+    # Purpose: caller_name() as it used to be done
+    return inspect.stack()[depth + 1][0].f_code.co_name
+
+
+def old_stack_trace(frame):
+    # Purpose: SWADLStackTrace as it used to be, formatted up front
+    return traceback.format_stack(frame)
+
+
+def old_lazy_text(render):
+    # Purpose: SWADLLazyText as it used to be, the report rendered up front
+    return render()
+
+
+def swapped(old):
+    # Purpose: Swap swadl_base's stack helpers for the old eager ones, or put the new ones back
+    # Returns: the ones that were there
+    names = ('caller_name', 'SWADLStackTrace', 'SWADLLazyText')
+    replaced = tuple(getattr(swadl_base, name) for name in names)
+    for name, helper in zip(names, old):
+        setattr(swadl_base, name, helper)
+    return replaced
+
+
+def at_depth(depth, function):
+    # Purpose: Run function with `depth` extra frames on the stack, like a test runner would add
+    if depth <= 0:
+        return function()
+    return at_depth(depth - 1, function)
+
+
+def per_call(statement, iterations, depth):
+    # Purpose: Returns microseconds per call of statement, run at the given stack depth
+    seconds = at_depth(depth, lambda: min(timeit.repeat(statement, number=iterations, repeat=3)))
+    return seconds / iterations * 1e6
+
+
+def main(iterations=2000, depth=40):
+    # Purpose: Run the comparisons and print a table
+    logger = logging.getLogger(swadl_base.__name__)
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    base = SWADLBase(name='bench')
+    base.test_data[TEST_OBJECT] = BenchHolder()
+
+    def expect(exper):
+        base.expect_true(exper=exper)
+        # keep test_data and the failures from growing across the iterations
+        base.test_data.popitem()
+        del BenchHolder.accumulated_failures[:]
+
+    def at_level(level):
+        def run():
+            logger.setLevel(level)
+            return expect(False)
+        return run
+
+    cases = [
+        ('passing assertion', lambda: expect(True)),
+        ('failing assertion, warning written', at_level(logging.WARNING)),
+        ('failing assertion, warning filtered out', at_level(logging.ERROR)),
+    ]
+    new = (swadl_base.caller_name, swadl_base.SWADLStackTrace, swadl_base.SWADLLazyText)
+    old = (old_caller_name, old_stack_trace, old_lazy_text)
+    print(f"expect_true() cost, {iterations} iterations, {depth} frames deep")
+    print(f"{'case':42} {'old us':>10} {'new us':>10} {'speedup':>8}")
+    for name, statement in cases:
+        swapped(old)
+        old_us = per_call(statement, iterations, depth)
+        swapped(new)
+        new_us = per_call(statement, iterations, depth)
+        print(f"{name:42} {old_us:10.2f} {new_us:10.2f} {old_us / new_us:7.1f}x")
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:3]])
@@ -0,0 +1,153 @@
+# File: bench_bannerizer.py
+# Purpose: Benchmark of bannerizing a large synthetic test_data, the old way (string +=, and a
+#          list of str() keys to spot objects already displayed) and the new way (streamed
+#          pieces, and an id set).
+# Usage: python -m SWADL.benchmarks.bench_bannerizer [records]
+# Notes: Each record looks like a _validate() report, with a status dict, a list of element
+#        stand-ins (whose str() is slow, like a WebElement's) and a reference to its control,
+#        which is shared, so the dedupe gets exercised. It doesn't import SWADLBase, so it runs
+#        without a browser.
+
+import io
+import sys
+import time
+
+from SWADL.engine.bannerizer import OBJECT_ALREADY_DISPLAYED
+from SWADL.engine.bannerizer import bannerize
+from SWADL.engine.bannerizer import bannerize_to
+from SWADL.engine.swadl_constants import ID
+from SWADL.engine.swadl_dict import SWADLDict
+
+
+class OldBannerize:
+    # Purpose: what bannerizer.Bannerize used to do
+
+    def __init__(self):
+        self.indent = 0
+        self.final_result = ''
+        self.list_of_completed_objects = []
+        self.types_to_treat_as_string = (bool, str, int, tuple, float)
+
+    def ind(self, data):
+        return (self.indent * ' ') + data
+
+    def check_for_dupes(self, item):
+        if item is not None and not isinstance(item, self.types_to_treat_as_string):
+            if isinstance(item, dict) and ID in item.keys():
+                item_id_string = item[ID]
+            elif hasattr(item, "get_name"):
+                item_id_string = item.get_name()
+            else:
+                item_id_string = f"{item}"
+            item_id_string += f" with OID of {id(item)}"
+            if item_id_string in self.list_of_completed_objects:
+                item = f'{OBJECT_ALREADY_DISPLAYED} as {item_id_string}'
+            else:
+                self.list_of_completed_objects.append(item_id_string)
+        return item
+
+    def bannerize(self, data=None):
+        if isinstance(data, dict):
+            self.final_result += '{\n'
+            self.indent += 4
+            for key, item in data.items():
+                self.final_result += self.ind(f'"{key}": ')
+                self.bannerize(data=self.check_for_dupes(item))
+            self.indent -= 4
+            self.final_result += self.ind('}\n')
+        elif isinstance(data, list):
+            self.final_result += '[\n'
+            self.indent += 4
+            for item in data:
+                item = self.check_for_dupes(item)
+                self.final_result += self.ind('')
+                self.bannerize(data=item)
+            self.indent -= 4
+            self.final_result += self.ind(']\n')
+        else:
+            if isinstance(data, str) and not data == OBJECT_ALREADY_DISPLAYED:
+                data = f'"{data}"'
+            self.final_result += f'{data}\n'
+
+
+class FakeElement(object):
+    # Purpose: A WebElement stand-in. Its str() costs about what formatting a real one does.
+
+    def __init__(self, number):
+        self.number = number
+
+    def __str__(self):
+        return (
+            f'<selenium.webdriver.remote.webelement.WebElement '
+            f'(session="6855ae5be30b43a86d8f92f9e6fb2993", element="f.{self.number:032x}")>'
+        )
+
+
+class FakeControl(object):
+    # Purpose: A control stand-in, named the way SWADL objects are
+
+    def __init__(self, number):
+        self.number = number
+
+    def get_name(self):
+        return f'test_open_page/GoogleResultSection.(SWADLControl)result_{self.number}'
+
+
+def make_test_data(records):
+    # Purpose: Returns a test_data with `records` validation reports in it
+    controls = [FakeControl(number) for number in range(20)]
+    test_data = SWADLDict()
+    test_data[ID] = 'TEST_DATA'
+    for number in range(records):
+        report = SWADLDict()
+        report['result'] = 'PASSED'
+        report['for control'] = controls[number % len(controls)]
+        report['with selector'] = f'div.result:nth-child({number})'
+        report['control status cache'] = {
+            'exist': True, 'unique': True, 'visible': True, 'enabled': True,
+            'value': f'ChromeDriver overview {number}', 'actionable': True,
+        }
+        report['raw elements'] = [FakeElement(number * 3 + offset) for offset in range(3)]
+        report['comments'] = 'expected: "ChromeDriver", actual: "ChromeDriver overview"'
+        test_data[f'SWADL:Validation:result_{number}.visible at {number}'] = report
+    return test_data
+
+
+def timed(function):
+    # Purpose: Returns (seconds, result) of one call
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main(records=1000):
+    # Purpose: Run the comparison and print a table
+    test_data = make_test_data(records)
+
+    def old():
+        bannerizer = OldBannerize()
+        bannerizer.bannerize(test_data)
+        return bannerizer.final_result
+
+    old_seconds, old_text = timed(old)
+    new_seconds, new_text = timed(lambda: bannerize(test_data))
+    # same output, or the comparison means nothing
+    assert old_text == new_text
+    stream_seconds, _ = timed(lambda: bannerize_to(io.StringIO(), test_data))
+    limited_seconds, _ = timed(
+        lambda: bannerize(test_data, max_items=100, max_string=80)
+    )
+
+    print(f"bannerizing test_data with {records} records, {len(new_text) / 1e6:.1f} MB of output")
+    print(f"{'case':40} {'seconds':>10} {'speedup':>8}")
+    for name, seconds in (
+        ('old', old_seconds),
+        ('new, to a string', new_seconds),
+        ('new, streamed with bannerize_to()', stream_seconds),
+        ('new, max_items=100 max_string=80', limited_seconds),
+    ):
+        print(f"{name:40} {seconds:10.3f} {old_seconds / seconds:7.1f}x")
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:2]])
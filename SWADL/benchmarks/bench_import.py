@@ -0,0 +1,96 @@
+# File: bench_import.py
+# Purpose: Startup benchmark. Times importing SWADL's engine in fresh interpreters, with
+#          python -X importtime, cold (no cached bytecode) and warm (a second run with the cache
+#          from the first), in the default mode and with SWADL_FAST_STARTUP.
+# Usage: python -m SWADL.benchmarks.bench_import [module] [--runs N] [--history file.jsonl]
+# Notes: Each case gets its own empty PYTHONPYCACHEPREFIX, so nothing is shared between cases, or
+#        with the workspace. In the default mode swadl_constants turns bytecode writing off, so
+#        warm only gains on what was imported before it. --history appends one JSON line per run,
+#        so startup can be tracked over time.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_MODULE = 'SWADL.engine.swadl_control'
+
+
+def import_times(module, environment):
+    # Purpose: Import module in a fresh interpreter
+    # Returns: (total microseconds for module, {module name: cumulative microseconds})
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=environment, check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        cumulative[fields[2].strip()] = int(fields[1])
+    return cumulative.get(module, 0), cumulative
+
+
+def run_case(module, fast_startup, runs):
+    # Purpose: Time cold and warm imports in one mode
+    # Returns: dict of the best of `runs` for cold and warm, in milliseconds, and the slowest
+    #          imports of the last warm run
+    cold = []
+    warm = []
+    slowest = {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as cache:
+            environment = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+            environment.pop('PYTHONDONTWRITEBYTECODE', None)
+            if fast_startup:
+                environment['SWADL_FAST_STARTUP'] = 'True'
+            else:
+                environment.pop('SWADL_FAST_STARTUP', None)
+            cold.append(import_times(module, environment)[0])
+            total, slowest = import_times(module, environment)
+            warm.append(total)
+    top = sorted(slowest.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'cold ms': round(min(cold) / 1000, 1),
+        'warm ms': round(min(warm) / 1000, 1),
+        'slowest': [(name, round(us / 1000, 1)) for name, us in top[:8]],
+    }
+
+
+def main(arguments=None):
+    # Purpose: Run both modes, print a table, and optionally add the results to the history
+    parser = argparse.ArgumentParser(description='SWADL import time benchmark')
+    parser.add_argument('module', nargs='?', default=DEFAULT_MODULE)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--history', default=None)
+    arguments = parser.parse_args(arguments)
+
+    results = {
+        'default': run_case(arguments.module, fast_startup=False, runs=arguments.runs),
+        'SWADL_FAST_STARTUP': run_case(arguments.module, fast_startup=True, runs=arguments.runs),
+    }
+    print(f"import {arguments.module}, best of {arguments.runs}")
+    print(f"{'mode':24} {'cold ms':>10} {'warm ms':>10}")
+    for mode, result in results.items():
+        print(f"{mode:24} {result['cold ms']:10.1f} {result['warm ms']:10.1f}")
+    print("slowest imports, SWADL_FAST_STARTUP warm (cumulative ms):")
+    for name, ms in results['SWADL_FAST_STARTUP']['slowest']:
+        print(f"    {name:50} {ms:8.1f}")
+
+    if arguments.history:
+        with open(arguments.history, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps({
+                'time': time.time(),
+                'module': arguments.module,
+                'python': sys.version.split()[0],
+                'results': {mode: {key: result[key] for key in ('cold ms', 'warm ms')}
+                            for mode, result in results.items()},
+            }) + '\n')
+
+
+if __name__ == '__main__':
+    main()
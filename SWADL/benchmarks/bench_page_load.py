@@ -0,0 +1,74 @@
+# File: bench_page_load.py
+# Purpose: Benchmark of SWADLPageSection.load_page(), the old way (a 0.5s look to see if the page
+#          is already there, then 0.5s sleeps either side of maximizing) and the new way (one look,
+#          maximize once per session, then wait in the browser until the page is ready).
+# Usage: python -m SWADL.benchmarks.bench_page_load [loads] [seconds the page takes to load]
+# Notes: Runs against the offline local driver, whose WAIT_FOR_PAGE_READY answers once the page
+#        has had its load time, so no browser is needed. The section counts as loaded when the
+#        browser is on its url, in place of a validate_loaded_queue that would need a DOM.
+
+import os
+import sys
+import time
+
+os.environ.setdefault('SELENIUM_BROWSER', 'local')
+
+from SWADL.engine.swadl_base_section import SWADLPageSection  # noqa: E402
+from SWADL.engine.swadl_cfg import cfgdict  # noqa: E402
+from SWADL.engine.swadl_constants import BLANK_PAGE  # noqa: E402
+from SWADL.engine.swadl_constants import DRIVER  # noqa: E402
+from SWADL.engine.swadl_local_driver import SWADLLocalDriver  # noqa: E402
+
+
+class BenchPage(SWADLPageSection):
+    # Purpose: A page that's loaded when the browser is on it
+    url = 'https://bench.example/page'
+
+    def validate_loaded(self, controls=None, fatal=True, timeout=None, **kwargs):
+        loaded = self.driver.current_url == self.url
+        if not loaded and timeout:
+            time.sleep(timeout)
+        return loaded
+
+
+def old_load_page(section, url=None, timeout=40):
+    # Purpose: what load_page() used to do
+    if not section.validate_loaded(fatal=False, report=False, timeout=0.5):
+        section.driver.get(url or section.url)
+    section.sleep(0.5)
+    section.maximize()
+    section.sleep(0.5)
+    section.validate_loaded(timeout=timeout)
+
+
+def time_loads(load, section, loads):
+    # Purpose: Seconds per load, from about:blank each time
+    total = 0.0
+    for _ in range(loads):
+        section.driver.get(BLANK_PAGE)
+        start = time.perf_counter()
+        load(section)
+        total += time.perf_counter() - start
+    return total / loads
+
+
+def main(loads=5, load_time=0.1):
+    # Purpose: Time both ways, and print a table
+    driver = SWADLLocalDriver(load_time=load_time)
+    replaced = cfgdict[DRIVER].attach(driver)
+    if replaced is not None:
+        replaced.quit()
+    section = BenchPage()
+    old = time_loads(old_load_page, section, loads)
+    maximized = driver.maximized
+    new = time_loads(BenchPage.load_page, section, loads)
+    print(f"{loads} loads of a page that takes {load_time}s")
+    print(f"{'load_page':>10} {'seconds':>10} {'maximized':>10}")
+    print(f"{'old':>10} {old:10.3f} {maximized:10}")
+    print(f"{'new':>10} {new:10.3f} {driver.maximized - maximized:10}")
+    cfgdict[DRIVER].stop()
+
+
+if __name__ == '__main__':
+    main(*[float(argument) if index else int(argument)
+           for index, argument in enumerate(sys.argv[1:3])])
@@ -0,0 +1,75 @@
+# File: bench_runner.py
+# Purpose: Benchmark of the parallel runner (swadl_runner.py). Writes a throwaway suite of
+#          SWADLTest classes whose tests navigate the offline local driver and then wait, as a test
+#          waiting on a page would, and times it at 1, 2, 4 ... workers.
+# Usage: python -m SWADL.benchmarks.bench_runner [classes] [tests per class] [seconds per test]
+# Notes: Runs with SELENIUM_BROWSER=local, so no browser is needed. Each worker still pays for a
+#        fresh interpreter and SWADL import, which is what the 1 worker row shows on top of the
+#        serial test time.
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+TEST_MODULE = '''
+import time
+from SWADL.engine.swadl_base_test import SWADLTest
+
+'''
+
+TEST_CLASS = '''
+class TestBench{number}(SWADLTest):
+'''
+
+TEST_METHOD = '''
+    def test_{number}(self):
+        self.driver.get('https://bench.example/{number}')
+        time.sleep({seconds})
+'''
+
+
+def write_suite(directory, classes, tests, seconds):
+    # Purpose: Writes the suite, as the package bench_suite in directory
+    # Returns: the module name to run
+    package = os.path.join(directory, 'bench_suite')
+    os.makedirs(package)
+    open(os.path.join(package, '__init__.py'), 'w').close()
+    source = TEST_MODULE
+    for class_number in range(classes):
+        source += TEST_CLASS.format(number=class_number)
+        for test_number in range(tests):
+            source += TEST_METHOD.format(number=test_number, seconds=seconds)
+    with open(os.path.join(package, 'test_bench.py'), 'w', encoding='utf-8') as handle:
+        handle.write(source)
+    return 'bench_suite.test_bench'
+
+
+def main(classes=8, tests=4, seconds=0.25):
+    # Purpose: Run the suite at increasing worker counts, and print a table
+    os.environ['SELENIUM_BROWSER'] = 'local'
+    with tempfile.TemporaryDirectory() as directory:
+        module = write_suite(directory, classes, tests, seconds)
+        sys.path.insert(0, directory)
+        os.environ['PYTHONPATH'] = os.pathsep.join(
+            [directory] + [part for part in [os.environ.get('PYTHONPATH')] if part]
+        )
+        from SWADL.engine.swadl_runner import run
+
+        serial = classes * tests * seconds
+        print(f"{classes} classes of {tests} tests, {seconds}s each: {serial:.1f}s of test time")
+        print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+        workers = 1
+        while workers <= classes:
+            start = time.perf_counter()
+            records = run([module], workers=workers, output_dir=directory, stream=io.StringIO())
+            seconds_taken = time.perf_counter() - start
+            assert len(records) == classes * tests and all(r['result'] for r in records)
+            print(f"{workers:8} {seconds_taken:10.2f} {serial / seconds_taken:7.1f}x")
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[float(argument) if index == 2 else int(argument)
+           for index, argument in enumerate(sys.argv[1:4])])
@@ -3,6 +3,9 @@
 from SWADL.engine.swadl_constants import ID
 
 OBJECT_ALREADY_DISPLAYED = '*** OBJECT ALREADY DISPLAYED ABOVE ***'
+MAX_DEPTH_REACHED = '*** MAX DEPTH REACHED ***'
+MORE_ITEMS = '*** {} MORE ITEMS NOT SHOWN ***'
+MORE_CHARACTERS = '... *** {} MORE CHARACTERS NOT SHOWN ***'
 indents = 4
 
 
@@ -59,16 +62,35 @@ class Bannerize:
     #         "google_flows": <Project.flows.google_search_flow.GoogleFlows object at 0x0000019ABA48EB90>/google_u
     #     }
     # }
+    # Notes: The output is streamed, a piece at a time, to write(), so it can go straight to a
+    #        file (bannerize_to()), and building a string of it is linear in its size. Objects are
+    #        recognised as already displayed by id, so nothing is turned into a string just to
+    #        check. max_depth, max_items and max_string bound how much of a huge payload is shown,
+    #        with a marker wherever something was left out.
 
-    def __init__(self):
+    def __init__(self, write=None, max_depth=20, max_items=None, max_string=None):
         # Set up instance data
+        # Inputs: - write (callable/None) takes each piece of output. None means collect them for
+        #           final_result
+        #         - max_depth (int) how deeply dicts and lists are followed
+        #         - max_items (int/None) how many entries of any one dict or list are shown
+        #         - max_string (int/None) how many characters of any one value are shown
         self.indent = 0
-        self.final_result = ''
         self.indent_char = ' '
-        self.list_of_completed_objects = []
+        self.pieces = []
+        self.write = write or self.pieces.append
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string = max_string
+        self.completed_objects = {}
         self.types_that_got_substituted = []
         self.types_to_treat_as_string = (bool, str, int, tuple, float)
 
+    @property
+    def final_result(self):
+        # Purpose: Everything written so far, when it's being collected rather than streamed
+        return ''.join(self.pieces)
+
     def ind(self, data):
         # Purpose: Return an indented version of data
         return (self.indent * self.indent_char) + data
@@ -78,29 +100,33 @@ class Bannerize:
         # Keeps us out of infinite loops
         if item is not None:
             if not isinstance(item, self.types_to_treat_as_string):
-                # here we're creating a key that has both the id and the item.__str__()
-                # because otherwise an empty list will just look like any other
-                # empty list we've already displayed.
-                item_id_string = ""
-
-                # Now we check to see if it's a dict with an ID field
-                if isinstance(item, dict) and ID in item.keys():
-                    item_id_string += item[ID]
-                elif hasattr(item, "get_name"):
-                    item_id_string += item.get_name()
-                else:
-                    item_id_string += f"{item}"
-                    # TODO: Remove me if OK: item_id_string = item_id_string[:60]
-                item_id_string += f" with OID of {id(item)}"
-                # Is it in the list of things already done?
-                if item_id_string in self.list_of_completed_objects:
+                if id(item) in self.completed_objects:
+                    item_id_string = self.describe(item)
                     self.types_that_got_substituted.append(item_id_string)
                     item = f'{OBJECT_ALREADY_DISPLAYED} as {item_id_string}'
                 else:
-                    # No? then add it
-                    self.list_of_completed_objects.append(item_id_string)
+                    # holding on to it means its id can't be reused by something else meanwhile
+                    self.completed_objects[id(item)] = item
         return item
 
+    @staticmethod
+    def describe(item):
+        # Purpose: Names an object that's already been displayed, so the reader can find it
+        # Now we check to see if it's a dict with an ID field
+        if isinstance(item, dict) and ID in item.keys():
+            item_id_string = f"{item[ID]}"
+        elif hasattr(item, "get_name"):
+            item_id_string = item.get_name()
+        else:
+            item_id_string = f"{item}"
+        return f"{item_id_string} with OID of {id(item)}"
+
+    def clip(self, text):
+        # Purpose: Cut a value down to max_string characters, saying how much was left out
+        if self.max_string is not None and len(text) > self.max_string:
+            return text[:self.max_string] + MORE_CHARACTERS.format(len(text) - self.max_string)
+        return text
+
     def bannerize(self, data=None, iteration=0):
         # Purpose: This is the meat of the matter. here we set up the
         # formatting for each item on a line by line basis. Dicts and lists
@@ -108,51 +134,77 @@ class Bannerize:
         # mop up for the item with closing brackets or braces.
         # If just a string is passed, it's just added to the output
         iteration += 1
-        if isinstance(data, dict):
-            if len(data.keys()) > 0:
-                self.final_result += '{\n'
+        write = self.write
+        if isinstance(data, (dict, list)) and iteration > self.max_depth:
+            write(f'{MAX_DEPTH_REACHED}\n')
+        elif isinstance(data, dict):
+            if len(data) > 0:
+                write('{\n')
                 self.indent += indents
-                for key, item in data.items():
-                    self.final_result += self.ind(f'"{key}": ')
+                for count, (key, item) in enumerate(data.items()):
+                    if self.max_items is not None and count >= self.max_items:
+                        write(self.ind(MORE_ITEMS.format(len(data) - count)) + '\n')
+                        break
+                    write(self.ind(f'"{key}": '))
                     item = self.check_for_dupes(item)
                     self.bannerize(data=item, iteration=iteration)
                 self.indent -= indents
-                self.final_result += self.ind('}\n')
+                write(self.ind('}\n'))
             else:
-                self.final_result += '{}}\n'
+                write('{}\n')
         elif isinstance(data, list):
             if len(data) > 0:
-                self.final_result += '[\n'
+                write('[\n')
                 self.indent += indents
-                for item in data:
+                for count, item in enumerate(data):
+                    if self.max_items is not None and count >= self.max_items:
+                        write(self.ind(MORE_ITEMS.format(len(data) - count)) + '\n')
+                        break
                     item = self.check_for_dupes(item)
-                    self.final_result += self.ind('')
+                    write(self.ind(''))
                     self.bannerize(data=item, iteration=iteration)
                 self.indent -= indents
-                self.final_result += self.ind(']')
-                self.final_result += '\n'
+                write(self.ind(']'))
+                write('\n')
             else:
-                self.final_result += '[]\n'
+                write('[]\n')
         else:
             if isinstance(data, str):
                 if not data == OBJECT_ALREADY_DISPLAYED:
-                    data = f'"{data}"'
-            self.final_result += data.__str__()
-            self.final_result += '\n'
-
-        iteration -= 1
-        if iteration > 20:
-            raise Exception(f"infinite loop in bannerizer: {data}")
+                    data = f'"{self.clip(data)}"'
+            else:
+                data = self.clip(data.__str__())
+            write(data)
+            write('\n')
 
 
-def bannerize(data, title=None):
+def bannerize(data, title=None, **limits):
     # Purpose: This is the front end for the bannerizer.
     # See the class definition above for the output sample
     # title is optional, but can be used to create a outer dict
     # with the title as the key
+    # limits are max_depth, max_items and max_string, see Bannerize.__init__()
     if title:
         data = {title: data}
-    bannerizer = Bannerize()
+    bannerizer = Bannerize(**limits)
     bannerizer.bannerize(data)
     return bannerizer.final_result
 
+
+def bannerize_to(stream, data, title=None, **limits):
+    # Purpose: Bannerize straight into a file (or anything with a write()), without building the
+    #          whole thing as one string first
+    # Usage:
+    #       with open('test_data.txt', 'w', encoding='utf-8') as handle:
+    #           bannerize_to(handle, cfgdict[TEST_DATA], max_string=200)
+    if title:
+        data = {title: data}
+    Bannerize(write=stream.write, **limits).bannerize(data)
+
+
+def bannerize_to_log(logger, level, data, title=None, **limits):
+    # Purpose: Bannerize into a log, as one message, and only if the logger would keep it
+    # Usage:
+    #       bannerize_to_log(self.log, logging.DEBUG, self.cfgdict)
+    if logger.isEnabledFor(level):
+        logger.log(level, bannerize(data, title=title, **limits))
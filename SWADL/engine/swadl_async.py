@@ -0,0 +1,291 @@
+# File: swadl_async.py
+# Purpose: asyncio counterparts of the engine objects, so one process can overlap the waits of
+#          many sections, or many browser sessions, from a single event loop:
+#              await AsyncControl(page.user_name).validate()
+#              await AsyncSection(page).validate_loaded()
+#              await AsyncFlow(flows).run()
+# Notes: Selenium's transport is synchronous, so every WebDriver command still runs as a plain
+#        call, on a single thread set aside for its session (SWADLAsyncSession). That keeps one
+#        session's commands in order, and keeps the event loop free. The retry loops are what
+#        change: each attempt is one quick call on the session thread, and the wait between
+#        attempts is an asyncio.sleep(), so other work runs while a control isn't there yet.
+#        Validation tables, expected value handling and reporting are the synchronous engine's
+#        own (see swadl_parallel.py), so results and logs are identical.
+
+import asyncio
+import functools
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_config_dict import run_in_scope
+from SWADL.engine.swadl_constants import SELENIUM_PAGE_DEFAULT_TIMEOUT
+from SWADL.engine.swadl_constants import VALIDATE_VISIBLE
+from SWADL.engine.swadl_parallel import SWADLParallelJob
+
+
+class SWADLAsyncSession(object):
+    # Purpose: The one thread that talks to a given browser session
+    # Usage:
+    #       session = SWADLAsyncSession.for_driver(driver)
+    #       title = await session.call(getattr, driver, 'title')
+
+    _sessions = weakref.WeakKeyDictionary()
+    # Purpose: one session per driver. The drivers are held weakly, so a driver that's done with
+    #          doesn't stay alive here, and its session's thread goes with it.
+
+    def __init__(self, driver):
+        # Purpose: Set up the session's thread
+        # Notes: Only a weak reference to the driver is kept, so the session doesn't keep it alive
+        self.driver_ref = weakref.ref(driver)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='swadl session')
+        self._finalizer = weakref.finalize(driver, self.executor.shutdown, wait=False)
+
+    @classmethod
+    def for_driver(cls, driver):
+        # Purpose: Returns the session for a driver, creating it the first time
+        session = cls._sessions.get(driver)
+        if session is None:
+            session = cls._sessions[driver] = cls(driver)
+        return session
+
+    async def call(self, function, *args, **kwargs):
+        # Purpose: Run a synchronous engine call on the session's thread, and await the result
+        # Notes: The call runs in this task's cfgdict scope (see swadl_config_dict.py), so each
+        #        task's session sees its own driver and test_data
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(run_in_scope(function), *args, **kwargs)
+        )
+
+    def close(self):
+        # Purpose: Let the thread go. The driver itself is left alone.
+        self._finalizer.detach()
+        self.executor.shutdown(wait=True)
+        driver = self.driver_ref()
+        if driver is not None and self._sessions.get(driver) is self:
+            del self._sessions[driver]
+
+
+class SWADLAsyncWrapper(object):
+    # Purpose: Common parts of the async wrappers. Anything not overridden is passed through to
+    #          the wrapped object, and its methods become coroutines run on the session thread,
+    #          so await AsyncSection(page).do_search() works for any section method.
+
+    def __init__(self, wrapped):
+        # Purpose: Wrap a SWADL object
+        self.wrapped = wrapped
+        self.session = SWADLAsyncSession.for_driver(wrapped.driver)
+
+    def __getattr__(self, item):
+        value = getattr(self.wrapped, item)
+        if not callable(value):
+            return value
+
+        async def call_on_session(*args, **kwargs):
+            return await self.session.call(value, *args, **kwargs)
+        call_on_session.__name__ = item
+        return call_on_session
+
+
+class AsyncControl(SWADLAsyncWrapper):
+    # Purpose: async counterpart of SWADLControl
+    # Usage:
+    #       ok = await AsyncControl(page.user_name).validate({VALIDATE_VISIBLE: True})
+
+    async def measure(self, item, expected, deadline):
+        # Purpose: Wait for one read only validation, yielding between attempts
+        # Returns: the measurement dict, ready for SWADLParallelJob.report_one()
+        control = self.wrapped
+        getter, force, expected_to_test, measurement = SWADLParallelJob.prepare(
+            control, item, expected
+        )
+        start_time = time.time()
+        result = False
+        schedule = control.poller.start(deadline.end_time)
+        while True:
+            schedule.tick()
+            try:
+                # timeout=0 makes this a single attempt, the waiting happens out here
+                result, _ = await self.session.call(
+                    getter, expected=expected_to_test, force=force, timeout=0
+                )
+                measurement.pop('comments', None)
+            except Exception as e:
+                result = False
+                measurement['comments'] = f'{type(e).__name__}: {e}'
+            # the single attempts already compared against expected, if there was one
+            if result or expected_to_test is None:
+                break
+            if deadline.expired():
+                break
+            interval = schedule.next_interval()
+            remaining = deadline.remaining()
+            await asyncio.sleep(interval if remaining is None else min(interval, remaining))
+        schedule.finish()
+        measurement = SWADLParallelJob.complete(
+            control, item, measurement, expected_to_test, result, time.time() - start_time
+        )
+        # complete() took the last single attempt's count, report the whole wait instead
+        measurement['polls'] = schedule.polls
+        return measurement
+
+    async def validate(self, validation=None, deadline=None, fatal=False,
+                       timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT], **kwargs):
+        # Purpose: async SWADLControl.validate()
+        # Returns: (bool) was the validation successful
+        control = self.wrapped
+        validation = control.normalize_validation(validation) or control.validation
+        assert validation, "AsyncControl.validate() was called with no validations specified."
+        deadline = control.start_deadline(deadline=deadline, timeout=timeout)
+        result = True
+        for item, expected in validation.items():
+            if expected is None:
+                continue
+            if item in control.read_only_validations:
+                with deadline.child(name=item) as item_deadline:
+                    measurement = await self.measure(item, expected, item_deadline)
+                result = await self.session.call(
+                    SWADLParallelJob.report_one, control, measurement, fatal=fatal, **kwargs
+                ) and result
+            else:
+                result = await self.session.call(
+                    control.validate,
+                    deadline=deadline,
+                    fatal=fatal,
+                    timeout=None,
+                    validation={item: expected},
+                    **kwargs
+                ) and result
+        deadline.finish()
+        return result
+
+
+class AsyncSection(SWADLAsyncWrapper):
+    # Purpose: async counterpart of SWADLPageSection
+    # Usage:
+    #       await AsyncSection(page).validate_loaded()
+
+    async def validate_controls(self, controls=None, validation=None, deadline=None,
+                                fatal=False, per_control_timeout=None,
+                                timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT], **kwargs):
+        # Purpose: async SWADLPageSection.validate_controls(). The read only waits of all the
+        #          controls overlap, results are reported in declaration order, and
+        #          VALIDATE_INPUT/VALIDATE_CLICK run last, in order, as with parallel validation.
+        # Returns: (bool) whether all the controls validated True.
+        section = self.wrapped
+        assert controls is not None, (
+            f"{section.get_name()} cannot .validate_controls() on an empty set of controls"
+        )
+        pairs = section._pair_controls(controls, validation)
+        deadline = section.start_deadline(deadline=deadline, timeout=timeout)
+
+        read_only = {}
+        serial = []
+        for control, control_validation in pairs:
+            control_validation = (
+                control.normalize_validation(control_validation) or control.validation
+            )
+            assert control_validation, (
+                f"{control.get_name()} was validated with no validations specified."
+            )
+            for key, expected in control_validation.items():
+                if expected is None:
+                    continue
+                if key in control.read_only_validations:
+                    read_only.setdefault(control, {})[key] = expected
+                else:
+                    serial.append((control, {key: expected}))
+
+        async def measure_control(control, control_validation):
+            # one control's validations, in order, under its own share of the deadline
+            wrapper = AsyncControl(control)
+            measurements = []
+            with deadline.child(timeout=per_control_timeout, name=control.get_name()) as share:
+                for key, expected in control_validation.items():
+                    with share.child(name=key) as item_deadline:
+                        measurements.append(await wrapper.measure(key, expected, item_deadline))
+            return control, measurements
+
+        measured = await asyncio.gather(*[
+            measure_control(control, control_validation)
+            for control, control_validation in read_only.items()
+        ])
+        result = True
+        for control, measurements in measured:
+            for measurement in measurements:
+                result = await self.session.call(
+                    SWADLParallelJob.report_one, control, measurement, fatal=fatal, **kwargs
+                ) and result
+        for control, control_validation in serial:
+            result = await self.session.call(
+                control.validate,
+                deadline=deadline,
+                fatal=fatal,
+                timeout=per_control_timeout,
+                validation=control_validation,
+                **kwargs
+            ) and result
+        deadline.finish()
+        return result
+
+    async def validate_loaded(self, controls=None, fatal=True, timeout=None, **kwargs):
+        # Purpose: async SWADLPageSection.validate_loaded()
+        section = self.wrapped
+        section.test_data[section.__class__.__name__+".validate_loaded"] = False
+        if timeout is None:
+            timeout = getattr(
+                section, SELENIUM_PAGE_DEFAULT_TIMEOUT, cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT]
+            )
+        result = await self.validate_controls(
+            controls=controls or section.validate_loaded_queue,
+            fatal=fatal,
+            timeout=timeout,
+            validation={VALIDATE_VISIBLE: True},
+            **kwargs,
+        )
+        section.test_data[section.__class__.__name__+".validate_loaded"] = True
+        return result
+
+
+class AsyncFlow(SWADLAsyncWrapper):
+    # Purpose: async counterpart of SWADLBaseFlow
+    # Usage:
+    #       results = await asyncio.gather(AsyncFlow(flows_a).run(), AsyncFlow(flows_b).run())
+
+    async def run(self, steps=None, timeout=None, **kwargs):
+        # Purpose: async SWADLBaseFlow.run(). The steps are ordinary synchronous flow methods,
+        #          run one after another on the flow's session thread, so flows on different
+        #          sessions run side by side.
+        return await self.session.call(self.wrapped.run, steps=steps, timeout=timeout, **kwargs)
+
+
+class TestSWADLAsyncSession:
+    # Purpose: Unit tests for SWADLAsyncSession. Intended for pytest
+
+    class FakeDriver(object):
+        # Purpose: Something to hang a session on
+        title = 'fake'
+
+    def test_one_session_per_driver(self):
+        # Purpose: A driver gets the same session each time, and calls run on it
+        driver = self.FakeDriver()
+        session = SWADLAsyncSession.for_driver(driver)
+        assert SWADLAsyncSession.for_driver(driver) is session
+        assert SWADLAsyncSession.for_driver(self.FakeDriver()) is not session
+        assert asyncio.run(session.call(getattr, driver, 'title')) == 'fake'
+        session.close()
+        assert driver not in SWADLAsyncSession._sessions
+
+    def test_session_goes_with_driver(self):
+        # Purpose: Once a driver is gone, its session is dropped and its thread let go
+        import gc
+        driver = self.FakeDriver()
+        session = SWADLAsyncSession.for_driver(driver)
+        asyncio.run(session.call(getattr, driver, 'title'))
+        sessions = len(SWADLAsyncSession._sessions)
+        del driver
+        gc.collect()
+        assert len(SWADLAsyncSession._sessions) == sessions - 1
+        assert session.executor._shutdown
@@ -1,18 +1,17 @@
 # File: SWADLbase.py
 # Purpose: Base class for UI interactive code. Wraps interaction with webdriver
 import datetime
-import gc
-import inspect
 import logging
+import sys
 import time
 import traceback
-from selenium.webdriver.common.action_chains import ActionChains
 
 from SWADL.engine import bannerizer
 from SWADL.engine.swadl_cfg import cfgdict
 from SWADL.engine.swadl_constants import ASSERT
 from SWADL.engine.swadl_constants import CALLER
 from SWADL.engine.swadl_constants import CONTAINER
+from SWADL.engine.swadl_constants import DEADLINE
 from SWADL.engine.swadl_constants import DIVIDER
 from SWADL.engine.swadl_constants import DRIVER
 from SWADL.engine.swadl_constants import EXPECT
@@ -29,12 +28,18 @@ from SWADL.engine.swadl_constants import MEMBER
 from SWADL.engine.swadl_constants import MESSAGE
 from SWADL.engine.swadl_constants import OBJ
 from SWADL.engine.swadl_constants import PASSED
+from SWADL.engine.swadl_constants import QUERY_CACHE
 from SWADL.engine.swadl_constants import REPORTING_DICT
 from SWADL.engine.swadl_constants import REQUIRE
 from SWADL.engine.swadl_constants import RESULT
+from SWADL.engine.swadl_constants import RESULT_STREAM
 from SWADL.engine.swadl_constants import SELF__DICT__
 from SWADL.engine.swadl_constants import STACKTRACE
 from SWADL.engine.swadl_constants import SUBSTITUTION_SOURCES
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT_LINES
+from SWADL.engine.swadl_constants import SWADL_RESULT_STREAM
 from SWADL.engine.swadl_constants import TEST_DATA
 from SWADL.engine.swadl_constants import TEST_NAME
 from SWADL.engine.swadl_constants import TEST_OBJECT
@@ -42,10 +47,16 @@ from SWADL.engine.swadl_constants import TIMEOUT
 from SWADL.engine.swadl_constants import TIME_FINISHED
 from SWADL.engine.swadl_constants import TIME_STARTED
 from SWADL.engine.swadl_constants import TRACEBACK_SPACES
+from SWADL.engine.swadl_constants import VALIDATION_RECORD
 from SWADL.engine.swadl_constants import X
 from SWADL.engine.swadl_constants import Y
+from SWADL.engine.swadl_deadline import SWADLDeadline
 from SWADL.engine.swadl_dict import SWADLDict
 from SWADL.engine.swadl_exceptions import SWADLTestError
+from SWADL.engine.swadl_result_stream import SWADLResultStream
+from SWADL.engine.swadl_stack import SWADLLazyText
+from SWADL.engine.swadl_stack import SWADLStackTrace
+from SWADL.engine.swadl_stack import caller_name
 
 
 # noinspection SpellCheckingInspection
@@ -87,7 +98,6 @@ class SWADLBase(object):
         # these are to make this functionality available to every object using it
         self.cfgdict = cfgdict
         self.driver = self.cfgdict[DRIVER]
-        self.actions = ActionChains(self.driver)
         self.test_data = self.cfgdict[TEST_DATA]
 
         # sort out substitutions. If this has been specified, it's an instance override, so
@@ -109,28 +119,54 @@ class SWADLBase(object):
         base = super().__str__()
         return f'{base}/{self.get_name()}'
 
+    _name_generation = 0
+    # Purpose: Bumped by invalidate_names() to throw away every cached name at once
+
+    @classmethod
+    def invalidate_names(cls):
+        # Purpose: Make every SWADL object rebuild its name on the next get_name() call
+        SWADLBase._name_generation += 1
+
     def get_name(self):
         # Purpose: Returns the name of the thing
         # Notes: If self.parent is not None, prefixes the name with the parent's name
-        # the names get used all over to identify the object we're reporting on
+        #        the names get used all over to identify the object we're reporting on, so the
+        #        result is cached. It's rebuilt when the test name, the parent (or its name) or
+        #        our own name changes, checked by identity, which is far cheaper than the
+        #        f-strings. Names are interned, so reporting can use them as cheap dict keys.
         test_name = cfgdict.get(TEST_NAME, '')
+        parent = self.__dict__.get('parent')
+        parent_name = parent.name if parent else None
+        cached = self.__dict__.get('_qualified_name')
+        if (
+            cached is not None and
+            cached[0] is test_name and
+            cached[1] is parent_name and
+            cached[2] is self.name and
+            cached[3] == SWADLBase._name_generation
+        ):
+            return cached[4]
+        name = sys.intern(self._build_name(test_name, parent_name))
+        self.__dict__['_qualified_name'] = (
+            test_name, parent_name, self.name, SWADLBase._name_generation, name
+        )
+        return name
+
+    def _build_name(self, test_name, parent_name):
+        # Purpose: Builds the qualified name for get_name()
         if test_name:
             if self.name != test_name:
                 test_name = f"{test_name}/"
             else:
                 test_name = ""
-        if hasattr(self, 'parent') and self.parent:
-            parent_name = f"{self.parent.name}."
-        else:
-            parent_name = ""
-
+        parent_name = f"{parent_name}." if parent_name else ""
         return f"{test_name}{parent_name}{self.name}"
 
     def _get_method_name(self):
         # Purpose: Get the name of the calling method
         test_name = cfgdict[TEST_NAME]
         class_name = self.__class__.__name__
-        method_name = inspect.stack()[1][0].f_code.co_name
+        method_name = caller_name(1)
         return f'{test_name}/{class_name}.{method_name}'
 
     def _get_instance_name(self):
@@ -142,21 +178,34 @@ class SWADLBase(object):
         return result
 
     def _get_instance_names(self):
-        # Purpose: Returns the best guess of entire set of instance names for this object.
-        #         Uses garbage collection library to iterate through instances.
-        referrers = gc.get_referrers(self)
-        result = []
-        dict_of_things = {}
-        for item in referrers:
-            if isinstance(item, dict):
-                dict_of_things = item
-                break
-        for key, value in dict_of_things.items():
-            if value == self:
-                result.append(key)
-        if not result:
-            result = ['unknown instance']
-        return result
+        # Purpose: Returns the attribute names this object has been stored under, in the order
+        #          they were learned (see _register_instance_name())
+        return list(self.__dict__.get('_instance_names') or ['unknown instance'])
+
+    _unregistered_attributes = frozenset(('parent',))
+    # Purpose: Attributes that hold a SWADL object without naming it. self.parent points up the
+    #          tree, it isn't what the parent is called.
+
+    def __set_name__(self, owner, name):
+        # Purpose: Python calls this when a SWADL object is a class attribute, as controls declared
+        #          in a section's class body are. That's where it learns its attribute name.
+        self._register_instance_name(name)
+
+    def __setattr__(self, name, value):
+        # Purpose: When a SWADL object is stored on another one (self.search_box = SWADLControl(...)
+        #          in a section's __init__), tell it the attribute name it was stored under
+        if isinstance(value, SWADLBase) and name not in self._unregistered_attributes:
+            value._register_instance_name(name)
+        object.__setattr__(self, name, value)
+
+    def _register_instance_name(self, name):
+        # Purpose: Remember an attribute name this object is known by. Names are stored once, so
+        #          _get_instance_names() is a lookup rather than a search of the heap.
+        names = self.__dict__.get('_instance_names')
+        if names is None:
+            names = self.__dict__['_instance_names'] = []
+        if name not in names:
+            names.append(name)
 
     #######################################################################
     def apply_kwargs(self, kwargs):
@@ -166,13 +215,14 @@ class SWADLBase(object):
         # up later.
         self.__dict__.update(**kwargs)
 
-    def bannerize(self, data=None, title=None):
+    def bannerize(self, data=None, title=None, **limits):
         # Purpose: This hooks bannerizer into the SWADL classes.
         # See bannerizer.py for more information.
         # Used for reporting.
+        # Notes: limits are max_depth, max_items and max_string, see bannerizer.Bannerize
         if data is None:
             data = self.__dict__
-        return bannerizer.bannerize(data=data, title=title)
+        return bannerizer.bannerize(data=data, title=title, **limits)
 
     def dump(self):
         # Purpose: dump local contents for debugging
@@ -193,6 +243,60 @@ class SWADLBase(object):
             end_time = time_now + minimum
         return end_time - time_now
 
+    def start_deadline(self, deadline=None, end_time=None, timeout=None, name=None):
+        # Purpose: Returns the deadline for one operation of this object (see swadl_deadline.py)
+        # Inputs: - deadline (SWADLDeadline/None) the budget to carve this out of. None means the
+        #           active one in cfgdict[DEADLINE], if there is one (see SWADLBaseFlow.budget())
+        #         - end_time (float/None) and timeout (float/None) this operation's own limit.
+        #           The parent's end time still wins if it's sooner.
+        #         - name (str/None) for overshoot reporting, defaults to self.get_name()
+        parent = deadline if deadline is not None else cfgdict.get(DEADLINE)
+        name = name or self.get_name()
+        if parent is None:
+            return SWADLDeadline(timeout=timeout, end_time=end_time, name=name)
+        if end_time is not None:
+            timeout = end_time - time.time()
+        return parent.child(timeout=timeout, name=name)
+
+    @staticmethod
+    def page_changed(reason=None):
+        # Purpose: Tell the shared query cache (if there is one) that the page may have changed,
+        #          so nothing cached from before gets used after. See swadl_query_cache.py
+        query_cache = cfgdict.get(QUERY_CACHE)
+        if query_cache is not None:
+            query_cache.bump(reason)
+
+    def record_result(self, **fields):
+        # Purpose: Append one record to the JSONL result stream, if SWADL_RESULT_STREAM names one
+        #          (see swadl_result_stream.py). The stream is opened the first time it's needed.
+        # Inputs: - the record's fields, other than test, name and timestamp, which are filled in
+        file_name = cfgdict[SWADL_RESULT_STREAM]
+        if not file_name:
+            return
+        stream = cfgdict.get(RESULT_STREAM)
+        if stream is None:
+            stream = cfgdict[RESULT_STREAM] = SWADLResultStream(
+                file_name,
+                buffered=cfgdict[SWADL_BUFFERED_OUTPUT],
+                flush_lines=cfgdict[SWADL_BUFFERED_OUTPUT_LINES],
+                flush_interval=cfgdict[SWADL_BUFFERED_OUTPUT_INTERVAL],
+            )
+        record = {'test': cfgdict.get(TEST_NAME, ''), 'name': self.get_name()}
+        record.update(fields)
+        record['timestamp'] = time.time()
+        stream.add(record)
+
+    @property
+    def actions(self):
+        # Purpose: This object's ActionChains, built the first time it's used
+        # Notes: selenium's action_chains is slow to import, and most objects never need it, so
+        #        it's imported here rather than at the top.
+        actions = self.__dict__.get('_actions')
+        if actions is None:
+            from selenium.webdriver.common.action_chains import ActionChains
+            actions = self.__dict__['_actions'] = ActionChains(self.driver)
+        return actions
+
     #######################################################################
     # Logging
     _logger = None
@@ -365,10 +469,10 @@ class SWADLBase(object):
         # Purpose; Takes information provided by the caller about the
         # kind of assertion/error/warning, and completes the test,
         # recording and logging steps.
-        caller = inspect.stack()[2][0].f_code.co_name
+        caller = caller_name(2)
         reporting_dict = SWADLDict()
         reporting_dict[ID] = (
-            f'SWADL:Validation:'
+            f'{VALIDATION_RECORD}'
             f'{self.get_name()}'
             f'.{caller} '
             f'at {self.get_timestamp()} '
@@ -402,29 +506,42 @@ class SWADLBase(object):
 
         # and if that didn't blow up, now we finish up.
         reporting_dict[TIME_FINISHED] = time.time()
+        self.record_result(
+            type='assertion',
+            selector=None,
+            validation=caller,
+            expected=message,
+            result=bool(reporting_dict[LOGICAL_RESULT]),
+            elapsed=reporting_dict[TIME_FINISHED] - reporting_dict[TIME_STARTED],
+            comments='',
+        )
 
         if reporting_dict[LOGICAL_RESULT]:
             reporting_dict[RESULT] = PASSED
         else:
             reporting_dict[RESULT] = FAILED
-            reporting_dict[STACKTRACE] = self._process_stack_trace(traceback.format_stack())
-            message = self.bannerize(reporting_dict)
+            # only the frame is kept, and the report (trace and all) is only rendered when it's
+            # logged somewhere, or raised
+            reporting_dict[STACKTRACE] = SWADLStackTrace(sys._getframe())
+            message = SWADLLazyText(lambda: self.bannerize(reporting_dict))
             self.test_data[TEST_OBJECT].accumulated_failures.append(reporting_dict)
             caller = reporting_dict[CALLER].upper()
             if caller.startswith(ASSERT):
                 self.log.critical(message)
                 if reporting_dict[KWARGS].get(FATAL, False):
-                    raise AssertionError(message)
+                    raise AssertionError(str(message))
             elif caller.upper().startswith(REQUIRE):
                 self.log.error(message)
                 if reporting_dict[KWARGS].get(FATAL, False):
-                    raise Exception(message)
+                    raise Exception(str(message))
             elif caller.upper().startswith(EXPECT):
                 self.log.warning(message)
                 if reporting_dict[KWARGS].get(FATAL, False):
-                    raise Exception("A WARNING WAS MARKED AS FATAL, THIS SHOULDN'T BE!\n" + message)
+                    raise Exception(
+                        "A WARNING WAS MARKED AS FATAL, THIS SHOULDN'T BE!\n" + str(message)
+                    )
             else:
-                message = "UNKNOWN ORIGIN POINT FOR VALIDATION, THIS SHOULDN'T BE!\n" + message
+                message = "UNKNOWN ORIGIN POINT FOR VALIDATION, THIS SHOULDN'T BE!\n" + str(message)
                 self.log.error(message)
                 raise Exception(message)
 
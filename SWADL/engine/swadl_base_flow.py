@@ -1,6 +1,54 @@
+from contextlib import contextmanager
+
 from SWADL.engine.swadl_base import SWADLBase
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_constants import DEADLINE
 
 
 class SWADLBaseFlow(SWADLBase):
     # Purpose: Build flows on this
-    pass
+
+    steps = None
+    # Purpose: (list) the names of the flow methods run() calls, in order. None means run() has to
+    #          be told what to run.
+
+    def run(self, steps=None, timeout=None, **kwargs):
+        # Purpose: Runs the flow's steps in order, all under one budget (see budget())
+        # Inputs: - steps (list/None) method names or callables, None means self.steps
+        #         - timeout (float/None) the budget for the whole run
+        #         - kwargs are passed to every step
+        # Returns: (list) what each step returned
+        steps = steps if steps is not None else self.steps
+        assert steps, f"{self.get_name()}.run() has no steps to run"
+        results = []
+        with self.budget(timeout=timeout):
+            for step in steps:
+                step = getattr(self, step) if isinstance(step, str) else step
+                results.append(step(**kwargs))
+        return results
+
+    @contextmanager
+    def budget(self, timeout=None, share=None, name=None):
+        # Purpose: Runs a block of the flow under a time budget. Every section, control and
+        #          validation used inside the block takes its time out of it, so the whole block
+        #          ends when the budget does, however much of the page is missing.
+        # Inputs: - timeout (float/None) seconds for the block
+        #         - share (float/None) or a fraction (0..1) of what the enclosing budget has left
+        #         - name (str/None) for overshoot reporting, defaults to self.get_name()
+        # Usage:
+        #       with self.budget(timeout=60, name='checkout'):
+        #           self.cart_page.validate_loaded()
+        #           self.payment_page.pay()
+        parent = cfgdict.get(DEADLINE)
+        name = name or self.get_name()
+        if parent is None:
+            deadline = self.start_deadline(timeout=timeout, name=name)
+        else:
+            deadline = parent.child(timeout=timeout, share=share, name=name)
+        cfgdict[DEADLINE] = deadline
+        try:
+            yield deadline
+        finally:
+            cfgdict[DEADLINE] = parent
+            if deadline.finish():
+                self.log.debug(f"SWADL budget overshoot: {deadline.report()}")
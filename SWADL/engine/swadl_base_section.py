@@ -5,9 +5,18 @@ import logging
 
 from SWADL.engine.swadl_cfg import cfgdict
 from SWADL.engine.swadl_constants import NAME
+from SWADL.engine.swadl_constants import PAGE_READY
 from SWADL.engine.swadl_constants import SELENIUM_PAGE_DEFAULT_TIMEOUT
+from SWADL.engine.swadl_constants import SWADL_BATCH_VALIDATION
+from SWADL.engine.swadl_constants import SWADL_PAGE_LAYOUT_STABLE_MS
+from SWADL.engine.swadl_constants import SWADL_PAGE_NETWORK_IDLE_MS
+from SWADL.engine.swadl_constants import SWADL_PAGE_READY_STATE
+from SWADL.engine.swadl_constants import SWADL_PARALLEL_VALIDATION
 from SWADL.engine.swadl_constants import VALIDATE_VISIBLE
 from SWADL.engine.swadl_base import SWADLBase
+from SWADL.engine.swadl_batch import SWADLBatchValidation
+from SWADL.engine.swadl_page_ready import SWADLPageReady
+from SWADL.engine.swadl_parallel import SWADLParallelValidation
 
 logger = logging.getLogger(__name__)
 
@@ -68,36 +77,140 @@ class SWADLPageSection(SWADLBase):
             kwargs[NAME] = self.__class__.__name__
         super().__init__(*args, **kwargs)
 
+    def register_control(self, name, control):
+        # Purpose: Name a control that isn't stored as an attribute of the section (one kept in a
+        #          list or dict, say). Attribute controls are named automatically.
+        # Returns: the control, so it can be used inline
+        control._register_instance_name(name)
+        if control.parent is None:
+            control.parent = self
+        return control
+
+    ready_state = None
+    # Purpose: The document.readyState load_page() waits for, 'complete' or 'interactive'. '' means
+    #          don't wait in the browser at all, just validate. None means use
+    #          cfgdict[SWADL_PAGE_READY_STATE].
+    # Users: wait_until_ready()
+
+    network_idle_ms = None
+    # Purpose: Milliseconds without a request finishing before load_page() counts the network as
+    #          idle. 0 means don't wait for it. None means use cfgdict[SWADL_PAGE_NETWORK_IDLE_MS].
+    # Users: wait_until_ready()
+
+    layout_stable_ms = None
+    # Purpose: Milliseconds without the page's size or element count changing before load_page()
+    #          counts the layout as stable. 0 means don't wait for it. None means use
+    #          cfgdict[SWADL_PAGE_LAYOUT_STABLE_MS].
+    # Users: wait_until_ready()
+
     def load_page(self, url=None, timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT]):
         # Purpose: Load the specified page and validate that it was loaded.
+        # Notes: There are no fixed sleeps. The browser is maximized the first time a session
+        #        loads a page, then the page is waited on until it's ready (see
+        #        wait_until_ready()), and the validate_loaded_queue gets what's left of timeout.
         self.test_data[self.__class__.__name__+" LOAD TIME"] = self.get_timestamp()
+        deadline = self.start_deadline(timeout=timeout)
 
-        if not self.validate_loaded(fatal=False, report=False, timeout=0.5):
+        # one look, without waiting, to see whether the page is already here
+        if not self.validate_loaded(fatal=False, report=False, timeout=0):
             url = url or self.url
             assert url, "Unable to Section.open() with the url of 'None'."
             self.driver.get(url)
+            self.page_changed(f'{self.get_name()} loaded {url}')
         else:
             self.log.debug(
                 f"SWADL.{self.get_name()}.load_page() asked to load page already loaded for "
                 f"{self.url}"
             )
 
-        self.sleep(0.5)
-        self.maximize()
-        self.sleep(0.5)
-        self.validate_loaded(timeout=timeout)
+        self.maximize_once()
+        self.wait_until_ready(timeout=deadline.remaining())
+        self.validate_loaded(timeout=deadline.remaining())
+        deadline.finish()
+
+    def wait_until_ready(self, timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT]):
+        # Purpose: Wait, in the browser, until the current page is ready (see swadl_page_ready.py)
+        # Returns: (bool/None) whether it was ready in time. None if it wasn't waited on, because
+        #          ready_state is '' or the browser couldn't run the wait.
+        # Notes: Not being ready isn't a failure in itself. The validations that follow decide.
+        if timeout is None:
+            timeout = cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT]
+        ready_state = self._get_page_setting(self.ready_state, SWADL_PAGE_READY_STATE)
+        if not ready_state:
+            return None
+        status = self._get_page_ready().wait(
+            self.driver,
+            timeout=timeout,
+            ready_state=ready_state,
+            network_idle_ms=self._get_page_setting(
+                self.network_idle_ms, SWADL_PAGE_NETWORK_IDLE_MS
+            ),
+            layout_stable_ms=self._get_page_setting(
+                self.layout_stable_ms, SWADL_PAGE_LAYOUT_STABLE_MS
+            ),
+        )
+        if status is None:
+            return None
+        if status.get('ready'):
+            self.log.debug(f"SWADL.{self.get_name()} ready in {status.get('elapsed')}s")
+        else:
+            self.log.debug(f"SWADL.{self.get_name()} not ready after {timeout}s: {status}")
+        return bool(status.get('ready'))
+
+    @staticmethod
+    def _get_page_setting(value, key):
+        # Purpose: A section's own readiness setting, or cfgdict's if it's None
+        return cfgdict[key] if value is None else value
+
+    @staticmethod
+    def _get_page_ready():
+        # Purpose: The shared readiness engine, made the first time it's needed
+        if cfgdict.get(PAGE_READY) is None:
+            cfgdict[PAGE_READY] = SWADLPageReady()
+        return cfgdict[PAGE_READY]
 
     def maximize(self):
         # Purpose: Maximize Browser window.
         # Magic: Makes use of webdriver maximize
         self.driver.maximize_window()
+        self.page_changed(f'{self.get_name()} maximized')
+
+    def maximize_once(self):
+        # Purpose: Maximize the browser window, unless this session has already been maximized
+        # Returns: (bool) whether it maximized
+        if not self._get_page_ready().first_maximize(self.driver):
+            return False
+        self.maximize()
+        return True
 
-    def validate_controls(self, controls=None, validation=None, **kwargs):
+    batch_validation = None
+    # Purpose: If True, validate_controls() checks all the read only validations together in one
+    #          browser side evaluation per poll (see swadl_batch.py). None means use
+    #          cfgdict[SWADL_BATCH_VALIDATION]. Can also be passed per call as batch=True/False.
+    # Users: validate_controls()
+
+    parallel_validation = None
+    # Purpose: If True, validate_controls() measures the read only validations of the controls on
+    #          a thread pool, then reports them in order (see swadl_parallel.py). None means use
+    #          cfgdict[SWADL_PARALLEL_VALIDATION]. Can also be passed per call as
+    #          parallel=True/False. Batched validation wins if both are asked for.
+    # Users: validate_controls()
+
+    def validate_controls(self, controls=None, validation=None, batch=None, deadline=None,
+                          parallel=None, per_control_timeout=None,
+                          timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT], **kwargs):
         # Purpose: Validates a collection of controls.
         # Inputs: - controls - A collection of either:
         #             - SWADLControl objects
         #             - tuples of (SWADLControl, validation_dict)
         #         - validation - a validation_dict or None
+        #         - batch - (bool/None) use the batched validation engine, see batch_validation
+        #         - parallel - (bool/None) use the thread pool, see parallel_validation
+        #         - deadline - (SWADLDeadline/None) the budget to validate within, see
+        #           swadl_deadline.py. None means the active one, if any.
+        #         - per_control_timeout - (float/None) the most any one control may take. None
+        #           means each may use whatever is left of the section's budget.
+        #         - timeout - (float) the budget for the whole collection
         # Returns: - (bool) whether all the controls validated True.
         # Notes:
         #             In the case of a SWADLControl, it's expected to have a .validation dict on
@@ -126,8 +239,42 @@ class SWADLPageSection(SWADLBase):
             f"{self.get_name()} cannot passed 'controls' because it's not a list/tuple. "
             f"Instead got '{controls}'"
         )
+        pairs = self._pair_controls(controls, validation)
+        deadline = self.start_deadline(deadline=deadline, timeout=timeout)
+        if self._use_batch_validation(batch):
+            result = SWADLBatchValidation(self, pairs).run(
+                end_time=deadline.end_time, timeout=deadline.remaining(), **kwargs
+            )
+            deadline.finish()
+            return result
+        if self._use_parallel_validation(parallel):
+            result = SWADLParallelValidation(self, pairs).run(
+                deadline, per_control_timeout=per_control_timeout, **kwargs
+            )
+            deadline.finish()
+            return result
+
         result = True
+        for control, control_validation in pairs:
+            # now validate the control, using the validation variable, which might be None
+            new_result = control.validate(
+                deadline=deadline,
+                timeout=per_control_timeout,
+                validation=control_validation,
+                **kwargs
+            )
+            result = result and new_result
+        deadline.finish()
+        return result
+
+    @staticmethod
+    def _pair_controls(controls, validation=None):
+        # Purpose: Turns the controls passed to validate_controls() into (control, validation)
+        #          pairs. An override validation wins, then one passed in a tuple, and otherwise
+        #          None, which means use the control's own .validation
+        pairs = []
         for control in controls:
+            control_validation = validation
             try:
                 # first we set the value of value to control.
                 value = control
@@ -136,17 +283,30 @@ class SWADLPageSection(SWADLBase):
                 # if we haven't been passed an override validation, and
                 # if we have been passed a tuple, then
                 # lets see if we were also passed a validation
-                if not validation:
+                if not control_validation:
                     # this will fail if it's a set of one element, but that's OK too.
-                    validation = value[1]
+                    control_validation = value[1]
             except Exception:
                 # because it doesn't matter if we got errors, that's a planned for case
                 pass
+            pairs.append((control, control_validation))
+        return pairs
 
-            # now validate the control, using the validation variable, which might be None
-            new_result = control.validate(validation=validation, **kwargs)
-            result = result and new_result
-        return result
+    def _use_batch_validation(self, batch=None):
+        # Purpose: Returns whether validate_controls() should use the batched engine
+        if batch is None:
+            batch = self.batch_validation
+        if batch is None:
+            batch = cfgdict[SWADL_BATCH_VALIDATION]
+        return batch
+
+    def _use_parallel_validation(self, parallel=None):
+        # Purpose: Returns whether validate_controls() should use the thread pool
+        if parallel is None:
+            parallel = self.parallel_validation
+        if parallel is None:
+            parallel = cfgdict[SWADL_PARALLEL_VALIDATION]
+        return parallel
 
     validate_loaded_queue = None
     # Purpose: (list/tuple) Used to contain references to the list of controls that will prove the
@@ -1,15 +1,32 @@
 # File: SWADLtest
 # Purpose: to report errors on exit
 
+import functools
+import logging
 import unittest
 
+from SWADL.engine.bannerizer import bannerize_to_log
 from SWADL.engine.swadl_base import SWADLBase
 from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_constants import DEADLINE
+from SWADL.engine.swadl_constants import DRIVER
 from SWADL.engine.swadl_constants import FAILURE_LOG
 from SWADL.engine.swadl_constants import RESULT_LOG
+from SWADL.engine.swadl_constants import SELENIUM_TEST_SET_FILE
+from SWADL.engine.swadl_constants import SUBSTITUTION_SOURCES
+from SWADL.engine.swadl_constants import SWADL_DATA_SET_PARALLEL
+from SWADL.engine.swadl_constants import SWADL_DATA_SET_SHARD
+from SWADL.engine.swadl_constants import SWADL_SESSION_POOL
+from SWADL.engine.swadl_constants import SWADL_TEST_TIMEOUT
 from SWADL.engine.swadl_constants import TEST_NAME
+from SWADL.engine.swadl_constants import TEST_DATA
 from SWADL.engine.swadl_constants import TEST_OBJECT
+from SWADL.engine.swadl_data_set import SWADLDataSet
+from SWADL.engine.swadl_deadline import SWADLDeadline
+from SWADL.engine.swadl_looper import SWADLLooper
 from SWADL.engine.swadl_output import Output
+from SWADL.engine.swadl_poller import SWADLPoller
+from SWADL.engine.swadl_session_pool import get_session_pool
 
 
 class SWADLTest(unittest.TestCase, SWADLBase):
@@ -41,6 +58,8 @@ class SWADLTest(unittest.TestCase, SWADLBase):
         self.test_data[TEST_OBJECT] = self
         cfgdict[TEST_OBJECT] = self
         self.accumulated_failures = []
+        self.data_row = {}
+        self.substitution_sources.append(self.data_row)
 
         # and now, if all of that passed, let's initialize the csv output
         # TODO: Move this to a new module that will handle reporting
@@ -57,14 +76,102 @@ class SWADLTest(unittest.TestCase, SWADLBase):
             name=RESULT_LOG,
         )
 
+    deadline = None
+    # The root of the time budgets for this test (see swadl_deadline.py). Bounded by
+    # cfgdict[SWADL_TEST_TIMEOUT] seconds, where 0 means no overall limit.
+
+    session = None
+    # With SWADL_SESSION_POOL, the pooled browser session this test has borrowed. It's what
+    # cfgdict[DRIVER] passes through to until tearDown (see swadl_session_pool.py).
+
+    data_set = None
+    # A data set (see swadl_data_set.py), or the path of one, to run each test method of the class
+    # once per row of. cfgdict[SELENIUM_TEST_SET_FILE] does the same for every test.
+
+    data_row = None
+    # The current row's values, while the test runs from a data set. It's the last of the
+    # substitution sources, so flows and sections can use row values as {placeholders}.
+
+    previous_substitution_sources = None
+    # What cfgdict[SUBSTITUTION_SOURCES] was before setUp added data_row to it
+
     def setUp(self):
         # Purpose: Sets up the test
         super().setUp()
+        self.previous_substitution_sources = cfgdict.get(SUBSTITUTION_SOURCES)
+        cfgdict[SUBSTITUTION_SOURCES] = (
+            list(self.previous_substitution_sources or []) + [self.data_row]
+        )
+        self.deadline = SWADLDeadline(timeout=cfgdict[SWADL_TEST_TIMEOUT] or None, name=self.name)
+        cfgdict[DEADLINE] = self.deadline
+        if cfgdict[SWADL_SESSION_POOL]:
+            self.session = get_session_pool().acquire()
+            replaced = cfgdict[DRIVER].attach(self.session.driver)
+            if replaced is not None:
+                # a browser started outside the pool, before this test
+                replaced.quit()
+            self.page_changed('new browser session')
 
     def tearDown(self):
         # Purpose: Clean up all the things
         cfgdict[FAILURE_LOG].close(f"for {self.get_name()}")
         cfgdict[RESULT_LOG].close(f"for {self.get_name()}")
         super().tearDown()
-        self.log.debug(self.bannerize(data=self.cfgdict))
+        # the whole cfgdict is big, so it's only rendered if debug logging is on
+        bannerize_to_log(self.log, logging.DEBUG, self.cfgdict)
+        self.log.debug(f"SWADL polling totals so far: {SWADLPoller.global_stats}")
+        cfgdict[SUBSTITUTION_SOURCES] = self.previous_substitution_sources or []
+        if self.deadline is not None:
+            self.deadline.finish()
+            cfgdict[DEADLINE] = None
+            if self.deadline.overshoots:
+                self.log.debug(f"SWADL budget overshoots: {self.deadline.report()}")
+        if self.session is not None:
+            cfgdict[DRIVER].detach()
+            pool = get_session_pool()
+            pool.release(self.session)
+            self.session = None
+            self.log.debug(f"SWADL session pool: {pool.report()}")
         self.assert_true(exper=len(self.accumulated_failures) == 0)
+
+    def run_data_set(self, function, data_set=None, into=None, parallel=None):
+        # Purpose: Runs function(row) once per row of a data set, each row a subTest of this test
+        # Inputs: - function (callable) takes the row, a dict
+        #         - data_set (SWADLDataSet/str/None) or the path of one. None means the class's
+        #           data_set, or else cfgdict[SELENIUM_TEST_SET_FILE]. A path is sharded by
+        #           cfgdict[SWADL_DATA_SET_SHARD]
+        #         - into (tuple/None) TEST_DATA and/or SUBSTITUTION_SOURCES, where the row goes.
+        #           None means both
+        #         - parallel (int/None) rows to run at once, each in a pooled session of its own.
+        #           None means cfgdict[SWADL_DATA_SET_PARALLEL]
+        # Returns: {'passed': rows, 'failed': rows}
+        # Notes: See swadl_looper.py. Rows that run in parallel don't share this test's driver
+        #        or flows, so function has to build what it uses.
+        # Usage:
+        #       def test_log_in(self):
+        #           self.run_data_set(lambda row: self.flows.log_in(), 'users.csv')
+        data_set = data_set or self.data_set or cfgdict[SELENIUM_TEST_SET_FILE]
+        assert data_set, f"{self.get_name()} has no data set to run"
+        if not isinstance(data_set, SWADLDataSet):
+            data_set = SWADLDataSet(data_set, shard=cfgdict[SWADL_DATA_SET_SHARD])
+        looper = SWADLLooper(
+            self,
+            data_set,
+            into=into or (TEST_DATA, SUBSTITUTION_SOURCES),
+            parallel=cfgdict[SWADL_DATA_SET_PARALLEL] if parallel is None else parallel,
+        )
+        return looper.run(function)
+
+    def run(self, result=None):
+        # Purpose: With a data set for the class or the run, runs the test method once per row
+        # Notes: The rows run one at a time, between this test's one setUp and tearDown, on its
+        #        driver. For rows in parallel, call run_data_set() from the test method.
+        if self.data_set or cfgdict[SELENIUM_TEST_SET_FILE]:
+            method = getattr(self, self._testMethodName)
+            if not getattr(method, 'swadl_data_set', False):
+                @functools.wraps(method)
+                def run_rows():
+                    self.run_data_set(lambda row: method(), parallel=0)
+                run_rows.swadl_data_set = True
+                setattr(self, self._testMethodName, run_rows)
+        return super().run(result)
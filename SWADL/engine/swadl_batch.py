@@ -0,0 +1,160 @@
+# File: swadl_batch.py
+# Purpose: Batched, section wide validation. Every read only validation for every control in a
+#          list is compiled into one BATCH_STATUS script, and that one script is polled until all
+#          the expectations are met or time runs out. So validating a page costs one round trip
+#          per poll, no matter how many controls are on it.
+
+import time
+
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_constants import SELENIUM_PAGE_DEFAULT_TIMEOUT
+from SWADL.engine.swadl_constants import SWADL_POLL_BACKOFF
+from SWADL.engine.swadl_constants import SWADL_POLL_INITIAL_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_POLL_JITTER
+from SWADL.engine.swadl_constants import SWADL_POLL_MAX_INTERVAL
+from SWADL.engine.swadl_constants import VALIDATE_TEXT
+from SWADL.engine.swadl_constants import VALUE
+from SWADL.engine.swadl_poller import SWADLPoller
+from SWADL.engine.swadl_scripts import BATCH_STATUS
+
+
+class SWADLBatchExpectation(object):
+    # Purpose: One read only validation of one control, and how it turned out
+
+    def __init__(self, control, validation_key, expected):
+        # Purpose: Work out what we're looking for
+        # Inputs: - control (SWADLControl) the control to check
+        #         - validation_key (str) one of SWADLControl.read_only_validations
+        #         - expected - the value from the validation dict
+        self.control = control
+        self.validation_key = validation_key
+        self.status_key = control.read_only_validations[validation_key]
+        self.expected = expected
+        self.comments = ''
+        if validation_key == VALIDATE_TEXT:
+            # as with SWADLControl.validate_text(), anything but a string means use the
+            # control's own VALIDATE_TEXT value, and the report shows what was passed in
+            self.reported_expected = expected if isinstance(expected, str) else None
+            self.expected = self.reported_expected or getattr(control, VALIDATE_TEXT, None)
+            self.validation_name = VALIDATE_TEXT
+        else:
+            self.reported_expected = expected
+            self.validation_name = self.status_key
+        self.result = False
+        self.elapsed_time = None
+
+    def check(self, query, elapsed_time):
+        # Purpose: Compare a control's snapshot to the expectation. Once met, it stays met, the
+        #          same as the one-at-a-time validations which stop looking once they succeed.
+        if not self.result:
+            self.result = query[self.status_key] == self.expected
+            self.elapsed_time = elapsed_time
+            if self.status_key == VALUE:
+                self.comments = f'expected: "{self.expected}", actual: "{query[VALUE]}"'
+        return self.result
+
+
+class SWADLBatchValidation(object):
+    # Purpose: Validates a list of (control, validation_dict) pairs together
+    # Usage:
+    #       batch = SWADLBatchValidation(self, [(self.user_name, {VALIDATE_VISIBLE: True}), ...])
+    #       all_good = batch.run(fatal=True, timeout=40)
+    # Notes: Results are still reported one by one, in declaration order, through each control's
+    #        _validate(), so the logs look just as they would without batching.
+    #        VALIDATE_INPUT and VALIDATE_CLICK can't be batched. Those run afterwards, one at a
+    #        time, through SWADLControl.validate().
+
+    def __init__(self, parent, pairs):
+        # Purpose: Compile the pairs into expectations
+        # Inputs: - parent (SWADLPageSection) the section doing the validating
+        #         - pairs (list) of (SWADLControl, validation dict)
+        self.parent = parent
+        self.driver = parent.driver
+        self.controls = []
+        self.expectations = []
+        self.serial = []
+        for control, validation in pairs:
+            validation = control.normalize_validation(validation) or control.validation
+            assert validation, (
+                f"{control.get_name()} was batch validated with no validations specified."
+            )
+            batched = False
+            for key, expected in validation.items():
+                if expected is None:
+                    continue
+                if key in control.read_only_validations:
+                    self.expectations.append(SWADLBatchExpectation(control, key, expected))
+                    batched = True
+                else:
+                    self.serial.append((control, {key: expected}))
+            if batched and control not in self.controls:
+                self.controls.append(control)
+        self.poller = SWADLPoller(
+            initial_interval=cfgdict[SWADL_POLL_INITIAL_INTERVAL],
+            backoff=cfgdict[SWADL_POLL_BACKOFF],
+            jitter=cfgdict[SWADL_POLL_JITTER],
+            max_interval=cfgdict[SWADL_POLL_MAX_INTERVAL],
+            name=f'{parent.get_name()} batch',
+        )
+
+    def poll(self, end_time):
+        # Purpose: Run BATCH_STATUS until every expectation is met, or end_time passes
+        # Returns: the number of polls it took
+        start_time = time.time()
+        specs = [control._snapshot_arguments() for control in self.controls]
+        schedule = self.poller.start(end_time)
+        while True:
+            schedule.tick()
+            try:
+                snapshots = self.driver.execute_script(BATCH_STATUS, specs)
+                elapsed_time = time.time() - start_time
+                queries = {}
+                for control, spec, snapshot in zip(self.controls, specs, snapshots):
+                    try:
+                        queries[control] = control._apply_status_snapshot(snapshot, spec[0])
+                    except ValueError:
+                        # a selector the browser didn't like. Leave it unmet.
+                        pass
+                all_met = True
+                for expectation in self.expectations:
+                    if expectation.control in queries:
+                        expectation.check(queries[expectation.control], elapsed_time)
+                    all_met = all_met and expectation.result
+                if all_met:
+                    break
+            except Exception:
+                # same as the one-at-a-time loops, errors just mean try again
+                pass
+            if time.time() > end_time:
+                break
+            schedule.wait()
+        return schedule.finish()
+
+    def run(self, end_time=None, fatal=False, timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT],
+            **kwargs):
+        # Purpose: Poll the batch, report every result, then run the serial validations
+        # Returns: (bool) whether everything validated
+        start_time = time.time()
+        end_time = end_time if end_time else start_time + timeout
+        result = True
+        if self.expectations:
+            polls = self.poll(end_time)
+            for expectation in self.expectations:
+                control = expectation.control
+                # so the report shows the polls for the batch, not the control's last call
+                control.poller.last_polls = polls
+                result = control._validate(
+                    comments=expectation.comments,
+                    elapsed_time=expectation.elapsed_time or time.time() - start_time,
+                    expected=expectation.reported_expected,
+                    fatal=fatal,
+                    result=expectation.result,
+                    validation_name=expectation.validation_name,
+                    **kwargs,
+                ) and result
+        for control, validation in self.serial:
+            # these share what's left of the batch's time, so a slow batch can't stretch the run
+            result = control.validate(
+                end_time=end_time, fatal=fatal, validation=validation, **kwargs
+            ) and result
+        return result
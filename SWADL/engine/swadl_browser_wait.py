@@ -0,0 +1,99 @@
+# File: swadl_browser_wait.py
+# Purpose: Waits that run in the browser. Rather than polling a control's status over HTTP until
+#          it matches, the whole condition (selector, text filter, index, status and expected
+#          value) is handed to WAIT_FOR_STATUS with execute_async_script. The browser re-checks it
+#          whenever the DOM changes, and answers once, when it holds or the time is up. So a wait
+#          is one round trip, and it comes back as soon as the page gets there.
+
+from SWADL.engine.swadl_scripts import WAIT_FOR_STATUS
+
+
+class SWADLBrowserWait(object):
+    # Purpose: Runs WAIT_FOR_STATUS, keeping each session's script timeout long enough for it
+    # Usage:
+    #       waiter = SWADLBrowserWait()
+    #       status = waiter.wait(driver, [selector, is_text, has_text, index], VISIBLE, True, 20)
+    #       status['met'], status['value'] ...
+
+    script_timeout_margin = 5.0
+    # Purpose: Seconds the driver's script timeout is kept beyond the wait's own timeout, so the
+    #          browser always gets to answer before the driver gives up on it.
+
+    minimum_script_timeout = 60.0
+    # Purpose: The least the script timeout is set to, so ordinary waits don't each have to
+    #          raise it again.
+
+    def __init__(self):
+        # Purpose: Set up the counters
+        self.script_timeouts = {}
+        self.waits = 0
+        self.checks = 0
+        self.met = 0
+
+    @staticmethod
+    def session_key(driver):
+        # Purpose: Tells sessions apart, including sessions a SWADLDriver has been attached to
+        return getattr(driver, 'session_id', None) or id(driver)
+
+    def _ensure_script_timeout(self, driver, timeout):
+        # Purpose: Raise the session's script timeout if this wait could outlast it
+        # Notes: Kept per session, as a new or reattached session starts with the default again
+        key = self.session_key(driver)
+        needed = timeout + self.script_timeout_margin
+        if self.script_timeouts.get(key, 0) < needed:
+            self.script_timeouts[key] = max(needed, self.minimum_script_timeout)
+            driver.set_script_timeout(self.script_timeouts[key])
+
+    def wait(self, driver, arguments, status_key, expected, timeout):
+        # Purpose: Wait in the browser for a status to reach the expected value
+        # Inputs: - driver - the webdriver to use
+        #         - arguments (list) [selector, is_text, has_text, index], as from
+        #           SWADLControl._snapshot_arguments()
+        #         - status_key (str) EXIST, UNIQUE, VISIBLE, ENABLED or VALUE
+        #         - expected - the value to wait for. None means don't wait, just report.
+        #         - timeout (float) seconds to wait
+        # Returns: the WAIT_FOR_STATUS result (see swadl_scripts.py)
+        timeout = max(timeout, 0)
+        self._ensure_script_timeout(driver, timeout)
+        status = driver.execute_async_script(
+            WAIT_FOR_STATUS, *arguments, status_key, expected, int(timeout * 1000)
+        )
+        self.waits += 1
+        self.checks += status.get('checks', 0)
+        self.met += bool(status.get('met'))
+        return status
+
+    def stats(self):
+        # Purpose: Returns the counters as a dict, suitable for bannerizing
+        return {
+            'waits': self.waits,
+            'met': self.met,
+            'browser side checks': self.checks,
+            'sessions': len(self.script_timeouts),
+        }
+
+
+class TestSWADLBrowserWait:
+    # Purpose: Unit tests for SWADLBrowserWait. Intended for pytest
+
+    class FakeDriver(object):
+        # Purpose: Records the script timeouts it's given
+        def __init__(self, session_id):
+            self.session_id = session_id
+            self.script_timeouts = []
+
+        def set_script_timeout(self, seconds):
+            self.script_timeouts.append(seconds)
+
+    def test_script_timeout_per_session(self):
+        # Purpose: Each new session gets its script timeout raised, once
+        waiter = SWADLBrowserWait()
+        first = self.FakeDriver('one')
+        waiter._ensure_script_timeout(first, 20)
+        waiter._ensure_script_timeout(first, 20)
+        assert first.script_timeouts == [60.0]
+        second = self.FakeDriver('two')
+        waiter._ensure_script_timeout(second, 20)
+        assert second.script_timeouts == [60.0]
+        waiter._ensure_script_timeout(first, 100)
+        assert first.script_timeouts == [60.0, 105.0]
@@ -1,7 +1,7 @@
 
 # standard libraries
+import contextlib
 import os
-from selenium import webdriver
 
 # SWADL libs
 from SWADL.engine.swadl_config_dict import ConfigDict
@@ -12,13 +12,54 @@ from SWADL.engine.swadl_constants import SELENIUM_BROWSER
 from SWADL.engine.swadl_constants import SELENIUM_CONTROL_DEFAULT_TIMEOUT
 from SWADL.engine.swadl_constants import SELENIUM_PAGE_DEFAULT_TIMEOUT
 from SWADL.engine.swadl_constants import SELENIUM_TEST_SET_FILE
+from SWADL.engine.swadl_constants import SWADL_BATCH_VALIDATION
+from SWADL.engine.swadl_constants import SWADL_BROWSER_FILTER
+from SWADL.engine.swadl_constants import SWADL_BROWSER_WAIT
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT_LINES
+from SWADL.engine.swadl_constants import SWADL_DATA_SET_PARALLEL
+from SWADL.engine.swadl_constants import SWADL_DATA_SET_SHARD
+from SWADL.engine.swadl_constants import SWADL_DOM_EPOCH
+from SWADL.engine.swadl_constants import SWADL_FAST_STARTUP
+from SWADL.engine.swadl_constants import SWADL_LAZY_REPORTS
+from SWADL.engine.swadl_constants import SWADL_OUTPUT_DIR
+from SWADL.engine.swadl_constants import SWADL_PAGE_LAYOUT_STABLE_MS
+from SWADL.engine.swadl_constants import SWADL_PAGE_NETWORK_IDLE_MS
+from SWADL.engine.swadl_constants import SWADL_PAGE_READY_STATE
+from SWADL.engine.swadl_constants import SWADL_PARALLEL_VALIDATION
+from SWADL.engine.swadl_constants import SWADL_PARALLEL_WORKERS
+from SWADL.engine.swadl_constants import SWADL_POLL_BACKOFF
+from SWADL.engine.swadl_constants import SWADL_POLL_INITIAL_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_POLL_JITTER
+from SWADL.engine.swadl_constants import SWADL_POLL_MAX_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_QUERY_CACHE
+from SWADL.engine.swadl_constants import SWADL_QUERY_CACHE_MAX_AGE
+from SWADL.engine.swadl_constants import SWADL_RESULT_STORE
+from SWADL.engine.swadl_constants import SWADL_RESULT_STORE_FILE
+from SWADL.engine.swadl_constants import SWADL_RESULT_STORE_WINDOW
+from SWADL.engine.swadl_constants import SWADL_RESULT_STREAM
+from SWADL.engine.swadl_constants import SWADL_SESSION_MAX_HEAP_MB
+from SWADL.engine.swadl_constants import SWADL_SESSION_MAX_TESTS
+from SWADL.engine.swadl_constants import SWADL_SESSION_POOL
+from SWADL.engine.swadl_constants import SWADL_STATUS_SNAPSHOT
+from SWADL.engine.swadl_constants import SWADL_TEST_TIMEOUT
+from SWADL.engine.swadl_constants import SWADL_WORKERS
 from SWADL.engine.swadl_constants import SWADLTEST_URL
 from SWADL.engine.swadl_constants import SWADLTEST_VERBOSE
+from SWADL.engine.swadl_constants import BROWSER_WAIT
+from SWADL.engine.swadl_constants import DEADLINE
+from SWADL.engine.swadl_constants import DOM_EPOCH
 from SWADL.engine.swadl_constants import DRIVER
 from SWADL.engine.swadl_constants import ID
 from SWADL.engine.swadl_constants import CONFIG_DICT
+from SWADL.engine.swadl_constants import QUERY_CACHE
 from SWADL.engine.swadl_constants import TEST_DATA
+from SWADL.engine.swadl_constants import TEST_NAME
+from SWADL.engine.swadl_constants import TEST_OBJECT
 from SWADL.engine.swadl_dict import SWADLDict
+from SWADL.engine.swadl_driver import SWADLDriver
+from SWADL.engine.swadl_result_store import SWADLResultStore
 
 # Section: cfgdict
 # Purpose: Global configuration storge importable instance. All test values to be read from the
@@ -39,25 +80,92 @@ TEST_PARAMETERS = {
     SELENIUM_CONTROL_DEFAULT_TIMEOUT: 20,
     SELENIUM_PAGE_DEFAULT_TIMEOUT: 40,
     SELENIUM_TEST_SET_FILE: None,
+    SWADL_BATCH_VALIDATION: False,
+    SWADL_BROWSER_FILTER: False,
+    SWADL_BROWSER_WAIT: False,
+    SWADL_BUFFERED_OUTPUT: False,
+    SWADL_BUFFERED_OUTPUT_INTERVAL: 0.5,
+    SWADL_BUFFERED_OUTPUT_LINES: 100,
+    SWADL_DATA_SET_PARALLEL: 0,
+    SWADL_DATA_SET_SHARD: '',
+    SWADL_DOM_EPOCH: False,
+    SWADL_FAST_STARTUP: False,
+    SWADL_LAZY_REPORTS: False,
+    SWADL_OUTPUT_DIR: '',
+    SWADL_PAGE_LAYOUT_STABLE_MS: 0,
+    SWADL_PAGE_NETWORK_IDLE_MS: 0,
+    SWADL_PAGE_READY_STATE: 'complete',
+    SWADL_PARALLEL_VALIDATION: False,
+    SWADL_PARALLEL_WORKERS: 4,
+    SWADL_POLL_BACKOFF: 1.5,
+    SWADL_POLL_INITIAL_INTERVAL: 0.05,
+    SWADL_POLL_JITTER: 0.1,
+    SWADL_POLL_MAX_INTERVAL: 0.5,
+    SWADL_QUERY_CACHE: False,
+    SWADL_QUERY_CACHE_MAX_AGE: 1.0,
+    SWADL_RESULT_STORE: False,
+    SWADL_RESULT_STORE_FILE: 'test_results.sqlite',
+    SWADL_RESULT_STORE_WINDOW: 1000,
+    SWADL_RESULT_STREAM: None,
+    SWADL_SESSION_MAX_HEAP_MB: 0,
+    SWADL_SESSION_MAX_TESTS: 0,
+    SWADL_SESSION_POOL: 0,
+    SWADL_STATUS_SNAPSHOT: False,
+    SWADL_TEST_TIMEOUT: 0,
+    SWADL_WORKERS: 0,
     SWADLTEST_URL: None,
     SWADLTEST_VERBOSE: False,
 }
 
+
+def _from_environment(key, default):
+    # Purpose: Read a value from the environment, converted to the type of its default.
+    # Notes: Environment values always arrive as strings, so without this a timeout of "20"
+    #        would be a str, and a flag of "False" would be truthy.
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, (int, float)):
+        value = float(value)
+        return int(value) if isinstance(default, int) and value.is_integer() else value
+    return value
+
+
 # Now this reads them in, or their defaults if they're unspecified
 for key in TEST_PARAMETERS:
-    cfgdict[key] = os.environ.get(key, TEST_PARAMETERS[key])
+    cfgdict[key] = _from_environment(key, TEST_PARAMETERS[key])
 
 # Section: test_data
 # Purpose: creates the vehicle by which all other parts communicate
-cfgdict[TEST_DATA] = SWADLDict()
-cfgdict[TEST_DATA][ID] = TEST_DATA
+# Notes: With SWADL_RESULT_STORE, only the latest SWADL_RESULT_STORE_WINDOW validation records are
+#        kept in memory, older ones go to SWADL_RESULT_STORE_FILE (see swadl_result_store.py)
+def _create_test_data():
+    # Purpose: Creates an empty test_data
+    if cfgdict[SWADL_RESULT_STORE]:
+        test_data = SWADLResultStore(
+            window=cfgdict[SWADL_RESULT_STORE_WINDOW],
+            file_name=cfgdict[SWADL_RESULT_STORE_FILE],
+        )
+    else:
+        test_data = SWADLDict()
+    test_data[ID] = TEST_DATA
+    return test_data
+
+
+cfgdict[TEST_DATA] = _create_test_data()
 
 # Section: test_set
-# Purpose: Read from a .test_set file if one is specified. Overrides values in cfgdict
-# TODO: If a SELENIUM_TEST_SET_FILE is specified, overwrite the values above with it's
-#       contents.
+# Purpose: SELENIUM_TEST_SET_FILE names a data set (CSV, JSONL or YAML, see swadl_data_set.py).
+#          Every SWADLTest then runs once per row of it, with the row's values in test_data and
+#          the substitution sources (see swadl_looper.py). SWADL_DATA_SET_SHARD ('2/4') picks
+#          every 4th row starting with the 2nd, and SWADL_DATA_SET_PARALLEL runs that many rows of
+#          a run_data_set() call at once.
 if cfgdict[SELENIUM_TEST_SET_FILE]:
-    raise Exception(".test_set files are not yet implemented")
+    assert os.path.exists(cfgdict[SELENIUM_TEST_SET_FILE]), (
+        f"SELENIUM_TEST_SET_FILE {cfgdict[SELENIUM_TEST_SET_FILE]} doesn't exist"
+    )
 
 
 # Section: Driver
@@ -65,34 +173,91 @@ if cfgdict[SELENIUM_TEST_SET_FILE]:
 #          everywhere
 # Inputs: (dict)cfgdict: All configuration environment values read from various sources
 # Output: importable instance of "driver"
+# Notes: The browser isn't started here. cfgdict[DRIVER] is a SWADLDriver, which starts it the
+#        first time it's used, or on cfgdict[DRIVER].start() (see swadl_driver.py)
 
 
 # Section: webdriver creation
 # Purpose: Sorts out the invocation parameters by browser
+# Notes: selenium.webdriver is imported here, when a browser is actually wanted, not at import time
 def _create_chrome_webdriver():
     # Method:
     # Purpose: To create the chrome specific webdriver.
-    cfgdict[DRIVER] = webdriver.Chrome()
-    return cfgdict[DRIVER]
+    from selenium import webdriver
+    return webdriver.Chrome()
 
 
 def _create_edge_webdriver():
     # Method:
     # Purpose: To create the edge specific webdriver.
-    cfgdict[DRIVER] = webdriver.Edge()
-    return cfgdict[DRIVER]
+    from selenium import webdriver
+    return webdriver.Edge()
+
+
+def _create_local_webdriver():
+    # Method:
+    # Purpose: To create the offline stand-in, for testing session handling without a browser
+    #          (see swadl_local_driver.py)
+    from SWADL.engine.swadl_local_driver import SWADLLocalDriver
+    return SWADLLocalDriver()
 
 
 driver_creators = {
     "chrome": _create_chrome_webdriver,
     "edge": _create_edge_webdriver,
+    "local": _create_local_webdriver,
 }
 
-try:
-    method_key = cfgdict[SELENIUM_BROWSER]
-    method_to_call = driver_creators[method_key]
-    method_to_call()
-except Exception as e:
-    raise Exception(
-        f"{e}\nPerhaps {cfgdict[SELENIUM_BROWSER]} is not yet supported by the framework?"
-    )
+
+def _create_webdriver():
+    # Purpose: Creates the webdriver for cfgdict[SELENIUM_BROWSER], when SWADLDriver first needs it
+    return driver_creators[cfgdict[SELENIUM_BROWSER]]()
+
+
+cfgdict[DRIVER] = SWADLDriver(creator=_create_webdriver, name=cfgdict[SELENIUM_BROWSER])
+
+
+# Section: Sessions
+# Purpose: Concurrent tests or browser sessions in one process, each with its own view of cfgdict
+@contextlib.contextmanager
+def session_scope(driver=None, test_name='', values=None):
+    # Purpose: A cfgdict.scope() (see swadl_config_dict.py) for one concurrent test or session,
+    #          with its own driver and test_data, and no deadline, test object or cached page
+    #          state of anyone else's
+    # Inputs: - driver (WebDriver/SWADLDriver/None) None means a new SWADLDriver, which starts a
+    #           browser when it's first used, and is stopped when the scope ends
+    #         - test_name (str) for reporting
+    #         - values (dict) any other scoped keys to set
+    # Returns: the scope's values
+    # Notes: SWADL objects pick up the driver and test_data when they're constructed, so build
+    #        the flows and sections inside the scope. With SWADL_RESULT_STORE, the scope's
+    #        test_data is a store of its own in the shared SWADL_RESULT_STORE_FILE (see
+    #        swadl_result_store.py), closed when the scope ends.
+    # Usage:
+    #       async def one_session(name):
+    #           with session_scope(test_name=name):
+    #               await AsyncFlow(GoogleFlows()).search()
+    own_driver = driver is None
+    if own_driver:
+        driver = SWADLDriver(creator=_create_webdriver, name=cfgdict[SELENIUM_BROWSER])
+    # the logs aren't here, so they fall through to the shared ones until a test opens its own
+    test_data = None if TEST_DATA in (values or {}) else _create_test_data()
+    scoped = {
+        BROWSER_WAIT: None,
+        DEADLINE: None,
+        DOM_EPOCH: None,
+        DRIVER: driver,
+        QUERY_CACHE: None,
+        TEST_DATA: test_data,
+        TEST_NAME: test_name,
+        TEST_OBJECT: None,
+    }
+    scoped.update(values or {})
+    try:
+        with cfgdict.scope(scoped) as scope:
+            yield scope
+    finally:
+        if own_driver:
+            driver.stop()
+        if isinstance(test_data, SWADLResultStore):
+            test_data.close()
@@ -1,23 +1,122 @@
 """
 File: SWADLconfig_dict.py
 Purpose: Master global configuration dictionary
+Notes: There is one cfgdict per process, but the entries that belong to a single test or browser
+       session (CONTEXT_SCOPED_KEYS: driver, test_data, logs, test name and so on) can be given
+       their own values per thread or asyncio task with cfgdict.scope(). Inside a scope, those
+       keys are read from and written to the scope, and everything else (the settings) falls
+       through to the shared dict. Outside of any scope, cfgdict works as it always has.
 """
 
+import contextlib
+import contextvars
+
+from SWADL.engine.swadl_constants import CONTEXT_SCOPED_KEYS
 from SWADL.engine.swadl_dict import SWADLDict
 
+# Purpose: the current scope's values, or None outside of any scope. A ContextVar is per thread,
+#          and per asyncio task, which copies its creator's when it starts.
+_scope = contextvars.ContextVar('swadl_cfgdict_scope', default=None)
+
+# cfgdict is read a great deal, so its lookups skip the attribute and super() overhead
+_current_scope = _scope.get
+_dict_getitem = dict.__getitem__
+_dict_contains = dict.__contains__
+
 
 class ConfigDict(SWADLDict):
     # Purpose: To provide a singleton for configuration information.
 
     _instance = None
 
+    scoped_keys = frozenset(CONTEXT_SCOPED_KEYS)
+    # Purpose: keys that cfgdict.scope() keeps per context
+
     def __new__(cls, *args, **kwargs):
         # Purpose: Replaces dunder method that returns the instance
         if cls._instance is None:
-            cls._instance = SWADLDict()
+            cls._instance = super().__new__(cls)
+            SWADLDict.__init__(cls._instance)
         cls._instance.update(**kwargs)
         return cls._instance
 
+    def __init__(self, *args, **kwargs):
+        # Purpose: __new__ has already done everything, every time
+        pass
+
+    def __getitem__(self, key):
+        scope = _current_scope()
+        if scope is not None and key in scope:
+            return scope[key]
+        return _dict_getitem(self, key)
+
+    def __setitem__(self, key, value):
+        scope = _scope.get()
+        if scope is not None and key in self.scoped_keys:
+            scope[key] = value
+        else:
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        scope = _scope.get()
+        if scope is not None and key in self.scoped_keys:
+            del scope[key]
+        else:
+            super().__delitem__(key)
+
+    def __contains__(self, key):
+        scope = _current_scope()
+        return (scope is not None and key in scope) or _dict_contains(self, key)
+
+    def get(self, key, default=None):
+        scope = _current_scope()
+        if scope is not None and key in scope:
+            return scope[key]
+        return dict.get(self, key, default)
+
+    @contextlib.contextmanager
+    def scope(self, values=None):
+        # Purpose: Gives the code inside its own values for the scoped keys
+        # Inputs: - values (dict) scoped keys and their values in this scope. Scoped keys not
+        #           given here are inherited from the enclosing scope, or fall through to the
+        #           shared dict until they're set
+        # Returns: the scope's values, a SWADLDict
+        # Notes: Threads start outside of any scope, so a thread working for a scoped session
+        #        needs the scope passed to it (see run_in_scope()).
+        # Usage:
+        #       with cfgdict.scope({DRIVER: driver, TEST_DATA: SWADLDict()}):
+        #           flows = GoogleFlows()       # picks up this scope's driver and test_data
+        #           flows.search()
+        values = dict(values or {})
+        unscoped = set(values) - self.scoped_keys
+        assert not unscoped, (
+            f"only {sorted(self.scoped_keys)} can be scoped, not {sorted(unscoped)}"
+        )
+        scope = SWADLDict()
+        scope.update(_scope.get() or {})
+        scope.update(values)
+        token = _scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _scope.reset(token)
+
+    @staticmethod
+    def current_scope():
+        # Purpose: The current scope's values, or None outside of any scope
+        return _scope.get()
+
+
+def run_in_scope(function):
+    # Purpose: Wraps a function so it runs in the caller's scope, wherever it's called from
+    # Usage:
+    #       executor.submit(run_in_scope(job.measure))
+    context = contextvars.copy_context()
+
+    def in_scope(*args, **kwargs):
+        return context.run(function, *args, **kwargs)
+    return in_scope
+
 
 class TestConfigDict:
     # Purpose: Unit tests for ConfigDict. Intended for pytest
@@ -35,3 +134,26 @@ class TestConfigDict:
         assert d['c'] == 3
         assert str(d) == "{'a': 1, 'b': 2, 'c': 3}"
         print("test_ConfigDict: PASSED")
+
+    def test_config_dict_scope(self):
+        # Purpose: Validate that scoped keys are kept per thread, and settings are shared
+        import threading
+        from SWADL.engine.swadl_constants import TEST_NAME
+        d = ConfigDict(setting=1)
+        d[TEST_NAME] = 'shared'
+        seen = {}
+
+        def session(name):
+            with d.scope({TEST_NAME: name}):
+                barrier.wait()
+                seen[name] = (d[TEST_NAME], d['setting'])
+
+        barrier = threading.Barrier(2)
+        threads = [threading.Thread(target=session, args=(name,)) for name in ('one', 'two')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert seen == {'one': ('one', 1), 'two': ('two', 1)}
+        assert d[TEST_NAME] == 'shared'
+        print("test_config_dict_scope: PASSED")
@@ -2,11 +2,52 @@
 # Purpose: Constants
 
 # standard libraries
+import os
 import sys
+import tempfile
 
 # Section: Don't clutter up the workspace. Adding this here makes PYTHONDONTWRITEBYTECODE
 # less important.
-sys.dont_write_bytecode = True
+# Notes: That also means every module imported after this one, SWADL's and selenium's alike, is
+#        compiled from source on every run. With SWADL_FAST_STARTUP set in the environment, the
+#        bytecode is cached instead, but under a prefix outside the workspace (PYTHONPYCACHEPREFIX
+#        if it's set, otherwise swadl_pycache in the user's cache directory), so it's still
+#        uncluttered. The cache is only used if it's private to the user, as anyone who can write
+#        to it can change the code that gets run. This reads the environment itself, because
+#        cfgdict doesn't exist yet.
+
+
+def _private_pycache_prefix():
+    # Purpose: Returns a bytecode cache directory only this user can write to, or None
+    # Notes: ~/.cache (or XDG_CACHE_HOME) first, then a per user directory in the temp directory
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join('~', '.cache')
+    user = os.environ.get('USER') or os.environ.get('USERNAME') or str(os.getpid())
+    if hasattr(os, 'getuid'):
+        user = str(os.getuid())
+    candidates = [
+        os.path.join(os.path.expanduser(cache_home), 'swadl_pycache'),
+        os.path.join(tempfile.gettempdir(), f'swadl_pycache_{user}'),
+    ]
+    for prefix in candidates:
+        try:
+            os.makedirs(prefix, mode=0o700, exist_ok=True)
+            if hasattr(os, 'getuid'):
+                status = os.stat(prefix)
+                if status.st_uid != os.getuid() or status.st_mode & 0o022:
+                    continue
+            return prefix
+        except OSError:
+            continue
+    return None
+
+
+if os.environ.get('SWADL_FAST_STARTUP', '').strip().lower() in ('1', 'true', 'yes', 'on'):
+    if sys.pycache_prefix is None:
+        sys.pycache_prefix = _private_pycache_prefix()
+    if sys.pycache_prefix is None:
+        sys.dont_write_bytecode = True
+else:
+    sys.dont_write_bytecode = True
 
 # Section: Uncategorized importable string constants
 # Purpose: Everything else not covered in the sections below
@@ -17,12 +58,18 @@ ARGSCOUNT = 'ARGSCOUNT'
 ARGSCOUNT_OK = 'ARGSCOUNT_OK'
 ARGSFIELDS = 'ARGSFIELDS'
 ASSERT = 'ASSERT'
+BLANK_PAGE = 'about:blank'
+BROWSER_WAIT = 'browser_wait'
 CACHE = 'cache'
 CLICK = 'click'
 CALLER = 'caller'
 CONFIG_DICT = 'CONFIG_DICT'
 CONTAINER = 'container'
+CSS_SELECTOR = 'css selector'  # selenium's By.CSS_SELECTOR, without importing selenium.webdriver
+DATA_ROW_NUMBER = 'DATA_ROW_NUMBER'
+DEADLINE = 'deadline'
 DIVIDER = ' ----- '
+DOM_EPOCH = 'dom_epoch'
 DRIVER = 'driver'
 ENABLED = 'enabled'
 ERROR = 'ERROR'
@@ -41,6 +88,7 @@ HAS_TEXT = 'has_text'
 HELPER = 'HELPER'
 ID = 'ID'
 INDEX = 'index'
+INPUT_VALUE = 'input_value'
 IS_TEXT = 'is_text'
 KWARGS = 'KWARGS'
 LOGICAL_RESULT = 'logical_result'
@@ -48,16 +96,22 @@ MEMBER = 'member'
 MESSAGE = 'MESSAGE'
 NAME = 'name'
 OBJ = 'obj'
+PAGE_READY = 'page_ready'
 PASSED = '😇 Passed'
 PROCESSED_SELECTOR = 'processed_selector'
+QUERY_CACHE = 'query_cache'
+RAW_COUNT = 'raw_count'
 RAW_ELEMENTS = 'raw_elements'
 REPORTING_DICT = 'REPORTING_DICT'
 REQUIRE = 'REQUIRE'
 RESULT = 'RESULT'
 RESULT_LOG = 'result_log'
+RESULT_STREAM = 'result_stream'
 SELECTED_CAPS = 'SELECTED_CAPS'
 SELECTOR = 'selector'
+SESSION_POOL = 'session_pool'
 SELF__DICT__ = 'self.__dict__'
+SNAPSHOT = 'snapshot'
 STACKTRACE = 'STACKTRACE'
 STATUS = 'status'
 SUBSTITUTION_SOURCES = 'substitution_sources'
@@ -82,6 +136,7 @@ VALIDATE_VISIBLE = 'validate_visible'
 VALIDATE_UNIQUE = 'validate_unique'
 VALIDATION_MC = 'Validation'
 VALIDATION_NOT_EXIST = {VALIDATE_EXIST: False}
+VALIDATION_RECORD = 'SWADL:Validation:'
 VALIDATION_VISIBLE = {VALIDATE_VISIBLE: True}
 VALIDATIONS = 'VALIDATIONS'
 VALUE = 'value'
@@ -90,6 +145,24 @@ WARN = 'WARN'
 X = 'x'
 Y = 'y'
 
+# Section: Context scoped keys
+# Purpose: The cfgdict entries that belong to one test or browser session. Inside a
+#          cfgdict.scope() (see swadl_config_dict.py) these are kept per thread or asyncio task, so
+#          concurrent sessions in one process each have their own. Everything else is shared.
+CONTEXT_SCOPED_KEYS = (
+    BROWSER_WAIT,
+    DEADLINE,
+    DOM_EPOCH,
+    DRIVER,
+    FAILURE_LOG,
+    QUERY_CACHE,
+    RESULT_LOG,
+    SUBSTITUTION_SOURCES,
+    TEST_DATA,
+    TEST_NAME,
+    TEST_OBJECT,
+)
+
 # Section: Environment Variables
 # Purpose: These are all importable names which could have values passed in from the environment
 #          and which are present in the importable cfgdict (explained below)
@@ -102,6 +175,39 @@ SELENIUM_PAGE_DEFAULT_TIMEOUT = 'SELENIUM_PAGE_DEFAULT_TIMEOUT'
 SELENIUM_PORT = 'SELENIUM_PORT'
 SELENIUM_SERVER = 'SELENIUM_SERVER'
 SELENIUM_TEST_SET_FILE = 'SELENIUM_TEST_SET_FILE'
+SWADL_BATCH_VALIDATION = 'SWADL_BATCH_VALIDATION'
+SWADL_BROWSER_FILTER = 'SWADL_BROWSER_FILTER'
+SWADL_BROWSER_WAIT = 'SWADL_BROWSER_WAIT'
+SWADL_BUFFERED_OUTPUT = 'SWADL_BUFFERED_OUTPUT'
+SWADL_BUFFERED_OUTPUT_INTERVAL = 'SWADL_BUFFERED_OUTPUT_INTERVAL'
+SWADL_BUFFERED_OUTPUT_LINES = 'SWADL_BUFFERED_OUTPUT_LINES'
+SWADL_DATA_SET_PARALLEL = 'SWADL_DATA_SET_PARALLEL'
+SWADL_DATA_SET_SHARD = 'SWADL_DATA_SET_SHARD'
+SWADL_DOM_EPOCH = 'SWADL_DOM_EPOCH'
+SWADL_FAST_STARTUP = 'SWADL_FAST_STARTUP'
+SWADL_LAZY_REPORTS = 'SWADL_LAZY_REPORTS'
+SWADL_OUTPUT_DIR = 'SWADL_OUTPUT_DIR'
+SWADL_PAGE_LAYOUT_STABLE_MS = 'SWADL_PAGE_LAYOUT_STABLE_MS'
+SWADL_PAGE_NETWORK_IDLE_MS = 'SWADL_PAGE_NETWORK_IDLE_MS'
+SWADL_PAGE_READY_STATE = 'SWADL_PAGE_READY_STATE'
+SWADL_PARALLEL_VALIDATION = 'SWADL_PARALLEL_VALIDATION'
+SWADL_PARALLEL_WORKERS = 'SWADL_PARALLEL_WORKERS'
+SWADL_POLL_BACKOFF = 'SWADL_POLL_BACKOFF'
+SWADL_POLL_INITIAL_INTERVAL = 'SWADL_POLL_INITIAL_INTERVAL'
+SWADL_POLL_JITTER = 'SWADL_POLL_JITTER'
+SWADL_POLL_MAX_INTERVAL = 'SWADL_POLL_MAX_INTERVAL'
+SWADL_QUERY_CACHE = 'SWADL_QUERY_CACHE'
+SWADL_QUERY_CACHE_MAX_AGE = 'SWADL_QUERY_CACHE_MAX_AGE'
+SWADL_RESULT_STORE = 'SWADL_RESULT_STORE'
+SWADL_RESULT_STORE_FILE = 'SWADL_RESULT_STORE_FILE'
+SWADL_RESULT_STORE_WINDOW = 'SWADL_RESULT_STORE_WINDOW'
+SWADL_RESULT_STREAM = 'SWADL_RESULT_STREAM'
+SWADL_SESSION_MAX_HEAP_MB = 'SWADL_SESSION_MAX_HEAP_MB'
+SWADL_SESSION_MAX_TESTS = 'SWADL_SESSION_MAX_TESTS'
+SWADL_SESSION_POOL = 'SWADL_SESSION_POOL'
+SWADL_STATUS_SNAPSHOT = 'SWADL_STATUS_SNAPSHOT'
+SWADL_TEST_TIMEOUT = 'SWADL_TEST_TIMEOUT'
+SWADL_WORKERS = 'SWADL_WORKERS'
 SWADLTEST_URL = 'SELENIUM_URL'
 SWADLTEST_VERBOSE = 'SWADLTEST_VERBOSE'
 
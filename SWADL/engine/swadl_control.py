@@ -2,23 +2,41 @@
 File: swadl_control.py
 Purpose: the control proxy object
 """
+import logging
 import time
 
 from selenium.common.exceptions import StaleElementReferenceException
-from selenium.webdriver.common.by import By
 
 from SWADL.engine.swadl_base import SWADLBase
+from SWADL.engine.swadl_browser_wait import SWADLBrowserWait
 from SWADL.engine.swadl_cfg import cfgdict
-from SWADL.engine.swadl_constants import CACHE, RAW_ELEMENTS, IS_TEXT, HAS_TEXT, INDEX, PROCESSED_SELECTOR, \
+from SWADL.engine.swadl_constants import CACHE, RAW_COUNT, RAW_ELEMENTS, IS_TEXT, HAS_TEXT, INDEX, PROCESSED_SELECTOR, \
     UNIQUE_TEXT_VALUES, FILTERED_ELEMENTS, STATUS, ACTIONABLE
+from SWADL.engine.swadl_constants import BROWSER_WAIT
 from SWADL.engine.swadl_constants import CLICK
+from SWADL.engine.swadl_constants import CSS_SELECTOR
 from SWADL.engine.swadl_constants import ENABLED
+from SWADL.engine.swadl_constants import DOM_EPOCH
 from SWADL.engine.swadl_constants import EXIST
 from SWADL.engine.swadl_constants import FAILURE_LOG
+from SWADL.engine.swadl_constants import INPUT_VALUE
+from SWADL.engine.swadl_constants import QUERY_CACHE
 from SWADL.engine.swadl_constants import RESULT_LOG
 from SWADL.engine.swadl_constants import SELECTOR
 from SWADL.engine.swadl_constants import SELENIUM_CONTROL_DEFAULT_TIMEOUT
 from SWADL.engine.swadl_constants import SELENIUM_PAGE_DEFAULT_TIMEOUT
+from SWADL.engine.swadl_constants import SNAPSHOT
+from SWADL.engine.swadl_constants import SWADL_BROWSER_FILTER
+from SWADL.engine.swadl_constants import SWADL_BROWSER_WAIT
+from SWADL.engine.swadl_constants import SWADL_DOM_EPOCH
+from SWADL.engine.swadl_constants import SWADL_LAZY_REPORTS
+from SWADL.engine.swadl_constants import SWADL_POLL_BACKOFF
+from SWADL.engine.swadl_constants import SWADL_POLL_INITIAL_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_POLL_JITTER
+from SWADL.engine.swadl_constants import SWADL_POLL_MAX_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_QUERY_CACHE
+from SWADL.engine.swadl_constants import SWADL_QUERY_CACHE_MAX_AGE
+from SWADL.engine.swadl_constants import SWADL_STATUS_SNAPSHOT
 from SWADL.engine.swadl_constants import TEST_OBJECT
 from SWADL.engine.swadl_constants import UNIQUE
 from SWADL.engine.swadl_constants import VALIDATE_CLICK
@@ -28,10 +46,17 @@ from SWADL.engine.swadl_constants import VALIDATE_INPUT
 from SWADL.engine.swadl_constants import VALIDATE_TEXT
 from SWADL.engine.swadl_constants import VALIDATE_UNIQUE
 from SWADL.engine.swadl_constants import VALIDATE_VISIBLE
+from SWADL.engine.swadl_constants import VALIDATION_RECORD
 from SWADL.engine.swadl_constants import VALUE
 from SWADL.engine.swadl_constants import VISIBLE
 from SWADL.engine.swadl_dict import SWADLDict
+from SWADL.engine.swadl_dom_epoch import SWADLDomEpoch
 from SWADL.engine.swadl_output import Output
+from SWADL.engine.swadl_poller import SWADLPoller
+from SWADL.engine.swadl_query_cache import SWADLQueryCache
+from SWADL.engine.swadl_scripts import FILTER_ELEMENTS
+from SWADL.engine.swadl_scripts import STATUS_SNAPSHOT
+from SWADL.engine.swadl_validation_record import SWADLValidationRecord
 
 
 class SWADLControl(SWADLBase):
@@ -98,6 +123,104 @@ class SWADLControl(SWADLBase):
     """
     _cache = {}
 
+    """
+    Data: poller_class, poller
+    Purpose: The polling scheduler used by every retry loop in this control. poller_class is
+             instantiated from the SWADL_POLL_* settings in cfgdict unless a poller instance is
+             passed in at creation time (poller=SWADLPoller(...)). See swadl_poller.py
+    """
+    poller_class = SWADLPoller
+    poller = None
+
+    """
+    Datum: status_snapshot
+    Purpose: if True, the control's status (exist/unique/visible/enabled/text/value) is gathered
+             with a single injected script call (see swadl_scripts.STATUS_SNAPSHOT) rather than a
+             separate WebDriver call for each.
+    Notes: None means use cfgdict[SWADL_STATUS_SNAPSHOT]
+    """
+    status_snapshot = None
+
+    """
+    Datum: browser_filter
+    Purpose: if True, get_elements() sends the is_text/has_text/index filter to the browser in
+             one script call (see swadl_scripts.FILTER_ELEMENTS), rather than reading the text of
+             every raw match back one element at a time.
+    Notes: None means use cfgdict[SWADL_BROWSER_FILTER]
+    """
+    browser_filter = None
+
+    """
+    Datum: shared_query_cache
+    Purpose: if True, get_elements() takes its raw elements and text from the query cache shared
+             by all the controls on the page, keyed by processed selector (see
+             swadl_query_cache.py). One find, plus one text harvest, serves every control with
+             the same selector.
+    Notes: None means use cfgdict[SWADL_QUERY_CACHE]
+    """
+    shared_query_cache = None
+
+    """
+    Datum: track_dom_epoch
+    Purpose: if True, the control reads the page's DOM epoch (see swadl_dom_epoch.py) before
+             going back to the browser. While the epoch hasn't moved, the cached elements and
+             statuses are reused, even on a forced refresh, instead of being fetched again.
+    Notes: None means use cfgdict[SWADL_DOM_EPOCH]
+    """
+    track_dom_epoch = None
+
+    """
+    Datum: browser_wait
+    Purpose: if True, the _get_exist/_get_visible/_get_enabled/_get_value/_get_unique waits run
+             in the browser as a single execute_async_script call (see swadl_browser_wait.py),
+             which comes back as soon as the condition holds, rather than polling over HTTP.
+    Notes: None means use cfgdict[SWADL_BROWSER_WAIT]. If the browser side wait fails, the
+           polled wait runs instead.
+    """
+    browser_wait = None
+
+    """
+    Datum: lazy_reports
+    Purpose: if True, a passing validation files a compact record (see
+             swadl_validation_record.py) and a one line result log entry, rather than reading the
+             control's status back and bannerizing a full report. The full report is rendered at
+             debug level, or whenever the record is asked for it. Failures are always reported
+             in full.
+    Notes: None means use cfgdict[SWADL_LAZY_REPORTS]
+    """
+    lazy_reports = None
+
+    # set by get_elements() when it answered from the cache on an unchanged DOM epoch
+    _epoch_reused = False
+
+    """
+    Data: read_only_validations
+    Purpose: The validations that only read the state of the control, each mapped to the status
+             key that answers it. These are safe to check in bulk (see swadl_batch.py).
+             VALIDATE_INPUT and VALIDATE_CLICK change the page, so they always run one at a time,
+             after everything else.
+    """
+    read_only_validations = {
+        VALIDATE_ENABLED: ENABLED,
+        VALIDATE_EXIST: EXIST,
+        VALIDATE_TEXT: VALUE,
+        VALIDATE_UNIQUE: UNIQUE,
+        VALIDATE_VISIBLE: VISIBLE,
+    }
+
+    """
+    Data: _snapshot_keys
+    Purpose: Which status key answers each _query_* helper when running in status snapshot mode.
+    Users: _retry_until_expected_met()
+    """
+    _snapshot_keys = {
+        '_query_enabled': ENABLED,
+        '_query_exist': EXIST,
+        '_query_unique': UNIQUE,
+        '_query_value': VALUE,
+        '_query_visible': VISIBLE,
+    }
+
     def __init__(self, **kwargs):
         """
         Purpose: Initialize instance
@@ -125,10 +248,19 @@ class SWADLControl(SWADLBase):
               to validate that the control's state matches the boolean value
             - VALIDATE_VISIBLE (bool/None) if a value is specified, the validate() call will attempt
               to validate that the control's state matches the boolean value
+            - poller (SWADLPoller/None) the polling scheduler for this control's retry loops
         """
         super().__init__(**kwargs)
         self.require_in(member=SELECTOR, container=kwargs, fatal=True)
-        self.validation = None
+        self.validation = self.normalize_validation(kwargs.get('validation'))
+        if self.poller is None:
+            self.poller = self.poller_class(
+                initial_interval=cfgdict[SWADL_POLL_INITIAL_INTERVAL],
+                backoff=cfgdict[SWADL_POLL_BACKOFF],
+                jitter=cfgdict[SWADL_POLL_JITTER],
+                max_interval=cfgdict[SWADL_POLL_MAX_INTERVAL],
+                name=self.name,
+            )
         self.clear_cached_status()
         self.mater_validation_table = {
             VALIDATE_ENABLED: self.validate_enabled,
@@ -214,6 +346,7 @@ class SWADLControl(SWADLBase):
         """
         try:
             self._cache[FILTERED_ELEMENTS][0].click()
+            self.page_changed(f'{self.get_name()} clicked')
             self._cache[STATUS][CLICK] = True
         except (TypeError, IndexError):
             self._cache[STATUS][CLICK] = False
@@ -236,59 +369,35 @@ class SWADLControl(SWADLBase):
             - force (bool) - force update by clearing the cache
             - timeout (float, default=20) - How long until we give up looking for a match
             _ **kwargs - Are applied to the object as object properties before acting.
+        Notes: With DOM epoch tracking on, an unchanged epoch satisfies force, and the cached
+               elements come straight back.
         """
         self.apply_kwargs(kwargs)
         end_time = end_time if end_time else time.time() + timeout
         processed_selector = self.resolve_substitutions(self.selector)
 
+        dom_epoch = self._get_dom_epoch()
+        epoch_token = dom_epoch.read(self.driver) if dom_epoch is not None else None
+        self._epoch_reused = self._cache_still_good(processed_selector, epoch_token)
+        if self._epoch_reused:
+            return self._cache[FILTERED_ELEMENTS]
+
+        query_cache = self._get_query_cache()
+        if force and query_cache is not None:
+            query_cache.invalidate(processed_selector)
+
+        schedule = self.poller.start(end_time)
         while True:
+            schedule.tick()
             try:
                 # The explicit reference here forces everything to be a CSS based selector.
                 # TODO: Use prefixes instead, such as css= or xpath=. Add that logic here.
-
-                # first we get the current list of matching raw elements
-                new_raw_elements = self.driver.find_elements(By.CSS_SELECTOR, processed_selector)
-                # now we check and see if anything has changed from last time
-                refresh = (
-                    (self._cache[RAW_ELEMENTS] != new_raw_elements) or
-                    (self._cache[IS_TEXT] != self.is_text) or
-                    (self._cache[HAS_TEXT] != self.has_text) or
-                    (self._cache[INDEX] != self.index) or
-                    (force == True)
-                )
-                if refresh:
-                    self.clear_cached_status()
-                    self._cache[SELECTOR] = self.selector
-                    self._cache[PROCESSED_SELECTOR] = processed_selector
-                    self._cache[IS_TEXT] = self.is_text
-                    self._cache[HAS_TEXT] = self.has_text
-                    self._cache[INDEX] = self.index
-                    self._cache[RAW_ELEMENTS] = new_raw_elements
-                    if self.is_text:
-                        for element in self._cache[RAW_ELEMENTS]:
-                            text = element.text
-                            if text not in self._cache[UNIQUE_TEXT_VALUES]:
-                                self._cache[UNIQUE_TEXT_VALUES].append(text)
-                            if self.is_text == text:
-                                self._cache[FILTERED_ELEMENTS].append(element)
-                                break
-                    elif self.has_text:
-                        for element in self._cache[RAW_ELEMENTS]:
-                            text = element.text
-                            if text not in self._cache[UNIQUE_TEXT_VALUES]:
-                                self._cache[UNIQUE_TEXT_VALUES].append(text)
-                            if self.is_text in text:
-                                self._cache[FILTERED_ELEMENTS].append(element)
-                                break
-                    else:
-                        self._cache[FILTERED_ELEMENTS] = self._cache[RAW_ELEMENTS]
-
-                    if self.index is not None:
-                        assert self.index < 0 or len(self._cache[FILTERED_ELEMENTS]) > self.index, (
-                            f"Index of {self.index} into the list of matching controls is "
-                            f"invalid, the number of elements was {self._cache[FILTERED_ELEMENTS]}."
-                        )
-                        self._cache[FILTERED_ELEMENTS] = [self._cache[FILTERED_ELEMENTS][self.index]]
+                if query_cache is not None:
+                    self._get_elements_from_query_cache(query_cache, processed_selector, force=force)
+                elif (self.is_text or self.has_text) and self._use_browser_filter():
+                    self._get_elements_filtered_in_browser(processed_selector, force=force)
+                else:
+                    self._get_elements_filtered_here(processed_selector, force=force)
 
                 if self._cache[FILTERED_ELEMENTS]:
                     break
@@ -299,13 +408,186 @@ class SWADLControl(SWADLBase):
                 # we do care whether we've gone past our end time. But performing this test
                 # here, rather than at the top, means we go thru the loop at least once.
                 break
+            if query_cache is not None:
+                # no luck with what's cached, so the next poll has to ask the browser
+                query_cache.invalidate(processed_selector)
+            schedule.wait()
+        # the token was read before the first attempt, so it only vouches for what that read
+        self._cache[DOM_EPOCH] = epoch_token if schedule.finish() == 1 else None
         return self._cache[FILTERED_ELEMENTS]
 
+    def _cache_still_good(self, processed_selector, epoch_token):
+        # Purpose: Returns whether the cached elements were read for this same query in the DOM
+        #          epoch the page is still in
+        return (
+            SWADLDomEpoch.unchanged(self._cache[DOM_EPOCH], epoch_token) and
+            bool(self._cache[FILTERED_ELEMENTS]) and
+            (self._cache[PROCESSED_SELECTOR] == processed_selector) and
+            (self._cache[IS_TEXT] == self.is_text) and
+            (self._cache[HAS_TEXT] == self.has_text) and
+            (self._cache[INDEX] == self.index)
+        )
+
+    def _get_elements_filtered_here(self, processed_selector, force=False):
+        # Purpose: One pass of get_elements(), reading the raw matches back and filtering them
+        #          here in python. Costs a round trip per element when is_text/has_text is set.
+        # first we get the current list of matching raw elements
+        new_raw_elements = self.driver.find_elements(CSS_SELECTOR, processed_selector)
+        # now we check and see if anything has changed from last time
+        refresh = (
+            (self._cache[RAW_ELEMENTS] != new_raw_elements) or
+            (self._cache[IS_TEXT] != self.is_text) or
+            (self._cache[HAS_TEXT] != self.has_text) or
+            (self._cache[INDEX] != self.index) or
+            (force == True)
+        )
+        if refresh:
+            self._reset_cache_for(processed_selector)
+            self._cache[RAW_ELEMENTS] = new_raw_elements
+            self._cache[RAW_COUNT] = len(new_raw_elements)
+            # a generator, so .text is only read for as many elements as the filter looks at
+            self._filter_raw_elements(element.text for element in new_raw_elements)
+
+    def _get_elements_from_query_cache(self, query_cache, processed_selector, force=False):
+        # Purpose: One pass of get_elements(), using the raw elements and text shared by every
+        #          control on the page with the same selector (see swadl_query_cache.py)
+        entry = query_cache.get(
+            self.driver, processed_selector, with_text=bool(self.is_text or self.has_text)
+        )
+        refresh = (
+            (self._cache[RAW_ELEMENTS] != entry.raw) or
+            (self._cache[IS_TEXT] != self.is_text) or
+            (self._cache[HAS_TEXT] != self.has_text) or
+            (self._cache[INDEX] != self.index) or
+            (force == True)
+        )
+        if refresh:
+            self._reset_cache_for(processed_selector)
+            self._cache[RAW_ELEMENTS] = entry.raw
+            self._cache[RAW_COUNT] = len(entry.raw)
+            self._filter_raw_elements(entry.texts or [])
+
+    def _filter_raw_elements(self, texts):
+        # Purpose: Apply is_text/has_text and index to _cache[RAW_ELEMENTS], filling in
+        #          _cache[FILTERED_ELEMENTS] and _cache[UNIQUE_TEXT_VALUES]
+        # Inputs: texts - iterable of the text of each raw element, in the same order
+        if self.is_text:
+            for element, text in zip(self._cache[RAW_ELEMENTS], texts):
+                if text not in self._cache[UNIQUE_TEXT_VALUES]:
+                    self._cache[UNIQUE_TEXT_VALUES].append(text)
+                if self.is_text == text:
+                    self._cache[FILTERED_ELEMENTS].append(element)
+                    break
+        elif self.has_text:
+            for element, text in zip(self._cache[RAW_ELEMENTS], texts):
+                if text not in self._cache[UNIQUE_TEXT_VALUES]:
+                    self._cache[UNIQUE_TEXT_VALUES].append(text)
+                if self.has_text in text:
+                    self._cache[FILTERED_ELEMENTS].append(element)
+                    break
+        else:
+            self._cache[FILTERED_ELEMENTS] = self._cache[RAW_ELEMENTS]
+
+        if self.index is not None:
+            assert self.index < 0 or len(self._cache[FILTERED_ELEMENTS]) > self.index, (
+                f"Index of {self.index} into the list of matching controls is "
+                f"invalid, the number of elements was {self._cache[FILTERED_ELEMENTS]}."
+            )
+            self._cache[FILTERED_ELEMENTS] = [self._cache[FILTERED_ELEMENTS][self.index]]
+
+    def _get_elements_filtered_in_browser(self, processed_selector, force=False):
+        # Purpose: One pass of get_elements(), with the is_text/has_text/index filtering and the
+        #          unique text collection done in the browser by a single FILTER_ELEMENTS call.
+        # Notes: Only the filtered elements come back, so _cache[RAW_ELEMENTS] stays empty and
+        #        _cache[RAW_COUNT] carries the number of raw matches. Unlike the python side, all
+        #        the unique text values are collected, not just those up to the first match.
+        found = self.driver.execute_script(
+            FILTER_ELEMENTS,
+            processed_selector,
+            self.is_text or None,
+            self.has_text or None,
+            self.index,
+        )
+        refresh = (
+            (self._cache[FILTERED_ELEMENTS] != found['filtered']) or
+            (self._cache[UNIQUE_TEXT_VALUES] != found['texts']) or
+            (self._cache[RAW_COUNT] != found['count']) or
+            (self._cache[IS_TEXT] != self.is_text) or
+            (self._cache[HAS_TEXT] != self.has_text) or
+            (self._cache[INDEX] != self.index) or
+            (force == True)
+        )
+        if refresh:
+            self._reset_cache_for(processed_selector)
+            self._cache[RAW_COUNT] = found['count']
+            self._cache[FILTERED_ELEMENTS] = found['filtered']
+            self._cache[UNIQUE_TEXT_VALUES] = found['texts']
+
+    def _reset_cache_for(self, processed_selector):
+        # Purpose: Clear the cache and record what it is about to hold
+        self.clear_cached_status()
+        self._cache[SELECTOR] = self.selector
+        self._cache[PROCESSED_SELECTOR] = processed_selector
+        self._cache[IS_TEXT] = self.is_text
+        self._cache[HAS_TEXT] = self.has_text
+        self._cache[INDEX] = self.index
+
+    def _get_query_cache(self):
+        # Purpose: Returns the query cache shared by the controls on the page, or None if this
+        #          control isn't using it. It's created the first time it's asked for.
+        use_cache = self.shared_query_cache
+        if use_cache is None:
+            use_cache = cfgdict[SWADL_QUERY_CACHE]
+        if not use_cache:
+            return None
+        if cfgdict.get(QUERY_CACHE) is None:
+            cfgdict[QUERY_CACHE] = SWADLQueryCache(
+                max_age=cfgdict[SWADL_QUERY_CACHE_MAX_AGE], dom_epoch=self._get_dom_epoch()
+            )
+        return cfgdict[QUERY_CACHE]
+
+    def _get_dom_epoch(self):
+        # Purpose: Returns the page's DOM epoch tracker, or None if this control isn't using it.
+        #          It's created the first time it's asked for.
+        use_epoch = self.track_dom_epoch
+        if use_epoch is None:
+            use_epoch = cfgdict[SWADL_DOM_EPOCH]
+        if not use_epoch:
+            return None
+        if cfgdict.get(DOM_EPOCH) is None:
+            cfgdict[DOM_EPOCH] = SWADLDomEpoch()
+        return cfgdict[DOM_EPOCH]
+
+    def page_changed(self, reason=None):
+        # Purpose: Something this control did may have changed the page, so drop what we know
+        self._cache[SNAPSHOT] = None
+        self._cache[DOM_EPOCH] = None
+        super().page_changed(reason=reason or f'{self.get_name()} acted')
+
+    def _get_browser_wait(self):
+        # Purpose: Returns the browser side waiter, or None if this control isn't using it.
+        #          It's created the first time it's asked for.
+        use_wait = self.browser_wait
+        if use_wait is None:
+            use_wait = cfgdict[SWADL_BROWSER_WAIT]
+        if not use_wait:
+            return None
+        if cfgdict.get(BROWSER_WAIT) is None:
+            cfgdict[BROWSER_WAIT] = SWADLBrowserWait()
+        return cfgdict[BROWSER_WAIT]
+
+    def _use_browser_filter(self):
+        # Purpose: Returns whether is_text/has_text filtering should be done in the browser
+        if self.browser_filter is None:
+            return cfgdict[SWADL_BROWSER_FILTER]
+        return self.browser_filter
+
     def clear_cached_status(self):
         # Purpose: Reset the cache data to blank. Will cause next option to re-fetch
         self._cache = {
             STATUS: {},
             RAW_ELEMENTS: [],
+            RAW_COUNT: 0,
             FILTERED_ELEMENTS: [],
             UNIQUE_TEXT_VALUES: [],
             SELECTOR: None,
@@ -313,10 +595,33 @@ class SWADLControl(SWADLBase):
             IS_TEXT: None,
             HAS_TEXT: None,
             INDEX:None,
+            SNAPSHOT: None,
+            DOM_EPOCH: None,
         }
 
     def get_status(self, force=True, timeout=cfgdict[SELENIUM_CONTROL_DEFAULT_TIMEOUT], **kwargs):
+        # Purpose: Refresh self._cache[STATUS] with the current state of the control
+        if self._use_status_snapshot():
+            self.apply_kwargs(kwargs)
+            end_time = time.time() + timeout
+            schedule = self.poller.start(end_time)
+            while True:
+                schedule.tick()
+                try:
+                    if self._take_status_snapshot()[EXIST]:
+                        break
+                except Exception:
+                    # same as get_elements(), errors just mean try again
+                    pass
+                if time.time() > end_time:
+                    break
+                schedule.wait()
+            schedule.finish()
+            return
         self.get_elements(force=force, timeout=timeout, **kwargs)
+        if self._epoch_reused and self._cache[STATUS].get(ACTIONABLE) is not None:
+            # same elements, same DOM, so the status worked out last time still stands
+            return
         self._cache[STATUS][EXIST] = False
         self._cache[STATUS][UNIQUE] = False
         self._cache[STATUS][VISIBLE] = None
@@ -338,6 +643,76 @@ class SWADLControl(SWADLBase):
                 self._cache[STATUS][VISIBLE] and self._cache[STATUS][ENABLED]
             )
 
+    def _use_status_snapshot(self):
+        # Purpose: Returns whether this control gathers its status with one script call
+        if self.status_snapshot is None:
+            return cfgdict[SWADL_STATUS_SNAPSHOT]
+        return self.status_snapshot
+
+    def _take_status_snapshot(self):
+        """
+        Purpose: Refreshes the cache with a single STATUS_SNAPSHOT script call.
+        Returns:
+            dict of EXIST, UNIQUE, VISIBLE, ENABLED and VALUE as the matching _query_* helper
+            would have reported them.
+        Notes:
+            self._cache[STATUS] is filled in following the get_status() rules, which only
+            report visible/enabled/value for a unique match.
+        """
+        snapshot = self.driver.execute_script(STATUS_SNAPSHOT, *self._snapshot_arguments())
+        return self._apply_status_snapshot(snapshot)
+
+    def _snapshot_arguments(self):
+        # Purpose: The [selector, is_text, has_text, index] a snapshot script needs for this control
+        return [
+            self.resolve_substitutions(self.selector),
+            self.is_text or None,
+            self.has_text or None,
+            self.index,
+        ]
+
+    def _apply_status_snapshot(self, snapshot, processed_selector=None):
+        # Purpose: Loads a snapshot (from STATUS_SNAPSHOT or BATCH_STATUS) into the cache
+        # Returns: dict of the per-query values, see _take_status_snapshot()
+        if 'error' in snapshot:
+            raise ValueError(f"{self.get_name()} snapshot failed: {snapshot['error']}")
+        processed_selector = processed_selector or self.resolve_substitutions(self.selector)
+        self._reset_cache_for(processed_selector)
+        self._cache[RAW_ELEMENTS] = snapshot.get('raw') or []
+        self._cache[RAW_COUNT] = snapshot['count']
+        self._cache[FILTERED_ELEMENTS] = snapshot['filtered']
+        self._cache[UNIQUE_TEXT_VALUES] = snapshot['texts']
+        self._cache[SNAPSHOT] = snapshot['first'] or {}
+        self._set_status_from_snapshot()
+
+        first = self._cache[SNAPSHOT]
+        return {
+            EXIST: self._cache[STATUS][EXIST],
+            UNIQUE: self._cache[STATUS][UNIQUE],
+            VISIBLE: bool(first.get(VISIBLE)),
+            ENABLED: bool(first.get(ENABLED)),
+            VALUE: first.get('text'),
+        }
+
+    def _set_status_from_snapshot(self):
+        # Purpose: (Re)builds self._cache[STATUS] from the last snapshot without another round trip
+        how_many = len(self._cache[FILTERED_ELEMENTS])
+        first = self._cache[SNAPSHOT]
+        status = self._cache[STATUS]
+        status[EXIST] = how_many > 0
+        status[UNIQUE] = how_many == 1
+        status[VISIBLE] = None
+        status[ENABLED] = None
+        status[VALUE] = None
+        status[INPUT_VALUE] = None
+        status[ACTIONABLE] = None
+        if status[UNIQUE]:
+            status[VISIBLE] = first[VISIBLE]
+            status[ENABLED] = first[ENABLED]
+            status[VALUE] = first['text']
+            status[INPUT_VALUE] = first[VALUE]
+            status[ACTIONABLE] = status[VISIBLE] and status[ENABLED]
+
     def submit(self, end_time=None, fatal=False, force=False,
                timeout=cfgdict[SELENIUM_CONTROL_DEFAULT_TIMEOUT], **kwargs):
         # Purpose: Sends submit to the control
@@ -349,6 +724,7 @@ class SWADLControl(SWADLBase):
         )
         if len(element_list) > 0:
             element_list[0].submit(**self._remove_keys_webdriver_doesnt_like(kwargs))
+            self.page_changed(f'{self.get_name()} submitted')
         else:
             self.require_true(
                 exper=element_list,
@@ -425,6 +801,7 @@ class SWADLControl(SWADLBase):
         found_elements = len(element_list) > 0
         if found_elements:
             element_list[0].send_keys(value, **self._remove_keys_webdriver_doesnt_like(kwargs))
+            self.page_changed(f'{self.get_name()} got input')
         else:
             self.require_true(
                 exper=element_list,
@@ -518,10 +895,16 @@ class SWADLControl(SWADLBase):
     def _refresh(self, end_time=None, expected=None, force=False, timeout=0):
         # Purpose: Reloads the element list. Intended to be a helper method, for internal use
         if force or not self.__dict__.get(CACHE):
-            self.clear_cached_status()
+            tracking = self._get_dom_epoch() is not None
+            if not tracking:
+                self.clear_cached_status()
             if expected is False:
+                # don't sit waiting for elements we're hoping not to find. end_time would
+                # win over timeout in get_elements(), so drop it too.
+                end_time = None
                 timeout = 0
-            self.get_elements(end_time=end_time, timeout=timeout)
+            # when tracking, the cache is kept so an unchanged DOM epoch can vouch for it
+            self.get_elements(end_time=end_time, force=tracking, timeout=timeout)
 
     # if _retry gets an exception, we'll put it here. it can be checked after the last one
     _exception_from_refresh = None
@@ -532,13 +915,36 @@ class SWADLControl(SWADLBase):
         #          the timeout expires). Intended to be a helper method, for internal use
         # WARNING: IF AN EXPECTED VALUE IS SPECIFIED AND NOT MET, THIS METHOD WILL RETURN FALSE!
         end_time = end_time if end_time else time.time() + timeout
-        self._refresh(end_time=end_time, expected=expected, force=force, timeout=timeout)
+        wait_key = self._snapshot_keys.get(call.__name__) if self._get_browser_wait() else None
+        if wait_key:
+            try:
+                return self._wait_in_browser(wait_key, end_time=end_time, expected=expected)
+            except Exception as e:
+                # a page that won't run the script (or a driver that can't) still gets the
+                # polled wait below
+                self._exception_from_refresh = e
+        # in snapshot mode, every attempt below is a fresh snapshot, so there's nothing to refresh
+        snapshot_key = self._snapshot_keys.get(call.__name__) if self._use_status_snapshot() else None
+        self._epoch_reused = False
+        if not snapshot_key:
+            self._refresh(end_time=end_time, expected=expected, force=force, timeout=timeout)
+        # if the refresh found the DOM unchanged, a status already read can answer the first poll
+        reuse_key = self._snapshot_keys.get(call.__name__) if self._epoch_reused else None
         result = False
         start_time = time.time()
+        schedule = self.poller.start(end_time)
         while True:
+            schedule.tick()
             try:
                 self._exception_from_refresh = None
-                result = call()
+                if snapshot_key:
+                    result = self._take_status_snapshot()[snapshot_key]
+                    self._cache[STATUS][snapshot_key] = result
+                elif (reuse_key and schedule.polls == 1 and
+                      self._cache[STATUS].get(reuse_key) is not None):
+                    result = self._cache[STATUS][reuse_key]
+                else:
+                    result = call()
             except StaleElementReferenceException:
                 print("STALE ELEMENT EXCEPTION===========================================================")
                 # if we got a stale element exception, check that we're not over time...
@@ -560,26 +966,100 @@ class SWADLControl(SWADLBase):
             # if we've exceeded our time, then we're done!
             if time.time() > end_time:
                 break
+            schedule.wait()
+        schedule.finish()
         if expected is not None:
             result = result == expected
         return result, time.time() - start_time
 
-    def validate(self, end_time=None, fatal=False, timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT],
-                 validation=None, **kwargs):
+    def _wait_in_browser(self, status_key, end_time, expected=None):
+        """
+        Purpose: The browser side version of _retry_until_expected_met(), one WAIT_FOR_STATUS
+                 call for the whole wait
+        Args:
+            - status_key (str) EXIST, UNIQUE, VISIBLE, ENABLED or VALUE
+            - end_time (float) when to give up
+            - expected - the value to wait for, None to just read it
+        Returns:
+            (result, elapsed time), as _retry_until_expected_met() does
+        Notes:
+            The cache and status are loaded from the final snapshot, as in snapshot mode. The
+            poller sees the wait as a single poll.
+        """
+        start_time = time.time()
+        schedule = self.poller.start(end_time)
+        schedule.tick()
+        try:
+            status = self._get_browser_wait().wait(
+                self.driver,
+                self._snapshot_arguments(),
+                status_key,
+                expected,
+                end_time - start_time,
+            )
+            self._apply_status_snapshot(status)
+        finally:
+            schedule.finish()
+        result = status['value']
+        self._cache[STATUS][status_key] = result
+        if expected is not None:
+            result = result == expected
+        return result, time.time() - start_time
+
+    def validate(self, deadline=None, end_time=None, fatal=False,
+                 timeout=cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT], validation=None, **kwargs):
         # Purpose: Given a validation dict, or a self.validation dict (if none is passed)
         #          Then validate that each thing is of the correct value
+        # Inputs: - deadline (SWADLDeadline/None) the budget this comes out of (see
+        #           swadl_deadline.py). None means the active one, if any.
+        #         - end_time/timeout - this control's own limit, cut down to fit the deadline.
+        #           A timeout of None means "whatever the deadline has left".
         # Returns: (bool) was the validation successful
-        validation = validation or self.validation
+        # Notes: The value for each VALIDATE_ key is what's expected. None means skip it.
+        #        All the validations share the one budget. Once it's spent, each of those left
+        #        still gets its single attempt, but no waiting.
+        validation = self.normalize_validation(validation) or self.validation
         assert validation, "SWADLControl.validate() was called with no validations specified."
-        end_time = end_time if end_time else time.time() + timeout
+        deadline = self.start_deadline(deadline=deadline, end_time=end_time, timeout=timeout)
+        if deadline.end_time is None:
+            deadline.end_time = deadline.start_time + cfgdict[SELENIUM_PAGE_DEFAULT_TIMEOUT]
         result = True
-        for item in validation:
-            time_remaining = end_time - time.time()
-            time_remaining = time_remaining if time_remaining > 0 else 1
+        for item, expected in validation.items():
+            if expected is None:
+                continue
+            if item == VALIDATE_TEXT and expected is True:
+                # True here means "use the control's own VALIDATE_TEXT value"
+                expected = None
             validation_call = self.mater_validation_table[item]
-            result = validation_call(fatal=fatal, timeout=time_remaining, **kwargs) and result
+            with deadline.child(name=item) as item_deadline:
+                result = validation_call(
+                    end_time=item_deadline.end_time,
+                    expected=expected,
+                    fatal=fatal,
+                    timeout=item_deadline.remaining(),
+                    **kwargs
+                ) and result
+        deadline.finish()
         return result
 
+    @staticmethod
+    def normalize_validation(validation):
+        """
+        Purpose: Turns the shorthand forms of a validation into a validation dict
+        Args:
+            - validation: None, a dict of {VALIDATE_*: expected}, a single VALIDATE_* name, or
+              a list/tuple of VALIDATE_* names
+        Returns:
+            dict (or None). Bare names mean {name: True}
+        """
+        if not validation:
+            return None
+        if isinstance(validation, str):
+            return {validation: True}
+        if isinstance(validation, dict):
+            return validation
+        return {item: True for item in validation}
+
     def _validate(self, comments='', elapsed_time='', expected=None, fatal=False, force=None, report=True,
                   result=None, validation_name=None):
         # Purpose: reports on the pass/fail status of a validation call
@@ -589,55 +1069,61 @@ class SWADLControl(SWADLBase):
         if report:
             # this next if is to check and see if we're running not under a test
             if FAILURE_LOG not in cfgdict:
-                cfgdict[FAILURE_LOG] = Output('automation_failures.log')
-                cfgdict[RESULT_LOG] = Output('automation_results.log')
-            if isinstance(elapsed_time, str):
-                elapsed_time = 'not specified'
-            else:
-                # linters hate this.
-                elapsed_time = (
-                    '< 0.0001 seconds' if elapsed_time < 0.0001 else
-                    f'{round(elapsed_time, 4)} seconds'
+                cfgdict[FAILURE_LOG] = Output('automation_failures.log', name=FAILURE_LOG)
+                cfgdict[RESULT_LOG] = Output('automation_results.log', name=RESULT_LOG)
+            entry_name = (
+                f'{VALIDATION_RECORD}{self.get_name()}'
+                f'.{validation_name} '
+                f'at {self.get_timestamp()}'
+            )
+            if result and self._use_lazy_reports():
+                # a pass is filed as a compact record, rendered only if someone asks for it
+                record = SWADLValidationRecord(
+                    control=self,
+                    validation=validation_name,
+                    elapsed=elapsed_time,
+                    result=result,
+                    expected=expected,
+                    fatal=fatal,
+                    comments=comments,
+                    polls=self.poller.last_polls,
+                )
+                cfgdict[RESULT_LOG].add(str(record))
+                self.test_data[entry_name] = record
+                self._record_validation_result(
+                    comments, elapsed_time, expected, result, validation_name
                 )
+                if self.log.isEnabledFor(logging.DEBUG):
+                    self.log.debug(record.render())
+                return result
             report_me = None
             if not result:
                 if self.save_screen_shots:
                     file_name = f'FAILURE_{self.get_timestamp()}.png'
                     self.driver.save_screenshot(file_name)
                     report_me = f'    saved image: {file_name},\n'
-            message_dict = SWADLDict()
-            message_dict['result'] = "PASSED" if result else "FAILED"
-            message_dict['for control'] = self.get_name()
-            message_dict['with selector'] = self.selector
-            message_dict[IS_TEXT] = self.is_text
-            message_dict[HAS_TEXT] = self.has_text
-            message_dict[INDEX] = self.index
-            self.get_status(timeout=0)
-            filtered_element_count = len(self._cache[FILTERED_ELEMENTS])
-            message_dict['# filtered elements'] = filtered_element_count
-            message_dict['control status cache'] = self._cache[STATUS]
-            message_dict['# raw elements'] = len(self._cache[RAW_ELEMENTS])
-            message_dict['unique text found'] = self._cache[UNIQUE_TEXT_VALUES]
-            message_dict['validation_name'] = validation_name
-            message_dict['expected'] = expected
-            message_dict['elapsed_time'] = elapsed_time
-            message_dict['fatal'] = fatal
-            if report_me:
-                message_dict['report_me'] = report_me
-            message_dict['comments'] = comments
+            message_dict = self._make_validation_report(
+                comments=comments,
+                elapsed_time=elapsed_time,
+                expected=expected,
+                fatal=fatal,
+                polls=self.poller.last_polls,
+                report_me=report_me,
+                result=result,
+                validation_name=validation_name,
+            )
             message = self.bannerize(data=message_dict, title="SWADL Validation Result")
             cfgdict[RESULT_LOG].add(message)
-            entry_name = (
-                f'SWADL:Validation:{self.get_name()}'
-                f'.{validation_name} '
-                f'at {self.get_timestamp()}'
-            )
             self.test_data[entry_name] = message_dict
+            self._record_validation_result(comments, elapsed_time, expected, result, validation_name)
             if result:
                 self.log.debug(message)
             else:
                 self.log.critical(message)
                 cfgdict[FAILURE_LOG].add(message)
+                # a failure may be about to end the run, so get it (and what led up to it) on disk
+                cfgdict[RESULT_LOG].flush()
+                cfgdict[FAILURE_LOG].flush()
                 cfgdict[TEST_OBJECT].accumulated_failures.append(message)
             # print(message)
             was_not_fatal = not (result is False and fatal is True)
@@ -645,6 +1131,75 @@ class SWADLControl(SWADLBase):
 
         return result
 
+    def _record_validation_result(self, comments, elapsed_time, expected, result, validation_name):
+        # Purpose: Add this validation to the JSONL result stream, if there is one
+        self.record_result(
+            type='validation',
+            selector=self.selector,
+            validation=validation_name,
+            expected=expected,
+            result=bool(result),
+            elapsed=None if isinstance(elapsed_time, str) else elapsed_time,
+            comments=comments,
+        )
+
+    def _use_lazy_reports(self):
+        # Purpose: Returns whether passing validations are filed as compact records
+        if self.lazy_reports is None:
+            return cfgdict[SWADL_LAZY_REPORTS]
+        return self.lazy_reports
+
+    @staticmethod
+    def format_elapsed_time(elapsed_time):
+        """
+        Purpose: Formats a validation's elapsed time for reporting
+        Returns:
+            str
+        """
+        if isinstance(elapsed_time, str):
+            return 'not specified'
+        # linters hate this.
+        return (
+            '< 0.0001 seconds' if elapsed_time < 0.0001 else
+            f'{round(elapsed_time, 4)} seconds'
+        )
+
+    def _make_validation_report(self, comments='', elapsed_time='', expected=None, fatal=False,
+                                polls=None, report_me=None, result=None, validation_name=None):
+        """
+        Purpose: Builds the full report of one validation, including the control's status
+        Returns:
+            SWADLDict, ready to bannerize
+        Notes: Reads the control's status, from the last snapshot if there is one, otherwise
+               from the browser.
+        """
+        message_dict = SWADLDict()
+        message_dict['result'] = "PASSED" if result else "FAILED"
+        message_dict['for control'] = self.get_name()
+        message_dict['with selector'] = self.selector
+        message_dict[IS_TEXT] = self.is_text
+        message_dict[HAS_TEXT] = self.has_text
+        message_dict[INDEX] = self.index
+        message_dict['polls'] = polls
+        if self._cache[SNAPSHOT] is not None:
+            # the validation just took a snapshot, no need to go back to the browser
+            self._set_status_from_snapshot()
+        else:
+            self.get_status(timeout=0)
+        filtered_element_count = len(self._cache[FILTERED_ELEMENTS])
+        message_dict['# filtered elements'] = filtered_element_count
+        message_dict['control status cache'] = self._cache[STATUS]
+        message_dict['# raw elements'] = self._cache[RAW_COUNT]
+        message_dict['unique text found'] = self._cache[UNIQUE_TEXT_VALUES]
+        message_dict['validation_name'] = validation_name
+        message_dict['expected'] = expected
+        message_dict['elapsed_time'] = self.format_elapsed_time(elapsed_time)
+        message_dict['fatal'] = fatal
+        if report_me:
+            message_dict['report_me'] = report_me
+        message_dict['comments'] = comments
+        return message_dict
+
     def validate_click(self, end_time=None, expected=True, fatal=False, force=True,
                        timeout=cfgdict[SELENIUM_CONTROL_DEFAULT_TIMEOUT], **kwargs):
         """
@@ -757,3 +1312,4 @@ class SWADLControl(SWADLBase):
         # JUST HOW DO WE KNOW IF WE WORKED?
         # RETRY?
         self.actions.move_to_element(self.get_elements(timeout=timeout)[0]).perform()
+        self.page_changed(f'{self.get_name()} moused over')
@@ -0,0 +1,218 @@
+# File: swadl_data_set.py
+# Purpose: Data sets for data driven tests. Rows are read from CSV, JSONL or YAML files one at a
+#          time, as the test gets to them, so a data set of any size costs the memory of one row.
+# Notes: - CSV: the first line is the header, every value is a str
+#        - JSONL: one JSON object per line, blank lines are skipped
+#        - YAML: each document is a row, or a list of rows. Separate rows with --- to stream them;
+#          a document that is one big list is read whole. Needs PyYAML.
+#        Rows are numbered from 1, in file order. A shard (eg '2/4', the 2nd of 4) keeps every
+#        4th row, starting with the 2nd, so N processes can split one file without coordinating.
+# Usage:
+#       for number, row in SWADLDataSet('users.csv', shard='1/2'):
+#           print(number, row['user_name'])
+
+import csv
+import itertools
+import json
+import os
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+}
+
+
+def _read_csv(path):
+    # Purpose: CSV rows, as dicts keyed by the header
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        yield from csv.DictReader(handle)
+
+
+def _read_jsonl(path):
+    # Purpose: JSONL rows
+    with open(path, encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path} line {line_number} isn't JSON: {e}")
+            assert isinstance(row, dict), f"{path} line {line_number} isn't a JSON object"
+            yield row
+
+
+def _read_yaml(path):
+    # Purpose: YAML rows, a document at a time
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError(f"reading {path} needs PyYAML (pip install pyyaml)")
+    with open(path, encoding='utf-8') as handle:
+        for document in yaml.safe_load_all(handle):
+            if document is None:
+                continue
+            if isinstance(document, list):
+                yield from document
+            else:
+                yield document
+
+
+_readers = {
+    'csv': _read_csv,
+    'jsonl': _read_jsonl,
+    'yaml': _read_yaml,
+}
+
+
+def read_rows(path, data_format=None):
+    # Purpose: Streams the rows of a data set file
+    # Inputs: - path (str) the file
+    #         - data_format (str/None) 'csv', 'jsonl' or 'yaml'. None means by the file's extension
+    # Returns: generator of dicts
+    if data_format is None:
+        extension = os.path.splitext(os.fspath(path))[1].lower()
+        assert extension in FORMATS, (
+            f"can't tell the format of {path}, expected one of {sorted(FORMATS)}"
+        )
+        data_format = FORMATS[extension]
+    return _readers[data_format](path)
+
+
+def parse_shard(shard):
+    # Purpose: Turns '2/4' into (2, 4)
+    # Returns: (which, of), or None for no shard
+    if not shard:
+        return None
+    if isinstance(shard, str):
+        which, _, of = shard.partition('/')
+        shard = (int(which), int(of))
+    which, of = shard
+    assert 1 <= which <= of, f"a shard is 'which/of', with 1 <= which <= of, not {which}/{of}"
+    return which, of
+
+
+def numbered_rows(rows, shard=None):
+    # Purpose: Numbers rows from 1, and keeps only the ones in the shard
+    # Inputs: - rows (iterable) of dicts
+    #         - shard (str/tuple/None) see parse_shard()
+    # Returns: generator of (number, row)
+    numbered = enumerate(rows, 1)
+    shard = parse_shard(shard)
+    if shard is not None:
+        which, of = shard
+        numbered = itertools.islice(numbered, which - 1, None, of)
+    return numbered
+
+
+class SWADLDataSet(object):
+    # Purpose: A data set file, and which of its rows to use
+    # Usage:
+    #       data_set = SWADLDataSet('regression.jsonl', shard=(1, 8))
+    #       for number, row in data_set:
+    #           ...
+
+    def __init__(self, path, shard=None, data_format=None):
+        # Inputs: - path (str) the file
+        #         - shard (str/tuple/None) see parse_shard()
+        #         - data_format (str/None) see read_rows()
+        self.path = path
+        self.shard = parse_shard(shard)
+        self.data_format = data_format
+
+    def __iter__(self):
+        return numbered_rows(read_rows(self.path, self.data_format), self.shard)
+
+    def get_name(self):
+        # Purpose: Names the data set for reporting
+        name = os.path.basename(os.fspath(self.path))
+        if self.shard is not None:
+            name += f' [shard {self.shard[0]}/{self.shard[1]}]'
+        return name
+
+
+class TestSWADLDataSet:
+    # Purpose: Unit tests for the data set readers and shards. Intended for pytest
+
+    def test_csv(self, tmp_path):
+        # Purpose: CSV rows are dicts of str, keyed by the header, a byte order mark or not
+        path = tmp_path / 'users.csv'
+        path.write_text('\ufeffuser,age\nann,31\nbob,\n', encoding='utf-8')
+        assert list(read_rows(str(path))) == [
+            {'user': 'ann', 'age': '31'}, {'user': 'bob', 'age': ''},
+        ]
+
+    def test_jsonl(self, tmp_path):
+        # Purpose: JSONL rows keep their types, and blank lines are skipped
+        path = tmp_path / 'users.jsonl'
+        path.write_text('{"user": "ann", "age": 31}\n\n{"user": "bob", "tags": [1]}\n')
+        assert list(read_rows(str(path))) == [
+            {'user': 'ann', 'age': 31}, {'user': 'bob', 'tags': [1]},
+        ]
+
+    def test_jsonl_errors(self, tmp_path):
+        # Purpose: A bad line is reported with its line number
+        path = tmp_path / 'users.jsonl'
+        path.write_text('{"user": "ann"}\nnot json\n')
+        rows = read_rows(str(path))
+        assert next(rows) == {'user': 'ann'}
+        try:
+            next(rows)
+            assert False, "a line that isn't JSON should raise"
+        except ValueError as e:
+            assert 'line 2' in str(e)
+
+    def test_yaml(self, tmp_path):
+        # Purpose: A YAML document is a row, and a list document is a run of rows
+        import pytest
+        pytest.importorskip('yaml')
+        path = tmp_path / 'users.yml'
+        path.write_text('user: ann\nage: 31\n---\n- user: bob\n- user: cy\n---\n')
+        assert list(read_rows(str(path))) == [
+            {'user': 'ann', 'age': 31}, {'user': 'bob'}, {'user': 'cy'},
+        ]
+
+    def test_format(self, tmp_path):
+        # Purpose: The format comes from the extension unless it's given
+        path = tmp_path / 'users.txt'
+        path.write_text('{"user": "ann"}\n')
+        assert list(read_rows(str(path), data_format='jsonl')) == [{'user': 'ann'}]
+        try:
+            list(read_rows(str(path)))
+            assert False, "an unknown extension should be refused"
+        except AssertionError as e:
+            assert "can't tell the format" in str(e)
+
+    def test_parse_shard(self):
+        # Purpose: Shards are 'which/of' or (which, of), 1 based
+        assert parse_shard('2/4') == (2, 4)
+        assert parse_shard((1, 1)) == (1, 1)
+        assert parse_shard('') is None
+        assert parse_shard(None) is None
+        for bad in ('0/4', '5/4', (3, 2)):
+            try:
+                parse_shard(bad)
+                assert False, f"{bad} should be refused"
+            except AssertionError as e:
+                assert 'which/of' in str(e)
+
+    def test_numbered_rows(self):
+        # Purpose: Rows are numbered from 1, and the shards split them without overlap
+        rows = [{'n': n} for n in range(1, 11)]
+        assert [number for number, _ in numbered_rows(rows)] == list(range(1, 11))
+        shards = [[number for number, row in numbered_rows(rows, (which, 3))]
+                  for which in (1, 2, 3)]
+        assert shards == [[1, 4, 7, 10], [2, 5, 8], [3, 6, 9]]
+        assert all(row['n'] == number for number, row in numbered_rows(rows, '2/3'))
+
+    def test_data_set(self, tmp_path):
+        # Purpose: A data set can be iterated more than once, and names its shard
+        path = tmp_path / 'users.csv'
+        path.write_text('user\nann\nbob\ncy\n')
+        data_set = SWADLDataSet(str(path), shard='2/2')
+        assert list(data_set) == [(2, {'user': 'bob'})]
+        assert list(data_set) == [(2, {'user': 'bob'})]
+        assert data_set.get_name() == 'users.csv [shard 2/2]'
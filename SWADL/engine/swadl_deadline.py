@@ -0,0 +1,123 @@
+# File: swadl_deadline.py
+# Purpose: Hierarchical time budgets. A deadline is a hard wall clock end time that is handed down
+#          from the test to the flow, the section, the control and each single validation. A
+#          child can be given its own slice of the time, but never more than its parent has
+#          left, so however many controls are missing, a validation run ends when its budget does.
+# Notes: Children that run past their own end time (a final poll, a slow round trip) report the
+#        overshoot up to the root, where it can be logged at the end of the test.
+
+import time
+
+
+class SWADLDeadline(object):
+    # Purpose: One node in a tree of time budgets
+    # Usage:
+    #       section_deadline = SWADLDeadline(timeout=40, name='login page')
+    #       for control in controls:
+    #           with section_deadline.child(timeout=5, name=control.get_name()) as deadline:
+    #               control.validate(deadline=deadline)
+    #       section_deadline.finish()
+    #       section_deadline.overshoots  # [(name, seconds over), ...]
+
+    overshoot_tolerance = 0.25
+    # Purpose: Seconds a deadline may run over before it's reported. Every wait that gives up makes
+    #          one last attempt at its end time, so tiny overshoots are normal.
+
+    def __init__(self, timeout=None, end_time=None, parent=None, name=None):
+        # Purpose: Work out the end time
+        # Inputs: - timeout (float/None) seconds from now
+        #         - end_time (float/None) an absolute time.time() to end at. Wins over timeout.
+        #         - parent (SWADLDeadline/None) the budget this one is carved out of. The end time
+        #           is never later than the parent's.
+        #         - name (str) used when reporting overshoot
+        # Notes: With no timeout, end_time or bounded parent, the deadline is unbounded.
+        self.start_time = time.time()
+        if end_time is None and timeout is not None:
+            end_time = self.start_time + max(timeout, 0)
+        if parent is not None and parent.end_time is not None:
+            end_time = parent.end_time if end_time is None else min(end_time, parent.end_time)
+        self.end_time = end_time
+        self.parent = parent
+        self.name = name
+        self.finished_time = None
+        self.overshoot = 0.0
+        self.overshoots = []
+
+    def __repr__(self):
+        return f"SWADLDeadline({self.get_path()}, remaining={self.remaining()})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.finish()
+
+    def get_path(self):
+        # Purpose: Returns the names from the root down to this deadline, for reporting
+        names = []
+        deadline = self
+        while deadline is not None:
+            if deadline.name:
+                names.append(str(deadline.name))
+            deadline = deadline.parent
+        return '/'.join(reversed(names))
+
+    def remaining(self, minimum=0.0):
+        # Purpose: Returns the seconds left, never less than minimum. None if unbounded.
+        if self.end_time is None:
+            return None
+        return max(self.end_time - time.time(), minimum)
+
+    def expired(self):
+        # Purpose: Returns whether the time is up
+        return self.end_time is not None and time.time() >= self.end_time
+
+    def timeout_for(self, timeout=None):
+        # Purpose: Returns the timeout a call made under this deadline should use: the one asked
+        #          for, cut down to what's left. Unbounded deadlines pass timeout straight through.
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def child(self, timeout=None, share=None, name=None):
+        # Purpose: Carve a child budget out of this one
+        # Inputs: - timeout (float/None) a fixed slice, in seconds
+        #         - share (float/None) a fraction (0..1) of the time remaining here. Used if no
+        #           timeout is given.
+        #         - name (str) used when reporting overshoot
+        # Returns: SWADLDeadline ending no later than this one
+        if timeout is None and share is not None and self.end_time is not None:
+            timeout = self.remaining() * share
+        return SWADLDeadline(timeout=timeout, parent=self, name=name)
+
+    def finish(self):
+        # Purpose: Mark this deadline done, and report any overshoot to the root
+        # Returns: (float) seconds past the end time it finished, 0.0 if it was in time
+        if self.finished_time is None:
+            self.finished_time = time.time()
+            if self.end_time is not None and self.finished_time > self.end_time:
+                self.overshoot = self.finished_time - self.end_time
+                if self.overshoot > self.overshoot_tolerance:
+                    self.get_root().overshoots.append((self.get_path(), round(self.overshoot, 3)))
+        return self.overshoot
+
+    def get_root(self):
+        # Purpose: Returns the top of the tree
+        deadline = self
+        while deadline.parent is not None:
+            deadline = deadline.parent
+        return deadline
+
+    def report(self):
+        # Purpose: Returns a dict summary, suitable for bannerizing
+        end = self.finished_time or time.time()
+        return {
+            'name': self.get_path(),
+            'budget': None if self.end_time is None else round(self.end_time - self.start_time, 3),
+            'used': round(end - self.start_time, 3),
+            'overshoot': round(self.overshoot, 3),
+            'overshoots below': list(self.overshoots),
+        }
@@ -0,0 +1,64 @@
+# File: swadl_dom_epoch.py
+# Purpose: Tracks whether the page's DOM has changed. A MutationObserver injected into the page
+#          counts mutations, and reading that count back is one small script call. While the
+#          count hasn't moved, element lists, statuses and text harvests read earlier are still
+#          good, so the controls can skip the finds and the per-element reads that would have
+#          told them the same thing.
+# Notes: The observer sees DOM changes (nodes, attributes, text). It can't see changes that are
+#        pure CSS, such as :hover rules, media queries or animations that hide or show something
+#        without touching the DOM. Pages that work that way should leave tracking off.
+
+import threading
+
+from SWADL.engine.swadl_scripts import READ_DOM_EPOCH
+
+
+class SWADLDomEpoch(object):
+    # Purpose: Reads epoch tokens from the page
+    # Usage:
+    #       tracker = SWADLDomEpoch()
+    #       token = tracker.read(driver)
+    #       ... later ...
+    #       if token is not None and tracker.read(driver) == token: nothing has changed
+
+    def __init__(self):
+        # Purpose: Set up the counters
+        self.last_token = None
+        self.reads = 0
+        self.installs = 0
+        self.failures = 0
+        # parallel validation reads the epoch from several threads
+        self.lock = threading.Lock()
+
+    def read(self, driver):
+        # Purpose: Returns the current epoch token, a (page id, mutation count) tuple
+        # Returns: the token, or None if the page couldn't be watched. None never matches
+        #          anything, so callers fall back to asking the browser as they always did.
+        try:
+            token = driver.execute_script(READ_DOM_EPOCH)
+        except Exception:
+            # mid-navigation, an alert up, and so on. Just treat it as unknown.
+            token = None
+        token = tuple(token) if token else None
+        with self.lock:
+            self.reads += 1
+            if token is None:
+                self.failures += 1
+            elif self.last_token is None or self.last_token[0] != token[0]:
+                self.installs += 1
+            self.last_token = token
+        return token
+
+    @staticmethod
+    def unchanged(recorded, current):
+        # Purpose: Returns whether two tokens say the DOM is the same
+        return recorded is not None and recorded == current
+
+    def stats(self):
+        # Purpose: Returns the counters as a dict, suitable for bannerizing
+        return {
+            'reads': self.reads,
+            'observers installed': self.installs,
+            'failed reads': self.failures,
+            'last token': self.last_token,
+        }
@@ -0,0 +1,95 @@
+# File: swadl_driver.py
+# Purpose: The importable driver, without a browser until one is needed. cfgdict[DRIVER] is a
+#          SWADLDriver, which stands in for the WebDriver: the browser is started the first time
+#          anything is asked of it (driver.get(url), driver.find_elements(...)), or explicitly
+#          with start(). Importing SWADL, collecting tests or unit testing pure logic never waits
+#          on a browser.
+# Notes: Names starting with _ are never passed through, so copy, pickle and the like can look at
+#        the stand-in without starting a browser. Attributes set on it are set on the driver.
+#        A session started elsewhere (eg by the session pool, see swadl_session_pool.py) can be
+#        attached in place of its own, and detached again, without anything that holds the
+#        stand-in noticing.
+
+import threading
+
+
+class SWADLDriver(object):
+    # Purpose: Starts the real WebDriver on first use, and passes everything through to it
+    # Usage:
+    #       driver = SWADLDriver(creator=webdriver.Chrome, name='chrome')
+    #       driver.get(url)      # starts the browser, then navigates
+    #       driver.start()       # or start it up front
+    #       driver.stop()        # quit the browser. The next use starts a new one.
+
+    def __init__(self, creator, name=None):
+        # Purpose: Remember how to make the driver
+        # Inputs: - creator (callable) returns a new WebDriver
+        #         - name (str) the browser, for reporting
+        self.__dict__['_creator'] = creator
+        self.__dict__['_name'] = name
+        self.__dict__['_driver'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def start(self):
+        # Purpose: Start the browser, if it isn't already running
+        # Returns: the WebDriver
+        driver = self._driver
+        if driver is None:
+            with self._lock:
+                if self._driver is None:
+                    self.__dict__['_driver'] = self.create()
+                driver = self._driver
+        return driver
+
+    def stop(self):
+        # Purpose: Quit the browser, if it was started
+        driver = self.detach()
+        if driver is not None:
+            driver.quit()
+
+    def create(self):
+        # Purpose: Start a new browser, without attaching it
+        # Returns: the WebDriver
+        try:
+            return self._creator()
+        except Exception as e:
+            raise Exception(f"{e}\nPerhaps {self._name} is not yet supported by the framework?")
+
+    def attach(self, driver):
+        # Purpose: Pass everything through to driver from now on
+        # Returns: the driver it replaces, or None. That one isn't quit.
+        with self._lock:
+            replaced = self._driver
+            self.__dict__['_driver'] = driver
+        return replaced if replaced is not driver else None
+
+    def detach(self):
+        # Purpose: Let go of the driver, without quitting it. The next use starts a new one.
+        # Returns: the driver, or None
+        with self._lock:
+            driver = self._driver
+            self.__dict__['_driver'] = None
+        return driver
+
+    @property
+    def started(self):
+        # Purpose: Whether the browser is running
+        return self._driver is not None
+
+    def get_name(self):
+        # Purpose: Names the driver for reporting (see bannerizer.py) without starting it
+        return f"{self._name} driver ({'started' if self.started else 'not started'})"
+
+    def __getattr__(self, item):
+        # only called for what the stand-in doesn't have itself
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return getattr(self.start(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self.start(), key, value)
+
+    def __repr__(self):
+        if self._driver is None:
+            return f"<SWADLDriver {self._name} (not started)>"
+        return f"<SWADLDriver {self._driver!r}>"
@@ -0,0 +1,193 @@
+# File: swadl_local_driver.py
+# Purpose: A browser that isn't one. SWADLLocalDriver answers the WebDriver calls the engine makes
+#          about the session itself (windows, cookies, storage, navigation, quit) from plain
+#          Python state, so the session pool, and anything else that manages sessions rather than
+#          pages, can be exercised offline with SELENIUM_BROWSER=local.
+# Notes: There is no DOM. find_elements() finds nothing, and execute_script() only knows the
+#        session scripts in swadl_scripts.py. WAIT_FOR_PAGE_READY answers once load_time seconds
+#        have passed since the last get(), as a page that took that long would. crash() makes
+#        every call fail from then on, as a browser that has died would.
+
+import itertools
+import time
+import uuid
+
+from SWADL.engine.swadl_constants import BLANK_PAGE
+from SWADL.engine.swadl_scripts import CLEAR_STORAGE
+from SWADL.engine.swadl_scripts import READ_HEAP_SIZE
+from SWADL.engine.swadl_scripts import WAIT_FOR_PAGE_READY
+
+
+class SWADLLocalDriverError(Exception):
+    pass
+
+
+class SWADLLocalSwitchTo(object):
+    # Purpose: driver.switch_to, for windows only
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        # Purpose: Make a window the current one
+        self.driver.check()
+        if handle not in self.driver.windows:
+            raise SWADLLocalDriverError(f"no such window: {handle}")
+        self.driver.current_window_handle = handle
+
+
+class SWADLLocalDriver(object):
+    # Purpose: Stands in for a WebDriver session, without a browser
+    # Usage:
+    #       driver = SWADLLocalDriver()
+    #       driver.get('https://example.com/')
+    #       driver.add_cookie({'name': 'session', 'value': '1'})
+    #       driver.open_window('https://example.com/popup')
+    #       driver.heap_size = 300 * 1024 * 1024
+
+    _handles = itertools.count(1)
+
+    def __init__(self, heap_size=10 * 1024 * 1024, heap_growth=0, load_time=0.0):
+        # Purpose: Start a session with one blank window
+        # Inputs: - heap_size (int/None) bytes READ_HEAP_SIZE reports. None is a browser that
+        #           doesn't report it
+        #         - heap_growth (int) bytes the heap grows with each get(), to imitate a leak
+        #         - load_time (float) seconds a page takes to be ready after get()
+        self.session_id = uuid.uuid4().hex
+        self.load_time = load_time
+        self.ready_time = 0.0
+        self.script_timeout = 30.0
+        self.maximized = 0
+        self.name = 'local'
+        self.heap_size = heap_size
+        self.heap_growth = heap_growth
+        self.windows = {}
+        self.cookies = {}
+        self.local_storage = {}
+        self.session_storage = {}
+        self.commands = 0
+        self.alive = True
+        self.switch_to = SWADLLocalSwitchTo(self)
+        self.current_window_handle = self.open_window()
+
+    def __repr__(self):
+        return f'<SWADLLocalDriver (session="{self.session_id}")>'
+
+    def check(self):
+        # Purpose: Count the command, and fail it if the session is gone, as a real one would
+        if not self.alive:
+            raise SWADLLocalDriverError(f"invalid session id: {self.session_id}")
+        self.commands += 1
+
+    def open_window(self, url=BLANK_PAGE):
+        # Purpose: Open another window, as a popup or target=_blank link would
+        # Returns: its handle. The current window doesn't change.
+        self.check()
+        handle = f'local-window-{next(self._handles)}'
+        self.windows[handle] = url
+        return handle
+
+    def crash(self):
+        # Purpose: From now on, every call fails, as it would if the browser had died
+        self.alive = False
+
+    @property
+    def origin(self):
+        # Purpose: The scheme and host of the current page, which is what cookies and storage are
+        #          kept by
+        return '/'.join(self.current_url.split('/')[:3])
+
+    @property
+    def current_url(self):
+        self.check()
+        return self.windows[self.current_window_handle]
+
+    @property
+    def title(self):
+        self.check()
+        return ''
+
+    @property
+    def window_handles(self):
+        self.check()
+        return list(self.windows)
+
+    def get(self, url):
+        # Purpose: "Navigate" the current window
+        self.check()
+        self.windows[self.current_window_handle] = url
+        self.ready_time = time.time() + self.load_time
+        if self.heap_size is not None:
+            self.heap_size += self.heap_growth
+
+    def close(self):
+        # Purpose: Close the current window. As with WebDriver, there's no current window until
+        #          switch_to.window() picks one.
+        self.check()
+        del self.windows[self.current_window_handle]
+        self.current_window_handle = None
+
+    def quit(self):
+        # Purpose: End the session
+        self.windows.clear()
+        self.alive = False
+
+    def add_cookie(self, cookie):
+        # Purpose: Set a cookie on the current origin
+        self.check()
+        self.cookies.setdefault(self.origin, {})[cookie['name']] = dict(cookie)
+
+    def get_cookies(self):
+        # Purpose: The current origin's cookies
+        self.check()
+        return list(self.cookies.get(self.origin, {}).values())
+
+    def delete_all_cookies(self):
+        # Purpose: As with WebDriver, only the current origin's cookies
+        self.check()
+        self.cookies.pop(self.origin, None)
+
+    def execute_script(self, script, *args):
+        # Purpose: Run one of the session scripts in swadl_scripts.py
+        self.check()
+        if script == CLEAR_STORAGE:
+            self.local_storage.pop(self.origin, None)
+            self.session_storage.pop(self.origin, None)
+            return True
+        if script == READ_HEAP_SIZE:
+            return self.heap_size
+        raise SWADLLocalDriverError("the local driver only runs SWADL's session scripts")
+
+    def execute_async_script(self, script, *args):
+        # Purpose: Answer WAIT_FOR_PAGE_READY once the page has had its load_time
+        self.check()
+        if script != WAIT_FOR_PAGE_READY:
+            raise SWADLLocalDriverError("the local driver only waits for pages to be ready")
+        timeout = args[3] / 1000
+        if timeout + 0.001 > self.script_timeout:
+            raise SWADLLocalDriverError(f"script timeout after {self.script_timeout}s")
+        wait = min(max(self.ready_time - time.time(), 0.0), timeout)
+        time.sleep(wait)
+        ready = time.time() >= self.ready_time
+        return {
+            'ready': ready, 'ready_state': 'complete' if ready else 'loading',
+            'document_ready': ready, 'network_idle': ready, 'layout_stable': ready,
+            'elapsed': wait, 'checks': 1,
+        }
+
+    def set_script_timeout(self, seconds):
+        self.check()
+        self.script_timeout = seconds
+
+    def maximize_window(self):
+        self.check()
+        self.maximized += 1
+
+    def find_elements(self, by=None, value=None):
+        # Purpose: There's no page, so nothing is ever found
+        self.check()
+        return []
+
+    def find_element(self, by=None, value=None):
+        self.check()
+        raise SWADLLocalDriverError(f"no such element: {value}")
@@ -0,0 +1,345 @@
+# File: swadl_looper.py
+# Purpose: The looper, which makes any test a data set test. It runs a piece of a test once per
+#          row of a data set (see swadl_data_set.py), with the row's values in test_data and the
+#          substitution sources, and reports every row as its own subTest, so one bad row fails
+#          on its own rather than stopping the rest.
+# Notes: Rows are read as they're needed, so a data set of tens of thousands of rows is never
+#        held in memory. Rows run one after another by default. With parallel=N they run N at a
+#        time, each on its own thread, with its own browser session from the session pool
+#        (swadl_session_pool.py) and its own cfgdict scope (session_scope() in swadl_cfg.py), so
+#        the function has to build the flows and sections it uses itself. Across processes, the
+#        runner's --data-shards (swadl_runner.py) gives each worker its own shard of the rows.
+#        Each row's outcome goes to the result log, and to the result stream if there is one, as
+#        a record of type 'row'.
+
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_cfg import session_scope
+from SWADL.engine.swadl_constants import DATA_ROW_NUMBER
+from SWADL.engine.swadl_constants import DEADLINE
+from SWADL.engine.swadl_constants import RESULT_LOG
+from SWADL.engine.swadl_constants import SUBSTITUTION_SOURCES
+from SWADL.engine.swadl_constants import TEST_DATA
+from SWADL.engine.swadl_constants import TEST_OBJECT
+from SWADL.engine.swadl_session_pool import get_session_pool
+
+
+class SWADLDataRow(object):
+    # Purpose: Stands in for the test, for a row running on its own thread, so the failures it
+    #          accumulates are its own
+
+    def __init__(self, test, number, values):
+        self.test = test
+        self.number = number
+        self.values = values
+        self.accumulated_failures = []
+
+    def get_name(self):
+        return f"{self.test.get_name()} row {self.number}"
+
+
+class SWADLRowOutcome(object):
+    # Purpose: What happened when a row ran, to be reported on the test's own thread
+
+    def __init__(self, number, values):
+        self.number = number
+        self.values = values
+        self.error = None
+        self.failures = []
+        self.elapsed = 0.0
+
+
+class SWADLLooper(object):
+    # Purpose: Runs a function once per row of a data set, for a test
+    # Usage:
+    #       SWADLLooper(test, SWADLDataSet('users.csv')).run(lambda row: flows.log_in())
+    #       or, from the test, self.run_data_set(self.log_in_as_row, 'users.csv')
+
+    def __init__(self, test, data_set, into=(TEST_DATA, SUBSTITUTION_SOURCES), parallel=0):
+        # Inputs: - test (SWADLTest) the test the rows belong to
+        #         - data_set (iterable) of (number, row), eg a SWADLDataSet
+        #         - into (tuple) where each row's values go: TEST_DATA, SUBSTITUTION_SOURCES, both
+        #         - parallel (int) rows to run at once. 0 or 1 runs them one at a time, on the
+        #           test's own driver
+        self.test = test
+        self.data_set = data_set
+        self.into = into
+        self.parallel = parallel
+        self.totals = {'passed': 0, 'failed': 0}
+        self.name = getattr(data_set, 'get_name', lambda: 'data set')()
+
+    def run(self, function):
+        # Purpose: Run function(row) for every row
+        # Returns: {'passed': rows, 'failed': rows}
+        if self.parallel and self.parallel > 1:
+            self._run_parallel(function)
+        else:
+            self._run_serial(function)
+        return self.totals
+
+    @staticmethod
+    def _call(function, outcome, holder):
+        # Purpose: Run one row, and note how it went, without letting a failure out
+        started = time.perf_counter()
+        before = len(holder.accumulated_failures)
+        try:
+            function(outcome.values)
+        except Exception as e:
+            outcome.error = e
+        outcome.elapsed = time.perf_counter() - started
+        outcome.failures = holder.accumulated_failures[before:]
+        del holder.accumulated_failures[before:]
+        return outcome
+
+    def _run_serial(self, function):
+        # Purpose: Each row in turn, on the test's own driver and test_data
+        test = self.test
+        previous = ()
+        for number, values in self.data_set:
+            if TEST_DATA in self.into:
+                for key in previous:
+                    test.test_data.pop(key, None)
+                test.test_data.update(values)
+                test.test_data[DATA_ROW_NUMBER] = number
+                previous = tuple(values)
+            if SUBSTITUTION_SOURCES in self.into:
+                test.data_row.clear()
+                test.data_row.update(values)
+            self._report(self._call(function, SWADLRowOutcome(number, values), test))
+
+    def _run_row_in_session(self, function, number, values, pool):
+        # Purpose: One row, on a thread of its own, in a session of its own
+        # Notes: A session that can't be had, or a scope that can't be set up or torn down, fails
+        #        just this row, like an error in the row itself would
+        outcome = SWADLRowOutcome(number, values)
+        holder = SWADLDataRow(self.test, number, values)
+        started = time.perf_counter()
+        try:
+            session = pool.acquire()
+        except Exception as e:
+            outcome.error = e
+            outcome.elapsed = time.perf_counter() - started
+            return outcome
+        try:
+            scoped = {TEST_OBJECT: holder}
+            if self.test.deadline is not None:
+                scoped[DEADLINE] = self.test.deadline.child(name=f'row {number}')
+            if SUBSTITUTION_SOURCES in self.into:
+                sources = cfgdict.get(SUBSTITUTION_SOURCES) or []
+                scoped[SUBSTITUTION_SOURCES] = list(sources) + [values]
+            with session_scope(driver=session.driver, test_name=holder.get_name(),
+                               values=scoped) as scope:
+                test_data = scope[TEST_DATA]
+                test_data[TEST_OBJECT] = holder
+                if TEST_DATA in self.into:
+                    test_data.update(values)
+                    test_data[DATA_ROW_NUMBER] = number
+                self._call(function, outcome, holder)
+        except Exception as e:
+            outcome.error = outcome.error or e
+            outcome.elapsed = outcome.elapsed or time.perf_counter() - started
+        finally:
+            pool.release(session)
+        return outcome
+
+    def _run_parallel(self, function):
+        # Purpose: self.parallel rows at a time. Only a few more rows than that are read ahead.
+        pool = get_session_pool(minimum=self.parallel + (self.test.session is not None))
+        executor = ThreadPoolExecutor(
+            max_workers=self.parallel, thread_name_prefix=f'{self.test.name} rows'
+        )
+        running = set()
+        try:
+            for number, values in self.data_set:
+                running.add(
+                    executor.submit(self._run_row_in_session, function, number, values, pool)
+                )
+                if len(running) >= self.parallel * 2:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    self._report_done(done)
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                self._report_done(done)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _report_done(self, done):
+        # Purpose: Report the rows that have finished, in row order
+        for outcome in sorted((future.result() for future in done), key=lambda item: item.number):
+            self._report(outcome)
+
+    def _report(self, outcome):
+        # Purpose: Report one row, as a subTest of the test, on the test's own thread
+        test = self.test
+        passed = outcome.error is None and not outcome.failures
+        self.totals['passed' if passed else 'failed'] += 1
+        comments = ''
+        if outcome.error is not None:
+            comments = ''.join(traceback.format_exception_only(type(outcome.error), outcome.error))
+        elif outcome.failures:
+            comments = f"{len(outcome.failures)} failed validations or assertions"
+        message = (
+            f"{self.name} row {outcome.number} of {test.get_name()}: "
+            f"{'passed' if passed else 'FAILED'} in {outcome.elapsed:.3f}s"
+        )
+        if RESULT_LOG in cfgdict:
+            cfgdict[RESULT_LOG].add(message)
+        test.record_result(
+            type='row',
+            selector=None,
+            validation=self.name,
+            expected=outcome.number,
+            result=passed,
+            elapsed=outcome.elapsed,
+            comments=comments.strip(),
+        )
+        with test.subTest(row=outcome.number):
+            if outcome.error is not None:
+                raise outcome.error
+            if outcome.failures:
+                # the failures were reported as they happened, this makes the row fail
+                raise test.failureException(f"{message}, with {comments}")
+
+
+class TestSWADLLooper:
+    # Purpose: Unit tests for the looper, run from a SWADLTest on the offline local driver.
+    #          Intended for pytest
+
+    @staticmethod
+    def run_test(tmp_path, monkeypatch, test_method):
+        # Purpose: Runs test_method as a SWADLTest, with a three row data set of its own
+        # Returns: (the test, its unittest result)
+        import unittest
+        from SWADL.engine.swadl_base_test import SWADLTest
+        from SWADL.engine.swadl_constants import SELENIUM_BROWSER
+        from SWADL.engine.swadl_constants import SESSION_POOL
+        from SWADL.engine.swadl_constants import SWADL_SESSION_POOL
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setitem(cfgdict, SELENIUM_BROWSER, 'local')
+        monkeypatch.setitem(cfgdict, SWADL_SESSION_POOL, 0)
+        monkeypatch.setitem(cfgdict, SESSION_POOL, None)
+        (tmp_path / 'users.jsonl').write_text(
+            '{"user": "ann"}\n{"user": "bob"}\n{"user": "cy"}\n'
+        )
+
+        class TestRows(SWADLTest):
+            test_rows = test_method
+
+        test = TestRows('test_rows')
+        result = unittest.TestResult()
+        try:
+            test.run(result)
+        finally:
+            if cfgdict.get(SESSION_POOL) is not None:
+                cfgdict[SESSION_POOL].close()
+        return test, result
+
+    @staticmethod
+    def failed_rows(result):
+        # Purpose: The rows that failed, in the order they were reported
+        return [failed.params['row'] for failed, _ in result.failures + result.errors]
+
+    def test_serial(self, tmp_path, monkeypatch):
+        # Purpose: Rows run in order on the test's own driver, and each is reported on its own
+        seen = []
+
+        def test_rows(test):
+            def row(values):
+                seen.append((test.test_data[DATA_ROW_NUMBER], values['user'],
+                             test.resolve_substitutions('{user}')))
+                if values['user'] == 'bob':
+                    raise ValueError('bob is bad')
+                test.expect_true(exper=values['user'] != 'cy')
+            test.totals = test.run_data_set(row, 'users.jsonl')
+
+        test, result = self.run_test(tmp_path, monkeypatch, test_rows)
+        assert seen == [(1, 'ann', 'ann'), (2, 'bob', 'bob'), (3, 'cy', 'cy')]
+        assert test.totals == {'passed': 1, 'failed': 2}
+        assert [failed.params['row'] for failed, _ in result.errors] == [2]
+        assert [failed.params['row'] for failed, _ in result.failures] == [3]
+        assert test.accumulated_failures == []
+
+    def test_parallel(self, tmp_path, monkeypatch):
+        # Purpose: Rows run at once, each in a session and scope of its own, and are still
+        #          reported in row order
+        import threading
+        from SWADL.engine.swadl_constants import DRIVER
+        seen = {}
+        barrier = threading.Barrier(2, timeout=5)
+
+        def test_rows(test):
+            def row(values):
+                number = cfgdict[TEST_DATA][DATA_ROW_NUMBER]
+                if number < 3:
+                    barrier.wait()  # rows 1 and 2 are running at the same time
+                seen[number] = (values['user'], cfgdict[TEST_DATA]['user'], id(cfgdict[DRIVER]))
+                assert values['user'] != 'ann', 'ann is bad'
+            test.totals = test.run_data_set(row, 'users.jsonl', parallel=2)
+
+        test, result = self.run_test(tmp_path, monkeypatch, test_rows)
+        assert sorted(seen) == [1, 2, 3]
+        assert [seen[n][:2] for n in (1, 2, 3)] == [('ann', 'ann'), ('bob', 'bob'), ('cy', 'cy')]
+        assert seen[1][2] != seen[2][2]
+        assert id(test.driver) not in {seen[n][2] for n in seen}
+        assert test.totals == {'passed': 2, 'failed': 1}
+        assert self.failed_rows(result) == [1]
+
+    def test_parallel_result_store(self, tmp_path, monkeypatch):
+        # Purpose: With SWADL_RESULT_STORE, each row's store spills to the shared file without
+        #          removing the other rows' records
+        import sqlite3
+        from SWADL.engine.swadl_base import SWADLBase
+        from SWADL.engine.swadl_constants import SWADL_RESULT_STORE
+        from SWADL.engine.swadl_constants import SWADL_RESULT_STORE_FILE
+        from SWADL.engine.swadl_constants import SWADL_RESULT_STORE_WINDOW
+        file_name = str(tmp_path / 'rows.sqlite')
+        monkeypatch.setitem(cfgdict, SWADL_RESULT_STORE, True)
+        monkeypatch.setitem(cfgdict, SWADL_RESULT_STORE_FILE, file_name)
+        monkeypatch.setitem(cfgdict, SWADL_RESULT_STORE_WINDOW, 1)
+
+        def test_rows(test):
+            def row(values):
+                checker = SWADLBase(name=f"check {values['user']}")
+                for _ in range(3):
+                    checker.expect_true(exper=True)
+            test.totals = test.run_data_set(row, 'users.jsonl', parallel=3)
+
+        test, result = self.run_test(tmp_path, monkeypatch, test_rows)
+        assert test.totals == {'passed': 3, 'failed': 0}
+        with sqlite3.connect(file_name) as connection:
+            owners = connection.execute(
+                "SELECT owner, COUNT(*) FROM results GROUP BY owner"
+            ).fetchall()
+        assert sorted(count for _, count in owners) == [2, 2, 2]
+
+    def test_parallel_session_error(self, tmp_path, monkeypatch):
+        # Purpose: A row that can't get a session fails on its own, and the others still run
+        import threading
+        from SWADL.engine.swadl_session_pool import SWADLSessionPool
+        acquire = SWADLSessionPool.acquire
+        refused = []
+
+        def flaky_acquire(pool, *args, **kwargs):
+            # refuse the first row to ask, on its row thread
+            if 'rows' in threading.current_thread().name and not refused:
+                refused.append(threading.current_thread().name)
+                raise RuntimeError('no browser for you')
+            return acquire(pool, *args, **kwargs)
+        monkeypatch.setattr(SWADLSessionPool, 'acquire', flaky_acquire)
+        ran = []
+
+        def test_rows(test):
+            def row(values):
+                ran.append(values['user'])
+            test.totals = test.run_data_set(row, 'users.jsonl', parallel=2)
+
+        test, result = self.run_test(tmp_path, monkeypatch, test_rows)
+        assert refused and len(ran) == 2
+        assert test.totals == {'passed': 2, 'failed': 1}
+        assert len(result.errors) == 1 and not result.failures
+        assert 'no browser for you' in result.errors[0][1]
@@ -4,6 +4,12 @@
 import os
 
 from SWADL.engine.swadl_base import SWADLBase
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT_INTERVAL
+from SWADL.engine.swadl_constants import SWADL_BUFFERED_OUTPUT_LINES
+from SWADL.engine.swadl_constants import SWADL_OUTPUT_DIR
+from SWADL.engine.swadl_output_writer import SWADLOutputWriter
 
 
 class Output(SWADLBase):
@@ -18,14 +24,35 @@ class Output(SWADLBase):
     # Purpose: To determine if we're shutting down and we should ignore anything else
     writing_done = False
 
-    def __init__(self, file_name, comment='', name=None):
+    # Datum: writer
+    # Purpose: The background writer when buffered, otherwise None
+    writer = None
+
+    def __init__(self, file_name, comment='', name=None, buffered=None):
         # Purpose: Store the filename
         # Inputs: - str:file_name
+        #         - buffered (bool/None) write through a background thread (SWADLOutputWriter)
+        #           rather than opening the file on every add(). None means use
+        #           cfgdict[SWADL_BUFFERED_OUTPUT]
+        # Notes: A relative file_name goes in cfgdict[SWADL_OUTPUT_DIR], if that's set, so each
+        #        worker of a parallel run (see swadl_runner.py) keeps its own files
         self.name = name
         SWADLBase.__init__(self, file_name=file_name, comment=comment, name=name)
+        output_dir = cfgdict[SWADL_OUTPUT_DIR]
+        if output_dir and not os.path.isabs(file_name):
+            os.makedirs(output_dir, exist_ok=True)
+            file_name = os.path.join(output_dir, file_name)
         self.file_name = file_name
         if os.path.exists(self.file_name):
             os.remove(self.file_name)
+        if buffered is None:
+            buffered = cfgdict[SWADL_BUFFERED_OUTPUT]
+        if buffered:
+            self.writer = SWADLOutputWriter(
+                file_name,
+                flush_lines=cfgdict[SWADL_BUFFERED_OUTPUT_LINES],
+                flush_interval=cfgdict[SWADL_BUFFERED_OUTPUT_INTERVAL],
+            )
         if not self.writing_started:
             self.writing_started = True
             self.add(f"Started {file_name} {comment}")
@@ -36,15 +63,25 @@ class Output(SWADLBase):
         if not self.writing_done:
             if not isinstance(stuff_to_add, (list, tuple)):
                 stuff_to_add = [stuff_to_add]
+            if self.writer is not None:
+                self.writer.put(list(stuff_to_add))
+                return
             with open(self.file_name, "a", encoding='utf-8') as handle:
                 for line in stuff_to_add:
                     handle.write(f'{self.get_timestamp()}::{line}\n')
 
+    def flush(self):
+        # Purpose: Returns once everything added so far is in the file
+        if self.writer is not None:
+            self.writer.flush()
+
     def close(self, comment=''):
         # Purpose: Write and end point into the log
         if not self.writing_done:
             self.add(f"Done test_failures.log {comment}")
             self.writing_done = True
+            if self.writer is not None:
+                self.writer.close()
 
     def __del__(self):
         # Purpose: Close the log
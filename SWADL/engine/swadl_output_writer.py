@@ -0,0 +1,197 @@
+# File: swadl_output_writer.py
+# Purpose: Background writing for the text logs (swadl_output.Output) and the JSONL result stream
+#          (swadl_result_stream.py), so the test never waits on a file.
+
+import atexit
+import datetime
+import queue
+import threading
+import time
+import weakref
+
+# Purpose: every writer with a thread still running, so they can all be flushed at exit
+_open_writers = weakref.WeakSet()
+
+
+def _close_open_writers():
+    # Purpose: Write out whatever is still queued when the interpreter exits
+    for writer in list(_open_writers):
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_open_writers)
+
+
+class SWADLOutputWriter(object):
+    # Purpose: The background thread behind a buffered Output or result stream. Lines are queued
+    #          with the time they were added, and written (and timestamped) in batches, so the
+    #          test never waits on the file.
+    # Notes: A batch is written once it has flush_lines lines, once its oldest line is
+    #        flush_interval seconds old, on flush(), and on close(). Anything still queued when
+    #        the interpreter exits is written by the atexit hook above.
+
+    def __init__(self, file_name, flush_lines=100, flush_interval=0.5, stamp=True):
+        # Purpose: Start the writer thread
+        # Inputs: - file_name (str) the file to append to
+        #         - flush_lines (int) most lines to hold before writing
+        #         - flush_interval (float) most seconds to hold a line before writing
+        #         - stamp (bool) prefix each line with its timestamp, as Output.add() does
+        self.file_name = file_name
+        self.stamp = stamp
+        self.flush_lines = max(int(flush_lines), 1)
+        self.flush_interval = flush_interval
+        self.closed = False
+        self.error = None
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(
+            target=self._run, name=f'swadl output {file_name}', daemon=True
+        )
+        self.thread.start()
+        _open_writers.add(self)
+
+    def put(self, lines):
+        # Purpose: Queue lines to be written, stamped with the time now
+        # Notes: If the thread has gone (closed, or died), they're written straight to the file
+        if self.thread.is_alive():
+            self.queue.put((time.time(), lines))
+        else:
+            with open(self.file_name, "a", encoding='utf-8', errors='backslashreplace') as handle:
+                handle.writelines(self._format([(time.time(), lines)]))
+
+    def flush(self):
+        # Purpose: Returns once everything queued so far is in the file
+        # Notes: Raises the error, if writing has failed since it was last raised
+        if self.thread.is_alive():
+            written = threading.Event()
+            self.queue.put(written)
+            # never wait on a thread that isn't there to answer
+            while not written.wait(0.1):
+                if not self.thread.is_alive():
+                    break
+        self._raise_error()
+
+    def close(self):
+        # Purpose: Write everything still queued, and stop the thread
+        # Notes: Raises the error, if writing has failed since it was last raised
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+            self.thread.join()
+            _open_writers.discard(self)
+        self._raise_error()
+
+    def _raise_error(self):
+        # Purpose: Raise the error the thread ran into, once
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def _run(self):
+        # Purpose: The writer thread. Collects queued lines, and writes them out in batches.
+        # Notes: A failure to write is kept for flush() or close() to raise, and the thread
+        #        carries on, so flush() always gets its answer.
+        batch = []
+        oldest = None
+        handle = self._write(None, [])
+        try:
+            while True:
+                timeout = None if oldest is None else max(
+                    oldest + self.flush_interval - time.time(), 0
+                )
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = False
+                if isinstance(item, tuple):
+                    batch.append(item)
+                    oldest = oldest or item[0]
+                    if len(batch) < self.flush_lines and time.time() - oldest < self.flush_interval:
+                        continue
+                if batch:
+                    handle = self._write(handle, batch)
+                    batch = []
+                    oldest = None
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is None:
+                    return
+        finally:
+            if handle is not None:
+                handle.close()
+
+    def _write(self, handle, batch):
+        # Purpose: Write a batch, opening the file if it isn't open yet
+        # Returns: the open file, or None if it couldn't be opened
+        try:
+            if handle is None:
+                handle = open(self.file_name, "a", encoding='utf-8', errors='backslashreplace')
+            handle.writelines(self._format(batch))
+            handle.flush()
+        except Exception as e:
+            self.error = e
+        return handle
+
+    def _format(self, batch):
+        # Purpose: The lines of a batch, as Output.add() writes them
+        for added, lines in batch:
+            if not self.stamp:
+                for line in lines:
+                    yield f'{line}\n'
+                continue
+            # the same format as SWADLBase.get_timestamp()
+            timestamp = datetime.datetime.fromtimestamp(added).strftime("%Y%m%d_%H%M%S.%f")
+            for line in lines:
+                yield f'{timestamp}::{line}\n'
+
+
+class TestSWADLOutputWriter:
+    # Purpose: Unit tests for SWADLOutputWriter. Intended for pytest
+
+    def test_lines_in_order(self, tmp_path):
+        # Purpose: Every line is written, in order, by flush() and close()
+        file_name = str(tmp_path / 'out.log')
+        writer = SWADLOutputWriter(file_name, flush_lines=3, flush_interval=10, stamp=False)
+        writer.put(['one', 'two'])
+        writer.flush()
+        with open(file_name, encoding='utf-8') as handle:
+            assert handle.read() == 'one\ntwo\n'
+        writer.put(['three'])
+        writer.close()
+        with open(file_name, encoding='utf-8') as handle:
+            assert handle.read() == 'one\ntwo\nthree\n'
+
+    def test_unencodable_line(self, tmp_path):
+        # Purpose: A line utf-8 can't encode is escaped, rather than stopping the writer
+        file_name = str(tmp_path / 'out.log')
+        writer = SWADLOutputWriter(file_name, stamp=False)
+        writer.put(['bad \udcff', 'good'])
+        writer.flush()
+        assert writer.thread.is_alive()
+        writer.close()
+        with open(file_name, encoding='utf-8') as handle:
+            assert handle.read() == 'bad \\udcff\ngood\n'
+
+    def test_write_error(self, tmp_path):
+        # Purpose: A file that can't be written makes flush() raise, rather than hang
+        writer = SWADLOutputWriter(str(tmp_path / 'missing' / 'out.log'), stamp=False)
+        writer.put(['lost'])
+        try:
+            writer.flush()
+            assert False, "flush() should have raised the write error"
+        except OSError:
+            pass
+        assert writer.thread.is_alive()
+        writer.close()
+
+    def test_thread_gone(self, tmp_path):
+        # Purpose: With the thread gone, lines are written straight to the file
+        file_name = str(tmp_path / 'out.log')
+        writer = SWADLOutputWriter(file_name, stamp=False)
+        writer.close()
+        writer.put(['late'])
+        writer.flush()
+        with open(file_name, encoding='utf-8') as handle:
+            assert handle.read() == 'late\n'
@@ -0,0 +1,98 @@
+# File: swadl_page_ready.py
+# Purpose: The readiness engine behind SWADLPageSection.load_page(). Rather than sleeping a fixed
+#          time around a page load, it waits in the browser (WAIT_FOR_PAGE_READY) until the
+#          document has loaded, and optionally until the network has gone idle and the layout has
+#          stopped changing, and answers as soon as they all hold. The section's
+#          validate_loaded_queue is then validated with whatever is left of the budget.
+# Notes: It also remembers which sessions have been maximized, so load_page() maximizes a browser
+#        once, rather than on every load. Sessions are told apart by their WebDriver session_id.
+
+import logging
+
+from SWADL.engine.swadl_scripts import WAIT_FOR_PAGE_READY
+
+logger = logging.getLogger(__name__)
+
+
+class SWADLPageReady(object):
+    # Purpose: Runs WAIT_FOR_PAGE_READY, keeping each session's script timeout long enough for it
+    # Usage:
+    #       page_ready = SWADLPageReady()
+    #       status = page_ready.wait(driver, timeout=40, network_idle_ms=500)
+    #       status['ready'], status['elapsed'] ...
+    #       if page_ready.first_maximize(driver):
+    #           driver.maximize_window()
+
+    script_timeout_margin = 5.0
+    # Purpose: Seconds the driver's script timeout is kept beyond the wait's own timeout, so the
+    #          browser always gets to answer before the driver gives up on it.
+
+    minimum_script_timeout = 60.0
+    # Purpose: The least the script timeout is set to, so ordinary waits don't each have to
+    #          raise it again.
+
+    def __init__(self):
+        # Purpose: Set up the per session state and the counters
+        self.script_timeouts = {}
+        self.maximized = set()
+        self.waits = 0
+        self.ready = 0
+        self.failed = 0
+        self.waited = 0.0
+
+    @staticmethod
+    def session_key(driver):
+        # Purpose: Tells sessions apart, including sessions a SWADLDriver has been attached to
+        return getattr(driver, 'session_id', None) or id(driver)
+
+    def _ensure_script_timeout(self, driver, timeout):
+        # Purpose: Raise the session's script timeout if this wait could outlast it
+        key = self.session_key(driver)
+        needed = timeout + self.script_timeout_margin
+        if self.script_timeouts.get(key, 0) < needed:
+            self.script_timeouts[key] = max(needed, self.minimum_script_timeout)
+            driver.set_script_timeout(self.script_timeouts[key])
+
+    def wait(self, driver, timeout, ready_state='complete', network_idle_ms=0,
+             layout_stable_ms=0):
+        # Purpose: Wait in the browser for the current page to be ready
+        # Inputs: - driver - the webdriver to use
+        #         - timeout (float) seconds to wait
+        #         - ready_state (str) 'complete', or 'interactive' to stop at DOMContentLoaded
+        #         - network_idle_ms (int) ms without a request finishing, 0 to not wait for it
+        #         - layout_stable_ms (int) ms without the layout changing, 0 to not wait for it
+        # Returns: the WAIT_FOR_PAGE_READY result (see swadl_scripts.py), or None if the browser
+        #          couldn't run it, in which case the caller has only validate_loaded() to go on
+        timeout = max(timeout or 0, 0)
+        try:
+            self._ensure_script_timeout(driver, timeout)
+            status = driver.execute_async_script(
+                WAIT_FOR_PAGE_READY, ready_state, int(network_idle_ms), int(layout_stable_ms),
+                int(timeout * 1000),
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.debug(f"SWADL page readiness wait failed, falling back on validation: {e}")
+            return None
+        self.waits += 1
+        self.ready += bool(status.get('ready'))
+        self.waited += status.get('elapsed', 0)
+        return status
+
+    def first_maximize(self, driver):
+        # Purpose: Whether this is the session's first maximize. Marks it maximized.
+        key = self.session_key(driver)
+        if key in self.maximized:
+            return False
+        self.maximized.add(key)
+        return True
+
+    def stats(self):
+        # Purpose: Returns the counters as a dict, suitable for bannerizing
+        return {
+            'waits': self.waits,
+            'ready': self.ready,
+            'failed': self.failed,
+            'seconds waited': round(self.waited, 3),
+            'sessions maximized': len(self.maximized),
+        }
@@ -0,0 +1,214 @@
+# File: swadl_parallel.py
+# Purpose: Parallel section wide validation. The read only validations of independent controls
+#          are handed to a small thread pool, all driving the same session, so a page full of
+#          controls waits about as long as its slowest control rather than the sum of them all.
+# Notes: Each control is measured by exactly one worker, so a control's cache is never shared
+#        between threads. Reporting happens afterwards, on the calling thread, in declaration
+#        order, so the logs read just as they would one at a time. VALIDATE_INPUT and
+#        VALIDATE_CLICK change the page, so those run last, one at a time, in order.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_config_dict import run_in_scope
+from SWADL.engine.swadl_constants import SWADL_PARALLEL_WORKERS
+from SWADL.engine.swadl_constants import VALIDATE_ENABLED
+from SWADL.engine.swadl_constants import VALIDATE_EXIST
+from SWADL.engine.swadl_constants import VALIDATE_TEXT
+from SWADL.engine.swadl_constants import VALIDATE_UNIQUE
+from SWADL.engine.swadl_constants import VALIDATE_VISIBLE
+from SWADL.engine.swadl_constants import VALUE
+
+
+class SWADLParallelJob(object):
+    # Purpose: The read only validations of one control, measured on a worker thread
+
+    # which _get_* call answers each validation, and whether it forces a refresh, as the matching
+    # validate_* method does
+    getters = {
+        VALIDATE_ENABLED: ('_get_enabled', False),
+        VALIDATE_EXIST: ('_get_exist', True),
+        VALIDATE_TEXT: ('_get_value', False),
+        VALIDATE_UNIQUE: ('_get_unique', False),
+        VALIDATE_VISIBLE: ('_get_visible', False),
+    }
+
+    def __init__(self, control, validation, parent_deadline, timeout=None):
+        # Purpose: Remember what to measure
+        # Inputs: - control (SWADLControl)
+        #         - validation (dict) of read only VALIDATE_* keys and expected values
+        #         - parent_deadline (SWADLDeadline) the section's budget
+        #         - timeout (float/None) the most this control may take
+        # Notes: The control's own deadline is carved out when measure() starts, so time spent
+        #        queued behind other jobs doesn't come out of it.
+        self.control = control
+        self.validation = validation
+        self.parent_deadline = parent_deadline
+        self.timeout = timeout
+        self.deadline = None
+        self.measurements = []
+
+    @classmethod
+    def prepare(cls, control, item, expected):
+        # Purpose: Work out how to measure one read only validation
+        # Returns: (getter method, force, value to wait for, the start of the measurement dict)
+        getter_name, force = cls.getters[item]
+        measurement = {'validation_name': control.read_only_validations[item]}
+        expected_to_test = expected
+        if item == VALIDATE_TEXT:
+            # as with validate_text(), anything but a string means the control's own value
+            expected = expected if isinstance(expected, str) else None
+            expected_to_test = expected or getattr(control, VALIDATE_TEXT, None)
+            measurement['validation_name'] = VALIDATE_TEXT
+        measurement['expected'] = expected
+        return getattr(control, getter_name), force, expected_to_test, measurement
+
+    @staticmethod
+    def complete(control, item, measurement, expected_to_test, result, elapsed_time):
+        # Purpose: Fill in the rest of a measurement once its wait is over
+        if item == VALIDATE_TEXT and 'comments' not in measurement:
+            measurement['comments'] = (
+                f'expected: "{expected_to_test}", '
+                f'actual: "{control._cache["status"].get(VALUE)}"'
+            )
+        measurement['result'] = result
+        measurement['elapsed_time'] = elapsed_time
+        measurement['polls'] = control.poller.last_polls
+        return measurement
+
+    def measure(self):
+        # Purpose: Run each validation's wait, keeping what _validate() needs to report it.
+        #          Runs on a worker thread, so nothing in here reports or asserts.
+        control = self.control
+        self.deadline = self.parent_deadline.child(timeout=self.timeout, name=control.get_name())
+        for item, expected in self.validation.items():
+            getter, force, expected_to_test, measurement = self.prepare(control, item, expected)
+            with self.deadline.child(name=item) as item_deadline:
+                try:
+                    result, elapsed_time = getter(
+                        end_time=item_deadline.end_time,
+                        expected=expected_to_test,
+                        force=force,
+                        timeout=item_deadline.remaining(),
+                    )
+                except Exception as e:
+                    result = False
+                    elapsed_time = time.time() - item_deadline.start_time
+                    measurement['comments'] = f'{type(e).__name__}: {e}'
+            self.measurements.append(self.complete(
+                control, item, measurement, expected_to_test, result, elapsed_time
+            ))
+        self.deadline.finish()
+        return self
+
+    def report(self, fatal=False, **kwargs):
+        # Purpose: Report the measurements through the control's _validate(), on the caller's
+        #          thread
+        # Returns: (bool) whether they all passed
+        result = True
+        for measurement in self.measurements:
+            result = self.report_one(self.control, measurement, fatal=fatal, **kwargs) and result
+        return result
+
+    @staticmethod
+    def report_one(control, measurement, fatal=False, **kwargs):
+        # Purpose: Report one measurement through the control's _validate()
+        # so the report shows this validation's polls, not the control's last call
+        control.poller.last_polls = measurement.pop('polls')
+        return control._validate(fatal=fatal, **measurement, **kwargs)
+
+
+class SWADLParallelValidation(object):
+    # Purpose: Validates a list of (control, validation_dict) pairs with a thread pool
+    # Usage:
+    #       parallel = SWADLParallelValidation(self, pairs)
+    #       all_good = parallel.run(deadline=deadline, fatal=True)
+
+    def __init__(self, parent, pairs, workers=None):
+        # Purpose: Split the pairs into parallel jobs and serial validations
+        # Inputs: - parent (SWADLPageSection) the section doing the validating
+        #         - pairs (list) of (SWADLControl, validation dict)
+        #         - workers (int/None) pool size, None means cfgdict[SWADL_PARALLEL_WORKERS]
+        self.parent = parent
+        self.workers = workers or cfgdict[SWADL_PARALLEL_WORKERS]
+        self.read_only = {}
+        self.serial = []
+        for control, validation in pairs:
+            validation = control.normalize_validation(validation) or control.validation
+            assert validation, (
+                f"{control.get_name()} was validated in parallel with no validations specified."
+            )
+            for key, expected in validation.items():
+                if expected is None:
+                    continue
+                if key in control.read_only_validations:
+                    # a control listed twice gets one job, so only one thread ever touches it
+                    self.read_only.setdefault(control, {})[key] = expected
+                else:
+                    self.serial.append((control, {key: expected}))
+
+    def run(self, deadline, fatal=False, per_control_timeout=None, **kwargs):
+        # Purpose: Measure the read only validations in parallel, report them in order, then run
+        #          the serial ones
+        # Inputs: - deadline (SWADLDeadline) the budget for the whole list
+        #         - per_control_timeout (float/None) the most any one control may take
+        # Returns: (bool) whether everything validated
+        jobs = [
+            SWADLParallelJob(control, validation, deadline, timeout=per_control_timeout)
+            for control, validation in self.read_only.items()
+        ]
+        result = True
+        if jobs:
+            workers = max(1, min(self.workers, len(jobs)))
+            executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix=f'{self.parent.get_name()} validate'
+            )
+            try:
+                futures = [executor.submit(run_in_scope(job.measure)) for job in jobs]
+                for future in futures:
+                    result = future.result().report(fatal=fatal, **kwargs) and result
+            finally:
+                # after a fatal failure above, don't start the jobs still queued
+                executor.shutdown(wait=True, cancel_futures=True)
+        for control, validation in self.serial:
+            result = control.validate(
+                deadline=deadline,
+                fatal=fatal,
+                timeout=per_control_timeout,
+                validation=validation,
+                **kwargs
+            ) and result
+        return result
+
+
+class TestSWADLParallelJob:
+    # Purpose: Unit tests for SWADLParallelJob. Intended for pytest
+
+    class FakeControl(object):
+        # Purpose: Just enough of a control to be measured
+        read_only_validations = {VALIDATE_EXIST: 'validate_exist'}
+
+        def __init__(self):
+            from SWADL.engine.swadl_poller import SWADLPoller
+            self.poller = SWADLPoller()
+            self.timeouts = []
+
+        def get_name(self):
+            return 'fake'
+
+        def _get_exist(self, end_time=None, expected=None, force=False, timeout=None):
+            self.timeouts.append(timeout)
+            return True, 0.0
+
+    def test_deadline_starts_with_the_job(self):
+        # Purpose: Time spent queued doesn't come out of the control's own timeout
+        from SWADL.engine.swadl_deadline import SWADLDeadline
+        control = self.FakeControl()
+        job = SWADLParallelJob(control, {VALIDATE_EXIST: True}, SWADLDeadline(timeout=60),
+                               timeout=0.5)
+        time.sleep(0.6)
+        job.measure()
+        assert control.timeouts[0] > 0.4
+        assert job.deadline.start_time > job.parent_deadline.start_time + 0.5
+        assert job.measurements[0]['result'] is True
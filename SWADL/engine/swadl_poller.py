@@ -0,0 +1,117 @@
+# File: swadl_poller.py
+# Purpose: Polling schedules for the retry loops in SWADLControl. Rather than spinning on
+#          find_elements as fast as the wire allows, each retry loop asks a schedule to wait
+#          between attempts. The wait starts small and backs off toward a ceiling, so quick
+#          controls are still found quickly, and slow ones don't peg a CPU core.
+
+import random
+import threading
+import time
+
+
+class SWADLPollSchedule(object):
+    # Purpose: The state of one retry loop. Created by SWADLPoller.start(), one per call.
+    # Usage:
+    #       schedule = self.poller.start(end_time)
+    #       while True:
+    #           schedule.tick()
+    #           ... make the attempt, break if it worked ...
+    #           if time.time() > end_time:
+    #               break
+    #           schedule.wait()
+    #       schedule.finish()
+
+    def __init__(self, poller, end_time=None):
+        # Purpose: Remember who to report to, and when to stop sleeping
+        self.poller = poller
+        self.end_time = end_time
+        self.interval = poller.initial_interval
+        self.polls = 0
+        self.slept = 0.0
+
+    def tick(self):
+        # Purpose: Count one attempt
+        self.polls += 1
+
+    def next_interval(self):
+        # Purpose: Returns the wait before the next attempt, and backs the interval off
+        #          toward the ceiling for the one after.
+        interval = self.interval
+        if self.poller.jitter:
+            interval += interval * random.uniform(-self.poller.jitter, self.poller.jitter)
+        self.interval = min(self.interval * self.poller.backoff, self.poller.max_interval)
+        return max(interval, 0.0)
+
+    def wait(self):
+        # Purpose: Sleep until the next attempt. Never sleeps past end_time, so the last
+        #          attempt still happens right at the deadline.
+        interval = self.next_interval()
+        if self.end_time is not None:
+            interval = min(interval, self.end_time - time.time())
+        if interval > 0:
+            time.sleep(interval)
+            self.slept += interval
+
+    def finish(self):
+        # Purpose: Report the poll count for this call back to the poller
+        self.poller.record(self)
+        return self.polls
+
+
+class SWADLPoller(object):
+    # Purpose: Hands out polling schedules, and keeps counters of how many polls each call took.
+    # Notes: This is the pluggable part. SWADLControl.poller_class names the class to use, or a
+    #        control can be handed a poller=SomePoller(...) instance at creation time. Anything
+    #        with a start(end_time) that returns an object with tick(), wait() and finish() will do.
+    #        Set initial_interval=0 and max_interval=0 to get the old tight spin back.
+
+    global_stats = {'calls': 0, 'polls': 0, 'slept': 0.0}
+    # Purpose: Totals across every poller in the process, for the end of run report.
+    global_lock = threading.Lock()
+    # Purpose: Guards global_stats, as parallel validation records from several threads
+
+    def __init__(self, initial_interval=0.05, backoff=1.5, jitter=0.1, max_interval=0.5,
+                 name=None):
+        # Purpose: Set up the schedule parameters
+        # Inputs: - initial_interval (float) seconds to wait after the first failed attempt
+        #         - backoff (float) multiplier applied to the interval after each wait
+        #         - jitter (float) +/- fraction of randomness applied to each wait, so many
+        #           parallel tests don't all poll in lockstep
+        #         - max_interval (float) the ceiling the interval backs off toward
+        #         - name (str) used for reporting
+        self.name = name
+        self.initial_interval = float(initial_interval)
+        self.backoff = float(backoff)
+        self.jitter = float(jitter)
+        self.max_interval = max(float(max_interval), self.initial_interval)
+        self.calls = 0
+        self.total_polls = 0
+        self.last_polls = 0
+        self.max_polls = 0
+
+    def start(self, end_time=None):
+        # Purpose: Returns a fresh schedule for one retry loop
+        return SWADLPollSchedule(self, end_time=end_time)
+
+    def record(self, schedule):
+        # Purpose: Accumulate the counters for a finished schedule
+        self.calls += 1
+        self.total_polls += schedule.polls
+        self.last_polls = schedule.polls
+        self.max_polls = max(self.max_polls, schedule.polls)
+        with self.global_lock:
+            self.global_stats['calls'] += 1
+            self.global_stats['polls'] += schedule.polls
+            self.global_stats['slept'] += schedule.slept
+
+    def stats(self):
+        # Purpose: Returns the counters as a dict, suitable for bannerizing
+        return {
+            'calls': self.calls,
+            'polls': self.total_polls,
+            'last call polls': self.last_polls,
+            'max polls in a call': self.max_polls,
+            'average polls per call': (
+                round(self.total_polls / self.calls, 2) if self.calls else 0
+            ),
+        }
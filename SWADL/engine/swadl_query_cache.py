@@ -0,0 +1,110 @@
+# File: swadl_query_cache.py
+# Purpose: A query cache shared by every control on the current page. Controls that use the same
+#          selector (and only differ by is_text or index) get their raw elements, and the text of
+#          those elements, from one find plus one text harvest, rather than each control doing
+#          its own find_elements and reading every element's .text one round trip at a time.
+# Notes: The cache describes one page state. Anything that can change the page (navigation,
+#        clicks, input) calls bump(), which throws everything away. A retry loop that doesn't
+#        find what it wants calls invalidate() for its selector, so the next poll goes back to
+#        the browser rather than looking at the same cached answer again.
+#        With a DOM epoch tracker (see swadl_dom_epoch.py), entries are stamped with the epoch
+#        they were read in, and stay good for exactly as long as the epoch doesn't move, rather
+#        than for max_age.
+
+import threading
+import time
+
+from SWADL.engine.swadl_constants import CSS_SELECTOR
+from SWADL.engine.swadl_scripts import HARVEST_TEXT
+
+
+class SWADLQueryEntry(object):
+    # Purpose: What the browser said about one selector
+
+    def __init__(self, raw, texts=None, epoch_token=None):
+        # Purpose: Hold the results
+        # Inputs: - raw (list) the WebElements matching the selector
+        #         - texts (list/None) the text of each of those elements, in the same order.
+        #           None if nobody has asked for the text yet.
+        #         - epoch_token (tuple/None) the DOM epoch the results were read in
+        self.raw = raw
+        self.texts = texts
+        self.epoch_token = epoch_token
+        self.created = time.time()
+
+
+class SWADLQueryCache(object):
+    # Purpose: Maps processed selectors to SWADLQueryEntry for the current page state
+    # Usage:
+    #       cache = SWADLQueryCache()
+    #       entry = cache.get(driver, 'span.menu', with_text=True)
+    #       ... entry.raw, entry.texts ...
+    #       cache.bump('clicked the menu')
+
+    def __init__(self, max_age=1.0, dom_epoch=None):
+        # Purpose: Set up an empty cache
+        # Inputs: - max_age (float) seconds an entry is trusted for, even if nothing we know of
+        #           changed the page. Scripts on the page can change it behind our backs.
+        #         - dom_epoch (SWADLDomEpoch/None) if given, decides entry freshness instead of
+        #           max_age
+        self.max_age = float(max_age)
+        self.dom_epoch = dom_epoch
+        self.entries = {}
+        self.epoch = 0
+        self.last_bump_reason = None
+        self.hits = 0
+        self.misses = 0
+        # parallel validation shares one cache between threads
+        self.lock = threading.Lock()
+
+    def bump(self, reason=None):
+        # Purpose: The page may have changed. Forget everything and start a new epoch.
+        with self.lock:
+            self.epoch += 1
+            self.last_bump_reason = reason
+            self.entries.clear()
+            return self.epoch
+
+    def invalidate(self, processed_selector):
+        # Purpose: Forget what we know about one selector
+        self.entries.pop(processed_selector, None)
+
+    def get(self, driver, processed_selector, with_text=False):
+        # Purpose: Returns the entry for a selector, fetching it if it isn't cached (or is too
+        #          old, or we need text and only have elements)
+        # Inputs: - driver - the webdriver to ask
+        #         - processed_selector (str) the CSS selector, substitutions already resolved
+        #         - with_text (bool) whether the caller needs entry.texts
+        entry = self.entries.get(processed_selector)
+        epoch_token = None
+        if self.dom_epoch is not None:
+            epoch_token = self.dom_epoch.read(driver)
+            if entry is not None and not self.dom_epoch.unchanged(entry.epoch_token, epoch_token):
+                entry = None
+        elif entry is not None and time.time() - entry.created > self.max_age:
+            entry = None
+        if entry is not None and (entry.texts is not None or not with_text):
+            with self.lock:
+                self.hits += 1
+            return entry
+        with self.lock:
+            self.misses += 1
+        if with_text:
+            harvest = driver.execute_script(HARVEST_TEXT, processed_selector)
+            entry = SWADLQueryEntry(harvest['raw'], harvest['texts'], epoch_token)
+        else:
+            entry = SWADLQueryEntry(
+                driver.find_elements(CSS_SELECTOR, processed_selector), epoch_token=epoch_token
+            )
+        self.entries[processed_selector] = entry
+        return entry
+
+    def stats(self):
+        # Purpose: Returns the counters as a dict, suitable for bannerizing
+        return {
+            'epoch': self.epoch,
+            'last bump reason': self.last_bump_reason,
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
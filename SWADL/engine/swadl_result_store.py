@@ -0,0 +1,281 @@
+# File: swadl_result_store.py
+# Purpose: A bounded test_data. Every assertion and every control validation files a record in
+#          test_data, so on a long data driven run it grows without limit. The result store keeps
+#          only the most recent validation records in memory, and spills older ones to an append
+#          only SQLite file, where they can still be looked up by key.
+# Notes: Only validation records (keys starting with VALIDATION_RECORD) are ever spilled. Values
+#        that flows and sections put in test_data themselves (SEARCH_KEY, TEST_OBJECT, ...) always
+#        stay in memory, exactly as they are.
+#        A spilled record comes back as a new SWADLDict of plain data: anything that isn't JSON
+#        (a WebElement, a helper function) was stored as its str().
+#        Iterating, len() and dump() only see what's in memory. spilled_items() reads the rest.
+#        Several stores can share a file, eg the test's and one per concurrent session (see
+#        session_scope() in swadl_cfg.py). Each keeps its records under its own owner, and the
+#        file is only replaced by the first store in the process to spill to it.
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+
+from SWADL.engine.swadl_constants import VALIDATION_RECORD
+from SWADL.engine.swadl_dict import SWADLDict
+
+# Purpose: the spill files this process has started afresh, so stores sharing one don't each
+#          replace it
+_started_files = set()
+_started_files_lock = threading.Lock()
+
+
+class SWADLResultStore(SWADLDict):
+    # Purpose: test_data with a bounded window of validation records in memory
+    # Usage:
+    #       cfgdict[TEST_DATA] = SWADLResultStore(window=1000, file_name='test_results.sqlite')
+    #       test_data[entry_name]  # works whether the record is in memory or on disk
+
+    def __init__(self, window=1000, file_name='test_results.sqlite', owner=None, **kwargs):
+        # Purpose: Set up the window. The file isn't touched until something is spilled.
+        # Inputs: - window (int) how many validation records to keep in memory, at least 1
+        #         - file_name (str) the SQLite file older records go to. Like the Output logs, an
+        #           existing file is replaced, the first time this process spills to it.
+        #         - owner (str/None) what this store's records are kept under in the file. None
+        #           means one of its own.
+        self.window = max(int(window), 1)
+        self.file_name = file_name
+        self.owner = owner or uuid.uuid4().hex
+        self.spilled = 0
+        self._records = OrderedDict()
+        self._connection = None
+        self._file_started = False
+        self._lock = threading.RLock()
+        super().__init__(**kwargs)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            if isinstance(key, str) and key.startswith(VALIDATION_RECORD):
+                self._records[key] = None
+                self._records.move_to_end(key)
+                # the newest record is never spilled, its writer may still be filling it in
+                while len(self._records) > self.window:
+                    self._spill(self._records.popitem(last=False)[0])
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+            self._records.pop(key, None)
+
+    def __missing__(self, key):
+        # Purpose: dict calls this when a key isn't in memory, so look on disk
+        value = self._load(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return super().__contains__(key) or self._load(key) is not None
+
+    def get(self, key, default=None):
+        if super().__contains__(key):
+            return super().__getitem__(key)
+        value = self._load(key)
+        return default if value is None else value
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._records.clear()
+            if self._file_started:
+                self._connect().execute("DELETE FROM results WHERE owner = ?", (self.owner,))
+                self._connection.commit()
+            self.spilled = 0
+
+    def _connect(self):
+        # Purpose: Open (and start afresh) the spill file the first time it's needed
+        if self._connection is None:
+            with _started_files_lock:
+                path = os.path.abspath(self.file_name)
+                if path not in _started_files:
+                    for suffix in ('', '-wal', '-shm'):
+                        if os.path.exists(path + suffix):
+                            os.remove(path + suffix)
+                    _started_files.add(path)
+            self._file_started = True
+            # reports can come from the parallel and async session threads, hence the lock. Other
+            # stores may be writing to the same file, hence the timeout.
+            self._connection = sqlite3.connect(
+                self.file_name, check_same_thread=False, timeout=30
+            )
+            # a commit per record, so don't wait for the disk on every one. A crash can lose the
+            # last few, which the logs have anyway.
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=OFF")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "owner TEXT, key TEXT, value TEXT, UNIQUE (owner, key))"
+            )
+        return self._connection
+
+    def _spill(self, key):
+        # Purpose: Move one record from memory to the file
+        value = OrderedDict.pop(self, key)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO results (owner, key, value) VALUES (?, ?, ?)",
+            (self.owner, key, json.dumps(value, default=str)),
+        )
+        self._connection.commit()
+        self.spilled += 1
+
+    def _load(self, key):
+        # Purpose: Read a spilled record back
+        # Returns: SWADLDict, or None if it was never spilled
+        if not self._file_started or not isinstance(key, str):
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM results WHERE owner = ? AND key = ?", (self.owner, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._decode(row[0])
+
+    def spilled_items(self):
+        # Purpose: Yields (key, record) for everything spilled to disk, oldest first
+        if not self._file_started:
+            return
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, value FROM results WHERE owner = ? ORDER BY seq", (self.owner,)
+            ).fetchall()
+        for key, value in rows:
+            yield key, self._decode(value)
+
+    @staticmethod
+    def _decode(value):
+        # Purpose: JSON text back to SWADLDicts, in their original key order
+        def to_swadl_dict(pairs):
+            record = SWADLDict()
+            record.update(pairs)
+            return record
+        return json.loads(value, object_pairs_hook=to_swadl_dict)
+
+    def stats(self):
+        # Purpose: Returns a dict summary, suitable for bannerizing
+        return {
+            'window': self.window,
+            'records in memory': len(self._records),
+            'records spilled': self.spilled,
+            'spill file': self.file_name if self._file_started else None,
+        }
+
+    def close(self):
+        # Purpose: Close the spill file. The records in it stay there.
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class TestSWADLResultStore:
+    # Purpose: Unit tests for SWADLResultStore. Intended for pytest
+
+    @staticmethod
+    def record(number, **values):
+        # Purpose: A validation record, as _assertion_post_processor() files them
+        data = SWADLDict()
+        data['number'] = number
+        data.update(values)
+        return f'{VALIDATION_RECORD}test.check {number}', data
+
+    def test_spill_past_window(self, tmp_path):
+        # Purpose: Only the latest window records stay in memory, the rest go to the file
+        store = SWADLResultStore(window=2, file_name=str(tmp_path / 'results.sqlite'))
+        store['SEARCH_KEY'] = 'swadl'
+        keys = []
+        for number in range(5):
+            key, data = self.record(number)
+            store[key] = data
+            keys.append(key)
+        assert store.spilled == 3
+        assert list(store) == ['SEARCH_KEY'] + keys[3:]
+        assert [key for key, _ in store.spilled_items()] == keys[:3]
+        assert store.stats()['records in memory'] == 2
+        assert store['SEARCH_KEY'] == 'swadl'
+        store.close()
+
+    def test_spilled_lookups(self, tmp_path):
+        # Purpose: A spilled record can still be read by key, every way a dict can be
+        store = SWADLResultStore(window=1, file_name=str(tmp_path / 'results.sqlite'))
+        first, data = self.record(1, result=True)
+        store[first] = data
+        store[self.record(2)[0]] = self.record(2)[1]
+        assert not dict.__contains__(store, first)
+        assert first in store
+        assert store[first] == {'number': 1, 'result': True}
+        assert isinstance(store[first], SWADLDict)
+        assert store.get(first)['number'] == 1
+        missing = f'{VALIDATION_RECORD}never filed'
+        assert missing not in store
+        assert store.get(missing, 'default') == 'default'
+        try:
+            store[missing]
+            assert False, "a key that was never filed should raise KeyError"
+        except KeyError:
+            pass
+        store.close()
+
+    def test_clear(self, tmp_path):
+        # Purpose: clear() empties memory and the spill file both
+        store = SWADLResultStore(window=1, file_name=str(tmp_path / 'results.sqlite'))
+        keys = []
+        for number in range(3):
+            key, data = self.record(number)
+            store[key] = data
+            keys.append(key)
+        store.clear()
+        assert len(store) == 0
+        assert store.spilled == 0
+        assert keys[0] not in store
+        assert list(store.spilled_items()) == []
+        key, data = self.record(9)
+        store[key] = data
+        assert store[key]['number'] == 9
+        store.close()
+
+    def test_non_json_values(self, tmp_path):
+        # Purpose: Values that aren't JSON come back from the file as plain data, their str()
+        class Element(object):
+            def __str__(self):
+                return '<element>'
+
+        store = SWADLResultStore(window=1, file_name=str(tmp_path / 'results.sqlite'))
+        key, data = self.record(1, element=Element(), helper=len, nested={'x': [1, 2]})
+        store[key] = data
+        store[self.record(2)[0]] = self.record(2)[1]
+        loaded = store[key]
+        assert loaded['element'] == '<element>'
+        assert loaded['helper'] == str(len)
+        assert loaded['nested'] == {'x': [1, 2]}
+        assert isinstance(loaded['nested'], SWADLDict)
+        assert list(loaded) == ['number', 'element', 'helper', 'nested']
+        store.close()
+
+    def test_shared_file(self, tmp_path):
+        # Purpose: Stores spilling to the same file keep their own records, and don't replace
+        #          each other's
+        file_name = str(tmp_path / 'shared.sqlite')
+        stores = [SWADLResultStore(window=1, file_name=file_name) for _ in range(2)]
+        for number in range(3):
+            for owner, store in enumerate(stores):
+                key, data = self.record(number, owner=owner)
+                store[key] = data
+        key = self.record(0)[0]
+        assert [store[key]['owner'] for store in stores] == [0, 1]
+        assert [len(list(store.spilled_items())) for store in stores] == [2, 2]
+        stores[0].clear()
+        assert key not in stores[0]
+        assert stores[1][key]['owner'] == 1
+        for store in stores:
+            store.close()
@@ -0,0 +1,110 @@
+# File: swadl_result_stream.py
+# Purpose: A machine readable record of a run, alongside the text logs. Every validation and
+#          every assertion appends one JSON object (one line) to a JSONL file as the run goes, and
+#          read_results() streams them back one at a time, so run histories of any size can be
+#          aggregated without loading them whole.
+# Notes: Each record has:
+#            type        'validation' (a control's) or 'assertion' (assert_*/require_*/expect_*)
+#            test        cfgdict[TEST_NAME]
+#            name        get_name() of the control, or of the object that asserted
+#            selector    the control's selector, None for assertions
+#            validation  the validation name, or the assertion method
+#            expected    the expected value, or the assertion's description
+#            result      bool
+#            elapsed     seconds, None if not measured
+#            timestamp   time.time() when it was recorded
+#            comments    anything else the validation had to say
+#        The file is appended to, never replaced, so one file can hold many runs. Values that
+#        aren't JSON are written as their str().
+
+import glob
+import json
+import os
+
+from SWADL.engine.swadl_output_writer import SWADLOutputWriter
+
+
+class SWADLResultStream(object):
+    # Purpose: Appends result records to a JSONL file
+    # Usage:
+    #       stream = SWADLResultStream('test_results.jsonl')
+    #       stream.add({'type': 'validation', 'name': ..., 'result': True, ...})
+    #       stream.close()
+
+    def __init__(self, file_name, buffered=False, flush_lines=100, flush_interval=0.5):
+        # Purpose: Set up the stream
+        # Inputs: - file_name (str) the JSONL file to append to
+        #         - buffered (bool) write through a background thread, as a buffered Output does
+        #         - flush_lines, flush_interval see SWADLOutputWriter
+        self.file_name = file_name
+        self.count = 0
+        self.writer = None
+        if buffered:
+            self.writer = SWADLOutputWriter(
+                file_name, flush_lines=flush_lines, flush_interval=flush_interval, stamp=False
+            )
+
+    def add(self, record):
+        # Purpose: Append one record
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        self.count += 1
+        if self.writer is not None:
+            self.writer.put([line])
+            return
+        with open(self.file_name, "a", encoding='utf-8') as handle:
+            handle.write(f'{line}\n')
+
+    def flush(self):
+        # Purpose: Returns once every record added so far is in the file
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        # Purpose: Write out anything still buffered
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def read_results(paths, **matching):
+    # Purpose: Streams result records back from one or more JSONL files, one at a time
+    # Inputs: - paths (str/list) file names or glob patterns, read in the order given (each
+    #           pattern's matches in sorted order)
+    #         - matching: only yield records whose fields equal these, eg result=False
+    # Returns: generator of dicts
+    # Notes: A line that isn't complete JSON (the last line of a run that was killed mid write)
+    #        is skipped.
+    # Usage:
+    #       for record in read_results('results/*.jsonl', result=False):
+    #           print(record['name'], record['validation'])
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        for file_name in sorted(glob.glob(os.fspath(path))) or [path]:
+            with open(file_name, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if all(record.get(key) == value for key, value in matching.items()):
+                        yield record
+
+
+def summarize_results(records, key=('name', 'validation')):
+    # Purpose: Aggregates result records, one pass, holding only the totals
+    # Inputs: - records (iterable) eg read_results(...)
+    #         - key (tuple) the record fields to group by
+    # Returns: dict of {key values: {'passed', 'failed', 'elapsed', 'slowest'}}
+    summary = {}
+    for record in records:
+        group = tuple(record.get(field) for field in key)
+        totals = summary.get(group)
+        if totals is None:
+            totals = summary[group] = {'passed': 0, 'failed': 0, 'elapsed': 0.0, 'slowest': 0.0}
+        totals['passed' if record.get('result') else 'failed'] += 1
+        elapsed = record.get('elapsed')
+        if isinstance(elapsed, (int, float)):
+            totals['elapsed'] += elapsed
+            totals['slowest'] = max(totals['slowest'], elapsed)
+    return summary
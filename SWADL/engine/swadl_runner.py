@@ -0,0 +1,480 @@
+# File: swadl_runner.py
+# Purpose: Runs SWADLTest cases in parallel, across worker processes. Each worker is a fresh
+#          interpreter, so it has its own cfgdict, its own browser (started on its first test, and
+#          kept for the rest) and its own output files. When they're done, the workers' files are
+#          merged into the usual ones, and the results are summed up.
+# Usage: python -m SWADL.engine.swadl_runner [-j N] [--by class|test] [--data-shards N]
+#                                            [--output-dir DIR] tests...
+#        tests are what unittest.loadTestsFromNames() takes: modules, classes or single tests,
+#        eg Project.demos.google_unit_tests. A path to a .py file is taken as its module.
+# Notes: Work is handed out a class at a time, by default, so setUpClass() runs once per class as
+#        it would in one process. --by test spreads single tests instead, for a few long classes.
+#        Worker N writes under OUTPUT_DIR/swadl_workers/worker_N: its test_failures.log,
+#        test_results.log, SWADL_RESULT_STREAM and SWADL_RESULT_STORE_FILE, and everything it
+#        printed, in output.log. The logs and the result stream are then joined, worker by worker,
+#        into OUTPUT_DIR, and each test's outcome is written to OUTPUT_DIR/test_runs.jsonl (see
+#        read_results() in swadl_result_stream.py). The SQLite result stores are left per worker.
+#        A worker that dies fails the unit it was running, and a new one takes its place.
+#        --data-shards N splits each unit of data set tests (SWADLTest classes with a data_set,
+#        or every SWADLTest when SELENIUM_TEST_SET_FILE is set, see swadl_looper.py) N ways, by
+#        row: the kth copy runs with SWADL_DATA_SET_SHARD set to k/N, so their rows are spread
+#        across the workers. Their test ids get a [rows k/N] suffix. Other units run once.
+#        cfgdict isn't imported here until a worker has its own settings, because every worker
+#        imports this module first.
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import traceback
+import unittest
+from multiprocessing.connection import wait
+
+from SWADL.engine.swadl_constants import SWADL_OUTPUT_DIR
+from SWADL.engine.swadl_constants import SWADL_RESULT_STORE_FILE
+from SWADL.engine.swadl_constants import SWADL_RESULT_STREAM
+from SWADL.engine.swadl_constants import SWADL_WORKERS
+
+WORKERS_DIR = 'swadl_workers'
+WORKER_OUTPUT = 'output.log'
+TEST_RUNS = 'test_runs.jsonl'
+MERGED_FILES = ('test_failures.log', 'test_results.log', 'automation_failures.log',
+                'automation_results.log')
+
+# Purpose: this process's worker number, once it's a worker
+_worker_number = None
+
+
+class SWADLRunnerResult(unittest.TestResult):
+    # Purpose: Keeps each test's outcome and time, in a form that can be sent back from a worker
+
+    def __init__(self, worker=None):
+        super().__init__()
+        self.worker = worker
+        self.records = []
+        self.started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def _record(self, test, outcome, details=None):
+        # Purpose: File one test's outcome
+        self.records.append({
+            'type': 'test',
+            'test': test.id(),
+            'outcome': outcome,
+            'result': outcome in ('passed', 'skipped', 'expected failure'),
+            'elapsed': None if self.started is None else time.perf_counter() - self.started,
+            'worker': self.worker,
+            'details': details,
+            'timestamp': time.time(),
+        })
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, 'passed')
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, 'failed', self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, 'error', self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, 'skipped', reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, 'expected failure')
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, 'unexpected success')
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            problems = self.failures if failed else self.errors
+            self._record(subtest, 'failed' if failed else 'error', problems[-1][1])
+
+
+def worker_dir(output_dir, number):
+    # Purpose: Where worker `number` keeps its files
+    return os.path.join(output_dir, WORKERS_DIR, f'worker_{number}')
+
+
+def _start_worker(number, output_dir):
+    # Purpose: Points a worker process at its own files, before SWADL is imported in it
+    # Inputs: - number (int) the worker's number
+    #         - output_dir (str) the run's output directory
+    global _worker_number
+    _worker_number = number
+    shard = worker_dir(output_dir, number)
+    os.makedirs(shard, exist_ok=True)
+    os.environ[SWADL_OUTPUT_DIR] = shard
+    os.environ[SWADL_RESULT_STORE_FILE] = os.path.join(
+        shard, os.path.basename(os.environ.get(SWADL_RESULT_STORE_FILE, 'test_results.sqlite'))
+    )
+    if os.environ.get(SWADL_RESULT_STREAM):
+        os.environ[SWADL_RESULT_STREAM] = os.path.join(
+            shard, os.path.basename(os.environ[SWADL_RESULT_STREAM])
+        )
+    # line buffered, so output.log is readable while the run is going
+    sys.stdout = sys.stderr = open(
+        os.path.join(shard, WORKER_OUTPUT), 'a', encoding='utf-8', buffering=1
+    )
+
+
+def _stop_worker():
+    # Purpose: Quit the worker's browser, and let go of its output
+    from SWADL.engine.swadl_cfg import cfgdict
+    from SWADL.engine.swadl_constants import DRIVER
+    from SWADL.engine.swadl_constants import RESULT_STREAM
+    from SWADL.engine.swadl_constants import SESSION_POOL
+    for key in (SESSION_POOL, RESULT_STREAM):
+        if cfgdict.get(key) is not None:
+            cfgdict[key].close()
+    try:
+        cfgdict[DRIVER].stop()
+    except Exception:
+        traceback.print_exc()
+    sys.stdout.flush()
+
+
+def _worker_main(number, output_dir, connection):
+    # Purpose: A worker process. Runs the units it's sent until it's sent None.
+    _start_worker(number, output_dir)
+    try:
+        while True:
+            unit = connection.recv()
+            if unit is None:
+                break
+            connection.send(_run_unit(*unit))
+    finally:
+        _stop_worker()
+
+
+def _run_unit(test_ids, shard=''):
+    # Purpose: Runs one unit of work in a worker
+    # Inputs: - test_ids (list) the tests
+    #         - shard (str) the data set rows to run them on, eg '2/4'. '' means all of them
+    # Returns: list of test records
+    from SWADL.engine.swadl_cfg import cfgdict
+    from SWADL.engine.swadl_constants import SWADL_DATA_SET_SHARD
+    result = SWADLRunnerResult(worker=_worker_number)
+    try:
+        suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+    except Exception:
+        return error_records(test_ids, traceback.format_exc(), _worker_number, shard)
+    print(f"Running {', '.join(test_ids)}{shard_suffix(shard)}")
+    cfgdict[SWADL_DATA_SET_SHARD] = shard
+    suite(result)
+    for record in result.records:
+        record['test'] += shard_suffix(shard)
+    return result.records
+
+
+def shard_suffix(shard):
+    # Purpose: What's added to a test id run on a shard of the data set rows
+    return f" [rows {shard}]" if shard else ''
+
+
+def error_records(test_ids, details, worker, shard=''):
+    # Purpose: Records for tests that didn't get to report for themselves
+    return [{
+        'type': 'test', 'test': test_id + shard_suffix(shard), 'outcome': 'error',
+        'result': False, 'elapsed': None, 'worker': worker, 'details': details,
+        'timestamp': time.time(),
+    } for test_id in test_ids]
+
+
+def as_module_name(target):
+    # Purpose: Turns a path to a .py file into its module name. Anything else is left alone.
+    if target.endswith('.py'):
+        target = os.path.relpath(os.path.abspath(target))[:-3]
+        return target.replace(os.sep, '.').replace('/', '.')
+    return target
+
+
+def iterate_tests(suite):
+    # Purpose: Every test case in a (nested) suite
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from iterate_tests(item)
+        else:
+            yield item
+
+
+def collect_units(targets, by='class', data_shards=1):
+    # Purpose: Finds the tests, and splits them into units of work
+    # Inputs: - targets (list) test names, see the Usage at the top
+    #         - by (str) 'class' or 'test'
+    #         - data_shards (int) how many ways to split the rows of units of data set tests
+    # Returns: list of (list of test ids, data set shard), in the order they were found
+    # Notes: Loading a SWADLTest constructs it, so this imports SWADL in this process, as a
+    #        serial run would. No browser is started.
+    suite = unittest.defaultTestLoader.loadTestsFromNames([as_module_name(t) for t in targets])
+    from SWADL.engine.swadl_base_test import SWADLTest
+    from SWADL.engine.swadl_cfg import cfgdict
+    from SWADL.engine.swadl_constants import FAILURE_LOG
+    from SWADL.engine.swadl_constants import RESULT_LOG
+    from SWADL.engine.swadl_constants import SELENIUM_TEST_SET_FILE
+    for key in (FAILURE_LOG, RESULT_LOG):
+        if cfgdict.get(key) is not None:
+            cfgdict[key].close('after collecting tests')
+    units = {}
+    data_driven = set()
+    for test in iterate_tests(suite):
+        test_id = test.id()
+        key = test_id if by == 'test' else test_id.rsplit('.', 1)[0]
+        units.setdefault(key, []).append(test_id)
+        if isinstance(test, SWADLTest) and (test.data_set or cfgdict[SELENIUM_TEST_SET_FILE]):
+            data_driven.add(key)
+    collected = []
+    for key, test_ids in units.items():
+        if data_shards > 1 and key in data_driven:
+            collected.extend((test_ids, f'{which}/{data_shards}')
+                             for which in range(1, data_shards + 1))
+        else:
+            collected.append((test_ids, ''))
+    return collected
+
+
+def merge_outputs(output_dir, workers):
+    # Purpose: Joins the workers' logs and result streams into output_dir, worker by worker
+    # Returns: list of the files written
+    names = set(MERGED_FILES)
+    if os.environ.get(SWADL_RESULT_STREAM):
+        names.add(os.path.basename(os.environ[SWADL_RESULT_STREAM]))
+    merged = []
+    for name in sorted(names):
+        parts = [os.path.join(worker_dir(output_dir, number), name)
+                 for number in range(1, workers + 1)]
+        parts = [part for part in parts if os.path.exists(part)]
+        if not parts:
+            continue
+        if name in MERGED_FILES:
+            target = os.path.join(output_dir, name)
+        else:
+            target = os.environ[SWADL_RESULT_STREAM]
+            if not os.path.isabs(target):
+                target = os.path.join(output_dir, target)
+        mode = 'w' if name in MERGED_FILES else 'a'
+        with open(target, mode, encoding='utf-8') as handle:
+            for part in parts:
+                with open(part, encoding='utf-8') as source:
+                    shutil.copyfileobj(source, handle)
+        merged.append(target)
+    return merged
+
+
+def run(targets, workers=None, by='class', output_dir=None, stream=None, data_shards=1):
+    # Purpose: Runs the tests across workers, and reports on them
+    # Inputs: - targets (list) test names
+    #         - workers (int/None) how many processes. None means SWADL_WORKERS, and if that's 0,
+    #           one per CPU
+    #         - by (str) 'class' or 'test', what a unit of work is
+    #         - output_dir (str/None) where the merged files go. None means SWADL_OUTPUT_DIR, or
+    #           the current directory
+    #         - stream (file) where the report goes, sys.stdout by default
+    #         - data_shards (int) how many ways to split the rows of units of data set tests
+    # Returns: list of test records
+    stream = stream or sys.stdout
+    output_dir = os.path.abspath(output_dir or os.environ.get(SWADL_OUTPUT_DIR) or '.')
+    workers = workers or int(os.environ.get(SWADL_WORKERS) or 0) or os.cpu_count() or 1
+    shutil.rmtree(os.path.join(output_dir, WORKERS_DIR), ignore_errors=True)
+    # constructing the tests opens their logs, so keep this process's out of the way too
+    previous_output_dir = os.environ.get(SWADL_OUTPUT_DIR)
+    os.environ[SWADL_OUTPUT_DIR] = os.path.join(output_dir, WORKERS_DIR, 'collect')
+    try:
+        units = collect_units(targets, by=by, data_shards=data_shards)
+    finally:
+        if previous_output_dir is None:
+            del os.environ[SWADL_OUTPUT_DIR]
+        else:
+            os.environ[SWADL_OUTPUT_DIR] = previous_output_dir
+    workers = max(1, min(workers, len(units)))
+
+    started = time.perf_counter()
+    records = []
+    pending = collections.deque(units)
+    context = multiprocessing.get_context('spawn')
+    running = {}
+    # Purpose: number: (process, connection, the unit it's running or None)
+
+    def launch(number):
+        # Purpose: Start worker `number`, and give it something to do
+        connection, worker_end = context.Pipe()
+        process = context.Process(target=_worker_main, args=(number, output_dir, worker_end),
+                                  name=f'swadl worker {number}')
+        process.start()
+        worker_end.close()
+        running[number] = (process, connection, None)
+        hand_out(number)
+
+    def hand_out(number):
+        # Purpose: Send a worker its next unit, or tell it to finish
+        process, connection, _ = running[number]
+        unit = pending.popleft() if pending else None
+        connection.send(unit)
+        running[number] = (process, connection, unit)
+
+    def report_unit(number, unit_records):
+        records.extend(unit_records)
+        for record in unit_records:
+            elapsed = '' if record['elapsed'] is None else f" ({record['elapsed']:.2f}s)"
+            stream.write(f"[worker {number}] {record['test']} ... {record['outcome']}{elapsed}\n")
+        stream.flush()
+
+    for number in range(1, workers + 1):
+        launch(number)
+    while running:
+        waiting_on = {}
+        for number, (process, connection, unit) in running.items():
+            waiting_on[process.sentinel] = number
+            if unit is not None:
+                waiting_on[connection] = number
+        for ready in wait(list(waiting_on)):
+            number = waiting_on[ready]
+            if number not in running:
+                continue
+            process, connection, unit = running[number]
+            if ready is connection:
+                try:
+                    report_unit(number, connection.recv())
+                except EOFError:
+                    continue
+                hand_out(number)
+            elif unit is None:
+                # finished, as it was told to
+                process.join()
+                connection.close()
+                del running[number]
+            else:
+                # the worker died mid unit, eg the browser took the process down with it
+                process.join()
+                connection.close()
+                del running[number]
+                report_unit(number, error_records(
+                    unit[0], f"worker {number} exited with code {process.exitcode} while running "
+                             f"these tests", number, unit[1],
+                ))
+                if pending:
+                    launch(number)
+    wall_time = time.perf_counter() - started
+
+    merge_outputs(output_dir, workers)
+    with open(os.path.join(output_dir, TEST_RUNS), 'a', encoding='utf-8') as handle:
+        for record in records:
+            handle.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+    report(records, wall_time, workers, stream)
+    return records
+
+
+def report(records, wall_time, workers, stream):
+    # Purpose: Writes unittest's usual summary, for the whole run
+    problems = [record for record in records if not record['result']]
+    for record in problems:
+        stream.write(f"{'=' * 70}\n{record['outcome'].upper()}: {record['test']}"
+                     f" (worker {record['worker']})\n{'-' * 70}\n{record['details'] or ''}\n")
+    test_time = sum(record['elapsed'] or 0 for record in records)
+    stream.write(f"{'-' * 70}\nRan {len(records)} tests in {wall_time:.3f}s on {workers} workers"
+                 f" ({test_time:.3f}s of test time)\n\n")
+    if problems:
+        counts = {}
+        for record in problems:
+            counts[record['outcome']] = counts.get(record['outcome'], 0) + 1
+        stream.write(f"FAILED ({', '.join(f'{k}={v}' for k, v in counts.items())})\n")
+    else:
+        stream.write("OK\n")
+
+
+def main(arguments=None):
+    # Purpose: The command line
+    parser = argparse.ArgumentParser(description='Run SWADL tests in parallel processes')
+    parser.add_argument('tests', nargs='+', help='modules, classes or tests, or .py files')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='worker processes, default SWADL_WORKERS or one per CPU')
+    parser.add_argument('--by', choices=('class', 'test'), default='class',
+                        help='hand out a class, or a single test, at a time')
+    parser.add_argument('--data-shards', type=int, default=1,
+                        help='split the rows of data set test classes this many ways, default 1')
+    parser.add_argument('--output-dir', default=None,
+                        help='where the merged output goes, default SWADL_OUTPUT_DIR or here')
+    arguments = parser.parse_args(arguments)
+    records = run(arguments.tests, workers=arguments.workers, by=arguments.by,
+                  output_dir=arguments.output_dir, data_shards=arguments.data_shards)
+    return 0 if all(record['result'] for record in records) else 1
+
+
+class TestSWADLRunner:
+    # Purpose: Unit tests for the runner. Intended for pytest
+
+    TEST_MODULE = '''
+import unittest
+from SWADL.engine.swadl_base_test import SWADLTest
+
+
+class TestPlain(unittest.TestCase):
+    def test_plain(self):
+        pass
+
+
+class TestRows(SWADLTest):
+    data_set = {data_set!r}
+
+    def test_row(self):
+        pass
+'''
+
+    def write_suite(self, tmp_path, monkeypatch):
+        # Purpose: A module with a plain test class and a data set one, importable here and in
+        #          the workers
+        data_set = tmp_path / 'rows.csv'
+        data_set.write_text('user\n' + ''.join(f'user{n}\n' for n in range(6)))
+        (tmp_path / 'runner_suite.py').write_text(self.TEST_MODULE.format(data_set=str(data_set)))
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setenv(SWADL_OUTPUT_DIR, str(tmp_path))
+        return 'runner_suite'
+
+    def test_only_data_sets_are_sharded(self, tmp_path, monkeypatch):
+        # Purpose: --data-shards splits the data set class's unit, and leaves the others alone
+        module = self.write_suite(tmp_path, monkeypatch)
+        units = collect_units([module], data_shards=3)
+        assert units == [
+            (['runner_suite.TestPlain.test_plain'], ''),
+            (['runner_suite.TestRows.test_row'], '1/3'),
+            (['runner_suite.TestRows.test_row'], '2/3'),
+            (['runner_suite.TestRows.test_row'], '3/3'),
+        ]
+        assert [shard for _, shard in collect_units([module])] == ['', '']
+
+    def test_plain_tests_run_once(self, tmp_path, monkeypatch):
+        # Purpose: A plain test runs once however many data shards there are, while the data set
+        #          test runs once per shard
+        module = self.write_suite(tmp_path, monkeypatch)
+        with open(os.devnull, 'w') as stream:
+            records = run([module], workers=2, data_shards=3, output_dir=str(tmp_path),
+                          stream=stream)
+        assert sorted((record['test'], record['outcome']) for record in records) == [
+            ('runner_suite.TestPlain.test_plain', 'passed'),
+            ('runner_suite.TestRows.test_row [rows 1/3]', 'passed'),
+            ('runner_suite.TestRows.test_row [rows 2/3]', 'passed'),
+            ('runner_suite.TestRows.test_row [rows 3/3]', 'passed'),
+        ]
+        # collecting the tests doesn't leave this process's output redirected
+        assert os.environ[SWADL_OUTPUT_DIR] == str(tmp_path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
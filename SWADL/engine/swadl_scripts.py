@@ -0,0 +1,310 @@
+# File: swadl_scripts.py
+# Purpose: JavaScript that SWADL injects into the page with driver.execute_script().
+# Notes: Each of these replaces a run of separate WebDriver HTTP calls with one script call.
+#        They all share SWADL_JS_HELPERS, so "what counts as visible" or "what text does an
+#        element have" is decided in exactly one place. The helpers try to follow what
+#        selenium's own is_displayed(), is_enabled() and .text report.
+
+SWADL_JS_HELPERS = r"""
+var swadl = {
+    shown: function (el) {
+        if (!el || !el.isConnected) { return false; }
+        if (el.tagName === 'INPUT' && el.type === 'hidden') { return false; }
+        var style = window.getComputedStyle(el);
+        if (style.display === 'none') { return false; }
+        if (style.visibility === 'hidden' || style.visibility === 'collapse') { return false; }
+        for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+            if (parseFloat(window.getComputedStyle(node).opacity) === 0) { return false; }
+        }
+        var rect = el.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0) { return true; }
+        for (var i = 0; i < el.children.length; i++) {
+            if (swadl.shown(el.children[i])) { return true; }
+        }
+        return false;
+    },
+    enabled: function (el) {
+        return !(el.matches && el.matches(':disabled'));
+    },
+    text: function (el) {
+        if (!swadl.shown(el)) { return ''; }
+        return (el.innerText || el.textContent || '').replace(/\s+/g, ' ').trim();
+    },
+    find: function (selector, isText, hasText, index) {
+        var raw = Array.prototype.slice.call(document.querySelectorAll(selector));
+        var filtered = raw;
+        var texts = [];
+        if (isText !== null || hasText !== null) {
+            filtered = [];
+            for (var i = 0; i < raw.length; i++) {
+                var text = swadl.text(raw[i]);
+                if (texts.indexOf(text) < 0) { texts.push(text); }
+                if (filtered.length === 0 && (
+                        isText !== null ? text === isText : text.indexOf(hasText) >= 0)) {
+                    filtered.push(raw[i]);
+                }
+            }
+        }
+        if (index !== null) {
+            var at = index < 0 ? filtered.length + index : index;
+            filtered = (at >= 0 && at < filtered.length) ? [filtered[at]] : [];
+        }
+        return {raw: raw, filtered: filtered, texts: texts};
+    },
+    filter: function (selector, isText, hasText, index) {
+        var found = swadl.find(selector, isText, hasText, index);
+        return {filtered: found.filtered, texts: found.texts, count: found.raw.length};
+    },
+    snapshot: function (selector, isText, hasText, index) {
+        var found = swadl.find(selector, isText, hasText, index);
+        var first = found.filtered.length ? found.filtered[0] : null;
+        return {
+            filtered: found.filtered,
+            texts: found.texts,
+            count: found.raw.length,
+            raw: found.raw,
+            first: first === null ? null : {
+                visible: swadl.shown(first),
+                enabled: swadl.enabled(first),
+                text: swadl.text(first),
+                value: ('value' in first) ? first.value : null
+            }
+        };
+    },
+    batch: function (specs) {
+        var results = [];
+        for (var i = 0; i < specs.length; i++) {
+            try {
+                var status = swadl.snapshot(specs[i][0], specs[i][1], specs[i][2], specs[i][3]);
+                status.raw = null;
+                results.push(status);
+            } catch (e) {
+                results.push({error: String(e)});
+            }
+        }
+        return results;
+    }
+};
+"""
+
+STATUS_SNAPSHOT = SWADL_JS_HELPERS + r"""
+return swadl.snapshot(arguments[0], arguments[1], arguments[2], arguments[3]);
+"""
+# Purpose: Returns everything get_status() needs in one round trip.
+# Arguments: selector, is_text, has_text, index
+# Returns: {raw: [elements], filtered: [elements], texts: [unique text values],
+#           count: number of raw matches,
+#           first: null or {visible, enabled, text, value} for filtered[0]}
+# Notes: As with SWADLControl.get_elements(), is_text wins over has_text, only the first text
+#        match is kept, and index is applied after the text filter.
+
+FILTER_ELEMENTS = SWADL_JS_HELPERS + r"""
+return swadl.filter(arguments[0], arguments[1], arguments[2], arguments[3]);
+"""
+# Purpose: Runs the is_text/has_text/index filter in the browser, so get_elements() doesn't have
+#          to read .text back one element (one round trip) at a time.
+# Arguments: selector, is_text, has_text, index
+# Returns: {filtered: [elements], texts: [unique text values], count: number of raw matches}
+# Notes: Only the filtered handles come back over the wire, not every raw match.
+
+BATCH_STATUS = SWADL_JS_HELPERS + r"""
+return swadl.batch(arguments[0]);
+"""
+# Purpose: The STATUS_SNAPSHOT of many controls at once, for validating a whole section in one
+#          round trip per poll.
+# Arguments: list of [selector, is_text, has_text, index], one per control
+# Returns: list of snapshots in the same order, each without the raw elements. A selector the
+#          browser can't parse comes back as {error: message} rather than failing the batch.
+
+HARVEST_TEXT = SWADL_JS_HELPERS + r"""
+var raw = Array.prototype.slice.call(document.querySelectorAll(arguments[0]));
+return {raw: raw, texts: raw.map(function (el) { return swadl.text(el); })};
+"""
+# Purpose: Finds the elements for a selector and reads all their text in one round trip, for the
+#          shared query cache (see swadl_query_cache.py)
+# Arguments: selector
+# Returns: {raw: [elements], texts: [the text of each element, in the same order]}
+
+READ_DOM_EPOCH = r"""
+var state = window.__swadl_dom_epoch;
+if (!state || !state.observer) {
+    state = window.__swadl_dom_epoch = {
+        page: Date.now().toString(36) + Math.random().toString(36).slice(2),
+        count: 0,
+        observer: null
+    };
+    if (window.MutationObserver && document.documentElement) {
+        state.observer = new MutationObserver(function () { state.count++; });
+        state.observer.observe(document.documentElement, {
+            subtree: true, childList: true, attributes: true, characterData: true
+        });
+    }
+}
+return state.observer ? [state.page, state.count] : null;
+"""
+# Purpose: Reads the page's DOM epoch, installing the MutationObserver that keeps it the first time
+#          it's called on a page (see swadl_dom_epoch.py)
+# Arguments: none
+# Returns: [page id, mutation count], or null if there's no document to watch yet.
+# Notes: Navigation throws the window away, observer and all. The next call installs a new one
+#        with a new page id, which never matches anything recorded on the old page.
+
+WAIT_FOR_STATUS = SWADL_JS_HELPERS + r"""
+var selector = arguments[0], isText = arguments[1], hasText = arguments[2], index = arguments[3];
+var key = arguments[4], expected = arguments[5], timeoutMs = arguments[6];
+var done = arguments[arguments.length - 1];
+var started = Date.now(), finished = false, pending = false, checks = 0;
+var observer = null, poll = null, timer = null;
+
+function evaluate() {
+    var status = swadl.snapshot(selector, isText, hasText, index);
+    var first = status.first;
+    var values = {
+        exist: status.filtered.length > 0,
+        unique: status.filtered.length === 1,
+        visible: first !== null && first.visible,
+        enabled: first !== null && first.enabled,
+        value: first === null ? null : first.text
+    };
+    status.raw = null;
+    status.value = values[key];
+    checks++;
+    return status;
+}
+function finish(status) {
+    if (finished) { return; }
+    finished = true;
+    if (observer) { observer.disconnect(); }
+    clearInterval(poll);
+    clearTimeout(timer);
+    status.elapsed = (Date.now() - started) / 1000;
+    status.checks = checks;
+    done(status);
+}
+function check(last) {
+    pending = false;
+    if (finished) { return; }
+    var status;
+    try {
+        status = evaluate();
+    } catch (e) {
+        finish({error: String(e)});
+        return;
+    }
+    status.met = expected === null || status.value === expected;
+    if (status.met || last) { finish(status); }
+}
+function schedule() {
+    if (finished || pending) { return; }
+    pending = true;
+    var run = function () { if (pending) { check(false); } };
+    if (window.requestAnimationFrame) { window.requestAnimationFrame(run); }
+    setTimeout(run, 50);
+}
+
+check(timeoutMs <= 0);
+if (!finished) {
+    if (window.MutationObserver && document.documentElement) {
+        observer = new MutationObserver(schedule);
+        observer.observe(document.documentElement, {
+            subtree: true, childList: true, attributes: true, characterData: true
+        });
+    }
+    poll = setInterval(schedule, 250);
+    timer = setTimeout(function () { check(true); }, timeoutMs);
+}
+"""
+# Purpose: Waits in the browser for a control's status to reach an expected value, so a whole wait
+#          is one execute_async_script round trip (see swadl_browser_wait.py)
+# Arguments: selector, is_text, has_text, index, status key (exist, unique, visible, enabled or
+#            value), expected value (null means whatever it is now), timeout in milliseconds
+# Returns: a STATUS_SNAPSHOT style snapshot without the raw elements, plus
+#          {value: the status key's value, met: bool, elapsed: seconds, checks: evaluations}, or
+#          {error: message}
+# Notes: The condition is checked straight away, then again on the next animation frame (or 50ms,
+#        whichever is first) after any DOM mutation, and every 250ms regardless, for changes that
+#        are pure CSS. The last check is made when the timeout expires.
+
+# Purpose: Clears the current origin's localStorage and sessionStorage, between tests. A page that
+#          doesn't allow storage (about:blank, sandboxed frames) throws, which is ignored.
+CLEAR_STORAGE = r"""
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+return true;
+"""
+
+# Purpose: The page's JavaScript heap in bytes, where the browser reports it (Chromium's
+#          performance.memory), otherwise null
+READ_HEAP_SIZE = r"""
+return (window.performance && window.performance.memory)
+    ? window.performance.memory.usedJSHeapSize : null;
+"""
+
+WAIT_FOR_PAGE_READY = r"""
+var readyState = arguments[0], idleMs = arguments[1], stableMs = arguments[2];
+var timeoutMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var started = Date.now(), finished = false, checks = 0;
+var layout = null, layoutChanged = started, poll = null, timer = null;
+
+function lastNetworkActivity() {
+    var perf = window.performance;
+    if (!perf || !perf.getEntriesByType) { return started; }
+    var latest = 0, entries = perf.getEntriesByType('resource');
+    for (var i = 0; i < entries.length; i++) {
+        latest = Math.max(latest, entries[i].responseEnd);
+    }
+    var navigation = perf.getEntriesByType('navigation');
+    if (navigation.length) { latest = Math.max(latest, navigation[0].responseEnd); }
+    var origin = perf.timeOrigin || (perf.timing && perf.timing.navigationStart) || started;
+    return origin + latest;
+}
+function layoutSignature() {
+    var root = document.documentElement, body = document.body;
+    if (!root) { return ''; }
+    return [root.scrollWidth, root.scrollHeight,
+            body ? body.getElementsByTagName('*').length : 0].join(',');
+}
+function finish(status) {
+    if (finished) { return; }
+    finished = true;
+    clearInterval(poll);
+    clearTimeout(timer);
+    status.elapsed = (Date.now() - started) / 1000;
+    status.checks = checks;
+    done(status);
+}
+function check(last) {
+    if (finished) { return; }
+    checks++;
+    var now = Date.now(), signature = layoutSignature();
+    if (signature !== layout) { layout = signature; layoutChanged = now; }
+    var status = {
+        ready_state: document.readyState,
+        document_ready: document.readyState === 'complete' ||
+            (readyState === 'interactive' && document.readyState === 'interactive'),
+        network_idle: idleMs <= 0 || now - lastNetworkActivity() >= idleMs,
+        layout_stable: stableMs <= 0 || now - layoutChanged >= stableMs
+    };
+    status.ready = status.document_ready && status.network_idle && status.layout_stable;
+    if (status.ready || last) { finish(status); }
+}
+
+check(timeoutMs <= 0);
+if (!finished) {
+    poll = setInterval(function () { check(false); }, 50);
+    timer = setTimeout(function () { check(true); }, timeoutMs);
+}
+"""
+# Purpose: Waits in the browser for a page to be ready, so load_page() waits as long as the page
+#          takes, rather than a fixed time (see swadl_page_ready.py)
+# Arguments: document.readyState to wait for ('complete' or 'interactive'), milliseconds without a
+#            request finishing to count as network idle (0 means don't wait for it), milliseconds
+#            without the page's size or element count changing to count as layout stable (0 means
+#            don't wait for it), timeout in milliseconds
+# Returns: {ready: bool, ready_state, document_ready, network_idle, layout_stable: bools,
+#           elapsed: seconds, checks: evaluations}
+# Notes: Network idle is measured from the last request that finished, from the browser's
+#        resource timing, so a page that went quiet a while ago is idle straight away. Requests
+#        still in flight aren't visible there, so a page with a long poll open can look idle.
+#        Layout stable has to be seen for its whole window, from when the script starts.
@@ -0,0 +1,412 @@
+# File: swadl_session_pool.py
+# Purpose: Browser sessions that outlive a test. Starting a browser is the slowest thing a test
+#          does, so with SWADL_SESSION_POOL set to N, SWADLTest borrows one of up to N running
+#          sessions in setUp() and hands it back in tearDown(), where it's reset for the next test
+#          rather than quit.
+# Notes: Resetting a session:
+#            - closes every window but the first
+#            - clears localStorage and sessionStorage of the page it was left on
+#            - deletes the cookies (all of them where the browser allows it, see reset())
+#            - goes to about:blank
+#        A session is retired (quit, and replaced) instead when it doesn't answer, when it has run
+#        max_tests tests, when its page heap has grown past max_heap_mb, or when the reset fails.
+#        The pool belongs to one process. Run tests in one process (eg one nose2 run) to share it.
+
+import atexit
+import threading
+import time
+import weakref
+
+from SWADL.engine.swadl_cfg import cfgdict
+from SWADL.engine.swadl_constants import BLANK_PAGE
+from SWADL.engine.swadl_constants import DRIVER
+from SWADL.engine.swadl_constants import SESSION_POOL
+from SWADL.engine.swadl_constants import SWADL_SESSION_MAX_HEAP_MB
+from SWADL.engine.swadl_constants import SWADL_SESSION_MAX_TESTS
+from SWADL.engine.swadl_constants import SWADL_SESSION_POOL
+from SWADL.engine.swadl_scripts import CLEAR_STORAGE
+from SWADL.engine.swadl_scripts import READ_HEAP_SIZE
+
+# Purpose: every pool with sessions in it, so their browsers can be quit at exit
+_open_pools = weakref.WeakSet()
+
+
+def _close_open_pools():
+    # Purpose: Quit any pooled browsers still running when the interpreter exits
+    for pool in list(_open_pools):
+        pool.close()
+
+
+atexit.register(_close_open_pools)
+
+
+class SWADLSession(object):
+    # Purpose: One pooled browser session, and how it has been used
+
+    def __init__(self, driver, number):
+        # Inputs: - driver (WebDriver) the session
+        #         - number (int) counts sessions created by the pool, for reporting
+        self.driver = driver
+        self.number = number
+        self.created = time.time()
+        self.tests = 0
+        self.heap_size = None
+
+    def __repr__(self):
+        return f"<SWADLSession {self.number}, {self.tests} tests, {self.driver!r}>"
+
+    def healthy(self):
+        # Purpose: Whether the browser still answers
+        try:
+            self.driver.window_handles
+        except Exception:
+            return False
+        return True
+
+    def read_heap_size(self):
+        # Purpose: Reads the page's JavaScript heap, in bytes
+        # Returns: the size, or None where the browser doesn't report it
+        try:
+            self.heap_size = self.driver.execute_script(READ_HEAP_SIZE)
+        except Exception:
+            self.heap_size = None
+        return self.heap_size
+
+    def reset(self):
+        # Purpose: Put the session back the way a new one starts out
+        # Notes: WebDriver only deletes the current page's cookies, so this is done before leaving
+        #        it. Where the driver has the Chrome DevTools protocol, every cookie goes.
+        driver = self.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.execute_script(CLEAR_STORAGE)
+        driver.delete_all_cookies()
+        if hasattr(driver, 'execute_cdp_cmd'):
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.get(BLANK_PAGE)
+
+    def quit(self):
+        # Purpose: End the session. A session that has already died can't be quit, which is fine.
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class SWADLSessionPool(object):
+    # Purpose: Keeps up to `size` browser sessions running, and lends them out one test at a time
+    # Usage:
+    #       pool = SWADLSessionPool(creator=webdriver.Chrome, size=2, max_tests=50)
+    #       pool.warm()                     # optional, start them all now
+    #       session = pool.acquire()
+    #       session.driver.get(url)
+    #       pool.release(session)           # reset, or retired and replaced
+    #       pool.close()
+
+    def __init__(self, creator, size=1, max_tests=0, max_heap_mb=0):
+        # Purpose: Set up the pool. No browser is started until one is needed.
+        # Inputs: - creator (callable) returns a new WebDriver
+        #         - size (int) most sessions running at once
+        #         - max_tests (int) tests a session runs before it's replaced, 0 for no limit
+        #         - max_heap_mb (float) page heap a session may reach before it's replaced, 0 for
+        #           no limit. Only browsers that report it (Chromium's) can be held to it.
+        assert size >= 1, f"a session pool needs at least one session, not {size}"
+        self.creator = creator
+        self.size = size
+        self.max_tests = max_tests
+        self.max_heap_mb = max_heap_mb
+        self.idle = []
+        self.sessions = []
+        self.starting = 0
+        self.created = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.stats = {'created': 0, 'lent': 0, 'reused': 0, 'retired': 0}
+        self.retirements = []
+
+    def _start_session(self, lend=False):
+        # Purpose: Start a browser, and add it to the pool. The caller has counted it in
+        #          self.starting.
+        # Inputs: - lend (bool) it's for the caller, so it isn't put with the idle sessions
+        try:
+            driver = self.creator()
+        except Exception:
+            with self.condition:
+                self.starting -= 1
+                self.condition.notify_all()
+            raise
+        with self.condition:
+            self.starting -= 1
+            if self.closed:
+                self.condition.notify_all()
+                SWADLSession(driver, 0).quit()
+                raise AssertionError("this session pool has been closed")
+            self.created += 1
+            session = SWADLSession(driver, self.created)
+            self.stats['created'] += 1
+            self.sessions.append(session)
+            if not lend:
+                self.idle.append(session)
+            _open_pools.add(self)
+            self.condition.notify_all()
+        return session
+
+    def _reserve_start(self):
+        # Purpose: Count a new session as starting, if there's room for one. Call with the lock.
+        if self.closed or len(self.sessions) + self.starting >= self.size:
+            return False
+        self.starting += 1
+        return True
+
+    def warm(self, count=None):
+        # Purpose: Start sessions now, rather than as tests ask for them, all at once
+        # Inputs: - count (int/None) how many to have running. None means the pool's size
+        threads = []
+        with self.condition:
+            wanted = min(self.size if count is None else count, self.size)
+            while len(self.sessions) + self.starting < wanted and self._reserve_start():
+                thread = threading.Thread(target=self._start_quietly, name='swadl session start')
+                threads.append(thread)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _start_quietly(self):
+        # Purpose: _start_session() for a background thread. A session that won't start is left
+        #          to the next acquire(), which will raise for it.
+        try:
+            self._start_session()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        # Purpose: Borrow a session, starting one if none are idle and there's room
+        # Inputs: - timeout (float/None) seconds to wait for a session to come back when all are
+        #           lent out. None waits as long as it takes.
+        # Returns: SWADLSession
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.condition:
+                assert not self.closed, "this session pool has been closed"
+                while not self.idle and not self._reserve_start():
+                    remaining = None if end is None else end - time.monotonic()
+                    assert remaining is None or remaining > 0, (
+                        f"no browser session came free within {timeout} seconds"
+                    )
+                    self.condition.wait(remaining)
+                session = self.idle.pop() if self.idle else None
+            if session is None:
+                session = self._start_session(lend=True)
+            elif not session.healthy():
+                self._retire(session, 'it stopped answering while idle')
+                continue
+            with self.condition:
+                self.stats['lent'] += 1
+                self.stats['reused'] += session.tests > 0
+            return session
+
+    def release(self, session):
+        # Purpose: Take a session back, resetting it, or retiring it if it's no longer fit to lend
+        # Returns: None if it was reset, otherwise why it was retired
+        session.tests += 1
+        reason = self.retire_reason(session)
+        if reason is None:
+            try:
+                session.reset()
+            except Exception as e:
+                reason = f"its reset failed: {e}"
+        if reason is not None:
+            self._retire(session, reason)
+            return reason
+        with self.condition:
+            if self.closed:
+                session.quit()
+            else:
+                self.idle.append(session)
+            self.condition.notify_all()
+        return None
+
+    def retire_reason(self, session):
+        # Purpose: Why a session that has just been used shouldn't be lent again
+        # Returns: str, or None if it can be
+        if not session.healthy():
+            return 'it stopped answering'
+        if self.max_tests and session.tests >= self.max_tests:
+            return f"it has run {session.tests} tests"
+        if self.max_heap_mb:
+            heap_size = session.read_heap_size()
+            if heap_size is not None and heap_size > self.max_heap_mb * 1024 * 1024:
+                return f"its page heap reached {heap_size / 1024 / 1024:.0f} MB"
+        return None
+
+    def _retire(self, session, reason):
+        # Purpose: Quit a session and drop it from the pool, and start its replacement in the
+        #          background, so the pool stays warm
+        session.quit()
+        with self.condition:
+            if session in self.sessions:
+                self.sessions.remove(session)
+            if session in self.idle:
+                self.idle.remove(session)
+            self.stats['retired'] += 1
+            self.retirements.append((session.number, session.tests, reason))
+            replace = self._reserve_start()
+            self.condition.notify_all()
+        if replace:
+            threading.Thread(
+                target=self._start_quietly, name='swadl session start', daemon=True
+            ).start()
+
+    def close(self):
+        # Purpose: Quit every session. Sessions still lent out are quit when they come back.
+        with self.condition:
+            self.closed = True
+            idle = self.idle
+            self.idle = []
+            for session in idle:
+                self.sessions.remove(session)
+            self.condition.notify_all()
+        for session in idle:
+            session.quit()
+        _open_pools.discard(self)
+
+    def report(self):
+        # Purpose: A summary of how the pool has been used, for the log
+        lines = [f"{self.stats}"]
+        for number, tests, reason in self.retirements:
+            lines.append(f"session {number} retired after {tests} tests, because {reason}")
+        return '\n'.join(lines)
+
+
+def get_session_pool(minimum=1):
+    # Purpose: The process's session pool, built from cfgdict the first time it's asked for
+    # Inputs: - minimum (int) sessions the caller needs at once. The pool grows to fit, if
+    #           SWADL_SESSION_POOL is smaller
+    # Notes: Its sessions come from the same creator as cfgdict[DRIVER] (see swadl_cfg.py)
+    pool = cfgdict.get(SESSION_POOL)
+    if pool is None:
+        pool = cfgdict[SESSION_POOL] = SWADLSessionPool(
+            creator=cfgdict[DRIVER].create,
+            size=max(cfgdict[SWADL_SESSION_POOL], minimum),
+            max_tests=cfgdict[SWADL_SESSION_MAX_TESTS],
+            max_heap_mb=cfgdict[SWADL_SESSION_MAX_HEAP_MB],
+        )
+    elif pool.size < minimum:
+        with pool.condition:
+            pool.size = minimum
+            pool.condition.notify_all()
+    return pool
+
+
+class TestSWADLSessionPool:
+    # Purpose: Unit tests for SWADLSessionPool, on the offline local driver. Intended for pytest
+
+    @staticmethod
+    def pool(**kwargs):
+        # Purpose: A pool of local driver sessions
+        from SWADL.engine.swadl_local_driver import SWADLLocalDriver
+        return SWADLSessionPool(creator=SWADLLocalDriver, **kwargs)
+
+    @staticmethod
+    def wait_for(condition, timeout=5.0):
+        # Purpose: Wait for something a background thread does
+        end = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < end, "timed out waiting"
+            time.sleep(0.01)
+
+    def test_reuse_after_release(self):
+        # Purpose: A released session is reset and lent again, rather than a new one started
+        pool = self.pool(size=1)
+        session = pool.acquire()
+        session.driver.get('https://swadl.example/page')
+        session.driver.add_cookie({'name': 'user', 'value': '1'})
+        session.driver.open_window('https://swadl.example/popup')
+        assert pool.release(session) is None
+        again = pool.acquire()
+        assert again is session
+        assert again.driver.window_handles == [again.driver.current_window_handle]
+        assert again.driver.current_url == BLANK_PAGE
+        assert pool.stats == {'created': 1, 'lent': 2, 'reused': 1, 'retired': 0}
+        pool.release(again)
+        pool.close()
+
+    def test_retire_on_max_tests(self):
+        # Purpose: A session is quit after max_tests tests, and a new one lent after it
+        pool = self.pool(size=1, max_tests=2)
+        first = pool.acquire()
+        assert pool.release(first) is None
+        assert pool.acquire() is first
+        assert pool.release(first) == "it has run 2 tests"
+        assert not first.driver.alive
+        second = pool.acquire()
+        assert second is not first and second.driver.alive
+        assert pool.retirements == [(1, 2, "it has run 2 tests")]
+        pool.release(second)
+        pool.close()
+
+    def test_retire_unhealthy(self):
+        # Purpose: A session that stops answering is retired, whether lent out or idle
+        pool = self.pool(size=1)
+        session = pool.acquire()
+        session.driver.crash()
+        assert pool.release(session) == 'it stopped answering'
+        self.wait_for(lambda: len(pool.idle) == 1)
+        idle = pool.idle[0]
+        idle.driver.crash()
+        session = pool.acquire()
+        assert session is not idle and session.healthy()
+        assert [reason for _, _, reason in pool.retirements] == [
+            'it stopped answering', 'it stopped answering while idle',
+        ]
+        pool.release(session)
+        pool.close()
+
+    def test_background_replacement(self):
+        # Purpose: A retired session is replaced in the background, so the pool stays warm
+        pool = self.pool(size=2, max_tests=1)
+        pool.warm()
+        assert len(pool.idle) == 2 and pool.stats['created'] == 2
+        session = pool.acquire()
+        assert pool.release(session) is not None
+        self.wait_for(lambda: len(pool.idle) == 2)
+        assert pool.stats['created'] == 3
+        assert session not in pool.sessions
+        pool.close()
+
+    def test_acquire_timeout(self):
+        # Purpose: With every session lent out, acquire() gives up after its timeout
+        pool = self.pool(size=1)
+        session = pool.acquire()
+        started = time.monotonic()
+        try:
+            pool.acquire(timeout=0.2)
+            assert False, "acquire() should have timed out"
+        except AssertionError as e:
+            assert 'within 0.2 seconds' in str(e)
+        assert time.monotonic() - started >= 0.2
+        pool.release(session)
+        assert pool.acquire(timeout=0.2) is session
+        pool.release(session)
+        pool.close()
+
+    def test_close_while_lent(self):
+        # Purpose: close() quits the idle sessions now, and lent ones as they come back
+        pool = self.pool(size=2)
+        lent = pool.acquire()
+        idle = pool.acquire()
+        pool.release(idle)
+        pool.close()
+        assert not idle.driver.alive
+        assert lent.driver.alive
+        assert pool.release(lent) is None
+        assert not lent.driver.alive
+        try:
+            pool.acquire(timeout=0)
+            assert False, "a closed pool shouldn't lend sessions"
+        except AssertionError as e:
+            assert 'closed' in str(e)
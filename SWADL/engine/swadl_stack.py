@@ -0,0 +1,160 @@
+# File: swadl_stack.py
+# Purpose: Cheap stack inspection for the assertion machinery. Every assert_*, require_* and
+#          expect_* call wants to know who called it, and failures want a stack trace. Doing that
+#          with inspect.stack() and traceback.format_stack() reads source lines for every frame on
+#          the stack, on every call. Here we walk frame references instead, and only format a
+#          stack trace, and read its source lines, when something actually looks at it.
+
+import inspect
+import sys
+import traceback
+
+
+def caller_frame(depth=1):
+    # Purpose: Returns the frame `depth` levels above the function calling this one
+    # Inputs: depth (int) 1 means the caller's caller, as inspect.stack()[1] would be for them
+    # Notes: sys._getframe() is a CPython detail, so fall back to walking f_back elsewhere.
+    try:
+        return sys._getframe(depth + 1)
+    except AttributeError:
+        frame = inspect.currentframe().f_back
+        for _ in range(depth):
+            frame = frame.f_back
+        return frame
+
+
+def caller_name(depth=1):
+    # Purpose: Returns the function name `depth` levels above the function calling this one.
+    #          Same as inspect.stack()[depth][0].f_code.co_name, without building the stack.
+    return caller_frame(depth + 1).f_code.co_name
+
+
+class SWADLStackTrace(list):
+    # Purpose: A stack trace, as the list of strings traceback.format_stack() returns, that isn't
+    #          formatted until something reads it. Until then only the file names, line numbers
+    #          and function names of the frames are kept. The first read reads the source lines
+    #          and formats them.
+    # Usage:
+    #       reporting_dict[STACKTRACE] = SWADLStackTrace(sys._getframe())
+    # Notes: It's a real list, so bannerize() and anything else that handles the old eager list
+    #        handles this exactly the same way. The frames themselves aren't kept: they'd keep
+    #        running, so the line numbers would be wrong by the time the trace was read, and
+    #        they'd keep every local on the stack alive with them.
+
+    def __init__(self, frame=None):
+        # Purpose: Note where each frame is, format nothing yet
+        super().__init__()
+        self._summary = None
+        if frame is not None:
+            self._summary = traceback.StackSummary.extract(
+                traceback.walk_stack(frame), lookup_lines=False
+            )
+            # walk_stack() goes from the innermost frame out, format_stack() the other way
+            self._summary.reverse()
+
+    @property
+    def rendered(self):
+        # Purpose: Whether the trace has been formatted yet
+        return self._summary is None
+
+    def _render(self):
+        # Purpose: Format the trace the first time it's needed
+        if self._summary is not None:
+            summary, self._summary = self._summary, None
+            lines = summary.format()
+            # sometimes we have a trailing blank line or two
+            while lines and lines[-1].strip() == '':
+                del lines[-1]
+            list.extend(self, lines)
+
+    def __len__(self):
+        self._render()
+        return list.__len__(self)
+
+    def __iter__(self):
+        self._render()
+        return list.__iter__(self)
+
+    def __getitem__(self, item):
+        self._render()
+        return list.__getitem__(self, item)
+
+    def __contains__(self, item):
+        self._render()
+        return list.__contains__(self, item)
+
+    def __eq__(self, other):
+        self._render()
+        return list.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._render()
+        return list.__repr__(self)
+
+    def __str__(self):
+        self._render()
+        return list.__repr__(self)
+
+
+class SWADLLazyText(object):
+    # Purpose: Text that isn't built until something reads it. logging only calls str() on a
+    #          message when a handler is going to write it, so a failure report logged this way,
+    #          stack trace and all, is only rendered if it's actually written somewhere.
+    # Usage:
+    #       message = SWADLLazyText(lambda: self.bannerize(reporting_dict))
+    #       self.log.warning(message)           # rendered here, if warnings are written
+    #       raise AssertionError(str(message))  # or here, once
+
+    def __init__(self, render):
+        # Purpose: Keep the function that builds the text
+        self._render = render
+        self._text = None
+
+    @property
+    def rendered(self):
+        # Purpose: Whether the text has been built yet
+        return self._text is not None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = self._render()
+            self._render = None
+        return self._text
+
+
+class TestSWADLStackTrace:
+    # Purpose: Unit tests for SWADLStackTrace. Intended for pytest
+
+    def test_same_as_format_stack(self):
+        # Purpose: It reads the same as traceback.format_stack() would have at capture time
+        trace, eager = SWADLStackTrace(sys._getframe()), traceback.format_stack(sys._getframe())
+        assert not trace.rendered
+        assert list(trace) == eager
+        assert trace.rendered
+
+    def test_line_numbers_at_capture(self):
+        # Purpose: The line shown is where it was captured, not where the frame got to since
+        trace = SWADLStackTrace(sys._getframe())
+        captured_at = sys._getframe().f_lineno - 1
+        moved_on = [line for line in range(3)]
+        assert moved_on
+        assert f'line {captured_at},' in trace[-1]
+
+    def test_frames_not_kept(self):
+        # Purpose: The trace holds no frames, so it doesn't keep the locals on the stack alive
+        import gc
+        import weakref
+
+        class Local(object):
+            pass
+
+        def capture():
+            local = Local()
+            return SWADLStackTrace(sys._getframe()), weakref.ref(local)
+
+        trace, local_ref = capture()
+        gc.collect()
+        assert local_ref() is None
+        assert 'capture' in trace[-1]
@@ -0,0 +1,47 @@
+# File: swadl_validation_record.py
+# Purpose: The compact record of a passing validation. Building the full report of a validation
+#          means reading the control's status back from the browser and bannerizing it, which on a
+#          green run is most of what _validate() costs, for a report nobody reads. With lazy
+#          reports, a pass only files one of these, and the full report is rendered on demand.
+# Notes: render() reports the control's status as it is when it's rendered, which for a record
+#        rendered at the end of a run may not be what it was when it passed. Failures are always
+#        reported in full, at the time.
+
+from collections import namedtuple
+
+
+class SWADLValidationRecord(
+    namedtuple(
+        'SWADLValidationRecord',
+        'control validation elapsed result expected fatal comments polls',
+    )
+):
+    # Purpose: One passing validation
+    # Usage:
+    #       record = SWADLValidationRecord(control=self, validation='validate_visible', ...)
+    #       str(record)       # one line, for the result log
+    #       record.render()   # the full bannerized report
+
+    __slots__ = ()
+
+    def __str__(self):
+        # Purpose: The one line summary that goes in the result log
+        elapsed = self.control.format_elapsed_time(self.elapsed)
+        result = 'PASSED' if self.result else 'FAILED'
+        return f'{result} {self.control.get_name()}.{self.validation} in {elapsed}'
+
+    def get_report(self):
+        # Purpose: Returns the full report dict, as _validate() would have built it
+        return self.control._make_validation_report(
+            comments=self.comments,
+            elapsed_time=self.elapsed,
+            expected=self.expected,
+            fatal=self.fatal,
+            polls=self.polls,
+            result=self.result,
+            validation_name=self.validation,
+        )
+
+    def render(self):
+        # Purpose: Returns the full bannerized report
+        return self.control.bannerize(data=self.get_report(), title="SWADL Validation Result")
@@ -0,0 +1,23 @@
+@echo off
+if not %1.==/q. (
+    echo runparallel.bat called with %1 %2 %3 %4 %5 %6 %7 %8 %9
+    echo 2024 Akien Maciain
+    echo Purpose: To clean up from the last run, run tests in parallel processes, and display output files
+    echo Usage:
+    echo    Runs under cmd.exe
+    echo    Run with: runparallel [-j workers] [tests] [and whatever other arguments]
+    echo        tests = modules, classes or tests, as nose2 takes them, or .py files
+    echo        -j defaults to SWADL_WORKERS, or one worker per CPU
+)
+if exist FAILURE_*.png del FAILURE_*.png
+if exist test_*.log del test_*.log
+if exist swadl_workers rmdir /s /q swadl_workers
+echo Calling: python -m SWADL.engine.swadl_runner %1 %2 %3 %4 %5 %6 %7 %8 %9
+python -m SWADL.engine.swadl_runner %1 %2 %3 %4 %5 %6 %7 %8 %9
+if not exist test_failures.log goto done
+echo test_failures.log:
+type test_failures.log
+echo.
+echo For all test results: type test_results.log
+echo For the output of each worker: dir swadl_workers
+:done